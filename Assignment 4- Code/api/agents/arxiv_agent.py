@@ -1,32 +1,24 @@
 from langchain_core.runnables import RunnablePassthrough
-import arxiv
 from typing import List, Dict, Any
 from ..models import ArxivResult
+from ..core.search_clients import search_arxiv
 import logging
  
 logger = logging.getLogger(__name__)
  
 class ArxivAgent:
-    def __init__(self):
-        self.client = arxiv.Client()
- 
     async def search_papers(self, state: Dict[str, Any]) -> List[ArxivResult]:
         try:
-            # Create search instance for each query
-            search = arxiv.Search(
-                query=state["query"],
-                max_results=5,
-                sort_by=arxiv.SortCriterion.Relevance
-            )
+            papers = await search_arxiv(state["query"], max_results=5)
            
             results = []
-            for paper in self.client.results(search):
+            for paper in papers:
                 result = ArxivResult(
-                    title=paper.title,
-                    summary=paper.summary,
-                    published=paper.published.strftime("%Y-%m-%d"),
-                    authors=[str(author) for author in paper.authors],
-                    link=paper.pdf_url
+                    title=paper["title"],
+                    summary=paper["summary"],
+                    published=paper["published"][:10],
+                    authors=paper["authors"],
+                    link=paper["link"]
                 )
                 results.append(result)
                
@@ -37,4 +29,3 @@ class ArxivAgent:
  
     def create_node(self):
         return self.chain
- 
\ No newline at end of file
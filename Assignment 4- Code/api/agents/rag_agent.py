@@ -1,10 +1,11 @@
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnablePassthrough
-from ..core.pinecone_client import index
+from ..core.retrieval import retrieval_client
 from ..core.config import OPENAI_API_KEY
+from ..core.embedding_cache import CachedEmbeddings, embedding_cache
 import logging
-from typing import Dict, Any, TypedDict
+from typing import Dict, Any, List, Optional, TypedDict
  
 logger = logging.getLogger(__name__)
  
@@ -19,9 +20,12 @@ class RAGState(TypedDict):
 class RAGAgent:
     def __init__(self):
         logger.info("Initializing RAG Agent...")
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=OPENAI_API_KEY
+        self.embeddings = CachedEmbeddings(
+            OpenAIEmbeddings(
+                model="text-embedding-3-small",
+                openai_api_key=OPENAI_API_KEY
+            ),
+            embedding_cache
         )
         self.llm = ChatOpenAI(
             model="gpt-4-turbo-preview",
@@ -74,7 +78,7 @@ class RAGAgent:
            
             filter_dict = {"document_id": state["document_id"]} if state.get("document_id") else {}
            
-            results = index.query(
+            results = await retrieval_client.query(
                 vector=query_embedding,
                 top_k=3,
                 filter=filter_dict,
@@ -97,22 +101,32 @@ class RAGAgent:
     def create_node(self):
         return self.chain
  
-    async def execute_rag(self, query: str, document_id: str = None) -> Dict[str, Any]:
+    async def retrieve(self, query_embedding: List[float], document_id: str = None) -> list:
+        """Vector search for an already embedded query"""
+        filter_dict = {"document_id": document_id} if document_id else {}
+       
+        results = await retrieval_client.query(
+            vector=query_embedding,
+            top_k=3,
+            filter=filter_dict,
+            include_metadata=True
+        )
+        return results.matches or []
+ 
+    async def execute_rag(self, query: str, document_id: str = None,
+                          query_embedding: Optional[List[float]] = None,
+                          matches: Optional[list] = None) -> Dict[str, Any]:
+        """Answer a query from the document; batch callers may pass a precomputed
+        embedding or retrieved matches to skip those steps."""
         try:
             logger.info(f"Executing RAG workflow for query: {query}")
            
-            query_embedding = await self.embeddings.aembed_query(query)
-           
-            filter_dict = {"document_id": document_id} if document_id else {}
-           
-            results = index.query(
-                vector=query_embedding,
-                top_k=3,
-                filter=filter_dict,
-                include_metadata=True
-            )
+            if matches is None:
+                if query_embedding is None:
+                    query_embedding = await self.embeddings.aembed_query(query)
+                matches = await self.retrieve(query_embedding, document_id)
            
-            if not results.matches:
+            if not matches:
                 return {
                     "answer": "No relevant information found in the document.",
                     "context_summary": "",
@@ -120,7 +134,7 @@ class RAGAgent:
                     "document_id": document_id
                 }
            
-            contexts = [match.metadata.get("text", "") for match in results.matches]
+            contexts = [match.metadata.get("text", "") for match in matches]
             context_text = "\n".join(contexts)
            
             context_prompt = f"""
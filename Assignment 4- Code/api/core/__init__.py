@@ -1,12 +1,20 @@
 from .config import *
 from .pinecone_client import init_pinecone, index
+from .vector_index import LocalVectorIndex
+from .retrieval import retrieval_client
 from .middleware import RateLimitMiddleware, ErrorHandlingMiddleware
 from .session_manager import research_session_manager
+from .embedding_cache import embedding_cache
+from .answer_cache import research_answer_cache
 
 __all__ = [
     'init_pinecone',
     'index',
+    'LocalVectorIndex',
+    'retrieval_client',
     'RateLimitMiddleware',
     'ErrorHandlingMiddleware',
-    'research_session_manager'
+    'research_session_manager',
+    'embedding_cache',
+    'research_answer_cache'
 ]
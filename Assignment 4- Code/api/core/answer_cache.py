@@ -0,0 +1,141 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import ResearchResult
+from .config import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS, VECTOR_SIMILARITY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+AGENTS = ("rag", "arxiv", "web")
+
+
+@dataclass
+class CachedAnswer:
+    query: str
+    embedding: np.ndarray
+    agents: FrozenSet[str]
+    result: ResearchResult
+    created_at: float
+
+
+class SemanticAnswerCache:
+    """Reuse research answers for near-duplicate questions on the same document.
+
+    A stored answer is returned when a new query embedding has cosine
+    similarity of at least ``threshold`` with a stored one, the same set of
+    agents was requested, and the entry is younger than ``ttl_seconds``.
+    Only answers that used the RAG agent are stored, since the others do
+    not depend on the document.
+    """
+
+    def __init__(self, threshold: float = VECTOR_SIMILARITY_THRESHOLD,
+                 ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries_per_document: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_document = max_entries_per_document
+        self._entries: Dict[str, List[CachedAnswer]] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+    def lookup(self, document_id: str, query_embedding: List[float],
+               agents: Iterable[str]) -> Optional[Tuple[ResearchResult, float]]:
+        """Return the closest cached result and its similarity, if any qualifies"""
+        agents = frozenset(agents)
+        entries = self._live_entries(document_id)
+        candidates = [
+            entry for entry in entries
+            if entry.agents == agents and entry.result.document_id == document_id
+        ]
+        if not candidates:
+            self._stats["misses"] += 1
+            return None
+
+        query = self._normalize(query_embedding)
+        similarities = np.stack([entry.embedding for entry in candidates]) @ query
+        best = int(np.argmax(similarities))
+        similarity = float(similarities[best])
+        if similarity < self.threshold:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["hits"] += 1
+        logger.info(
+            f"Answer cache hit for document {document_id} "
+            f"(similarity {similarity:.3f} to '{candidates[best].query}')"
+        )
+        return candidates[best].result, similarity
+
+    async def lookup_query(self, embeddings, document_id: str, query: str, agents: Iterable[str]
+                           ) -> Tuple[Optional[List[float]], Optional[Tuple[ResearchResult, float]]]:
+        """Embed ``query`` and look it up, returning the embedding for reuse and the hit.
+
+        Without the RAG agent nothing can be cached, so the query is not embedded.
+        """
+        agents = frozenset(agents)
+        if "rag" not in agents:
+            return None, None
+        query_embedding = await embeddings.aembed_query(query)
+        return query_embedding, self.lookup(document_id, query_embedding, agents)
+
+    def store(self, document_id: str, query_embedding: List[float],
+              agents: Iterable[str], result: ResearchResult):
+        agents = frozenset(agents)
+        if "rag" not in agents or result.document_id != document_id:
+            return
+        entries = self._live_entries(document_id)
+        entries.append(CachedAnswer(
+            query=result.query,
+            embedding=self._normalize(query_embedding),
+            agents=agents,
+            result=result,
+            created_at=time.monotonic()
+        ))
+        # Oldest answers go first once a document exceeds its budget
+        del entries[:-self.max_entries_per_document]
+        self._entries[document_id] = entries
+        self._stats["stores"] += 1
+
+    def invalidate(self, agent: Optional[str] = None, document_id: Optional[str] = None) -> int:
+        """Drop entries that used ``agent`` and/or belong to ``document_id``"""
+        if agent is not None and agent not in AGENTS:
+            raise ValueError(f"Unknown agent: {agent}")
+
+        removed = 0
+        for doc_id in list(self._entries):
+            if document_id is not None and doc_id != document_id:
+                continue
+            kept = [e for e in self._entries[doc_id] if agent is not None and agent not in e.agents]
+            removed += len(self._entries[doc_id]) - len(kept)
+            if kept:
+                self._entries[doc_id] = kept
+            else:
+                del self._entries[doc_id]
+
+        self._stats["invalidations"] += removed
+        logger.info(f"Invalidated {removed} cached answers (agent={agent}, document_id={document_id})")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._stats, "entries": sum(len(e) for e in self._entries.values())}
+
+    def _live_entries(self, document_id: str) -> List[CachedAnswer]:
+        now = time.monotonic()
+        entries = [e for e in self._entries.get(document_id, []) if now - e.created_at < self.ttl_seconds]
+        if entries:
+            self._entries[document_id] = entries
+        else:
+            self._entries.pop(document_id, None)
+        return entries
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+
+research_answer_cache = SemanticAnswerCache()
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Union
+
+from .config import (
+    REINDEX_EMBED_BATCH_SIZE,
+    REINDEX_EMBED_BATCH_TOKENS,
+    REINDEX_EMBED_CONCURRENCY,
+    REINDEX_UPSERT_BATCH_SIZE,
+    REINDEX_UPSERT_CONCURRENCY
+)
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to a character estimate without tiktoken
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IndexRecord:
+    """One chunk of text to embed and upsert"""
+    id: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class IndexingStats:
+    chunks: int = 0
+    vectors: int = 0
+    failed: int = 0
+    embed_batches: int = 0
+    upsert_batches: int = 0
+    tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def vectors_per_second(self) -> float:
+        return self.vectors / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.chunks} chunks ({self.tokens} tokens) in {self.embed_batches} embedding batches, "
+            f"{self.vectors} vectors in {self.upsert_batches} upserts, {self.failed} failed, "
+            f"{self.elapsed:.1f}s: {self.chunks_per_second:.1f} chunks/s, "
+            f"{self.vectors_per_second:.1f} vectors/s"
+        )
+
+
+def default_token_counter() -> Callable[[str], int]:
+    if tiktoken is not None:
+        try:
+            encoding = tiktoken.get_encoding("cl100k_base")
+            return lambda text: len(encoding.encode(text, disallowed_special=()))
+        except Exception as e:
+            # The encoding is downloaded on first use and may be unreachable
+            logger.warning(f"tiktoken encoding unavailable, estimating tokens: {str(e)}")
+    return lambda text: len(text) // 4 + 1
+
+
+class BulkIndexer:
+    """Embed and upsert a stream of records with bounded concurrency.
+
+    Records are grouped into ``aembed_documents`` calls holding at most
+    ``max_batch_tokens`` tokens and ``max_batch_size`` texts, and up to
+    ``embed_concurrency`` of those calls run at once. Vectors are regrouped
+    into upserts of ``upsert_batch_size`` with up to ``upsert_concurrency``
+    in flight. Every stage hands over through a bounded queue, so a slow
+    index stalls embedding and a slow embedder stalls reading the input
+    instead of buffering the whole corpus in memory.
+
+    ``index_client`` is an ``AsyncIndexClient``. A failed batch is logged and
+    counted in ``IndexingStats.failed``; the run carries on.
+    """
+
+    def __init__(self, embeddings, index_client,
+                 max_batch_tokens: int = REINDEX_EMBED_BATCH_TOKENS,
+                 max_batch_size: int = REINDEX_EMBED_BATCH_SIZE,
+                 embed_concurrency: int = REINDEX_EMBED_CONCURRENCY,
+                 upsert_batch_size: int = REINDEX_UPSERT_BATCH_SIZE,
+                 upsert_concurrency: int = REINDEX_UPSERT_CONCURRENCY,
+                 token_counter: Optional[Callable[[str], int]] = None):
+        self.embeddings = embeddings
+        self.index_client = index_client
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_concurrency = upsert_concurrency
+        self.count_tokens = token_counter or default_token_counter()
+
+    async def run(self, records: Union[Iterable[IndexRecord], AsyncIterable[IndexRecord]]) -> IndexingStats:
+        stats = IndexingStats()
+        start = time.perf_counter()
+        embed_queue: asyncio.Queue = asyncio.Queue(maxsize=self.embed_concurrency * 2)
+        vector_queue: asyncio.Queue = asyncio.Queue(maxsize=self.upsert_batch_size * self.upsert_concurrency * 2)
+
+        embedders = [asyncio.create_task(self._embed_worker(embed_queue, vector_queue, stats))
+                     for _ in range(self.embed_concurrency)]
+        upserter = asyncio.create_task(self._upsert_stage(vector_queue, stats))
+        try:
+            await self._batch_records(records, embed_queue, stats)
+            for _ in embedders:
+                await embed_queue.put(None)
+            await asyncio.gather(*embedders)
+            await vector_queue.put(None)
+            await upserter
+        finally:
+            for task in [*embedders, upserter]:
+                task.cancel()
+
+        stats.elapsed = time.perf_counter() - start
+        logger.info(f"Indexing finished: {stats.summary()}")
+        return stats
+
+    async def _batch_records(self, records, embed_queue: asyncio.Queue, stats: IndexingStats):
+        batch: List[IndexRecord] = []
+        batch_tokens = 0
+
+        async def flush():
+            nonlocal batch, batch_tokens
+            if batch:
+                await embed_queue.put(batch)
+                batch, batch_tokens = [], 0
+
+        async for record in _aiterate(records):
+            tokens = self.count_tokens(record.text)
+            if batch and (batch_tokens + tokens > self.max_batch_tokens or len(batch) >= self.max_batch_size):
+                await flush()
+            batch.append(record)
+            batch_tokens += tokens
+            stats.chunks += 1
+            stats.tokens += tokens
+        await flush()
+
+    async def _embed_worker(self, embed_queue: asyncio.Queue, vector_queue: asyncio.Queue,
+                            stats: IndexingStats):
+        while True:
+            batch = await embed_queue.get()
+            if batch is None:
+                return
+            try:
+                values = await self.embeddings.aembed_documents([record.text for record in batch])
+            except Exception as e:
+                logger.error(f"Error embedding batch of {len(batch)} chunks: {str(e)}")
+                stats.failed += len(batch)
+                continue
+            stats.embed_batches += 1
+            for record, embedding in zip(batch, values):
+                await vector_queue.put({"id": record.id, "values": embedding, "metadata": record.metadata})
+
+    async def _upsert_stage(self, vector_queue: asyncio.Queue, stats: IndexingStats):
+        semaphore = asyncio.Semaphore(self.upsert_concurrency)
+        pending = set()
+
+        async def upsert(vectors: List[Dict[str, Any]]):
+            try:
+                await self.index_client.upsert(vectors)
+                stats.vectors += len(vectors)
+                stats.upsert_batches += 1
+            except Exception as e:
+                logger.error(f"Error upserting batch of {len(vectors)} vectors: {str(e)}")
+                stats.failed += len(vectors)
+            finally:
+                semaphore.release()
+
+        async def dispatch(vectors: List[Dict[str, Any]]):
+            # Waiting for a free slot here is what pushes back on the embedders
+            await semaphore.acquire()
+            task = asyncio.create_task(upsert(vectors))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+        batch: List[Dict[str, Any]] = []
+        while True:
+            vector = await vector_queue.get()
+            if vector is None:
+                break
+            batch.append(vector)
+            if len(batch) >= self.upsert_batch_size:
+                await dispatch(batch)
+                batch = []
+        if batch:
+            await dispatch(batch)
+        if pending:
+            await asyncio.gather(*pending)
+
+
+async def _aiterate(records):
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
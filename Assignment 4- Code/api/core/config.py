@@ -22,23 +22,74 @@ SERPAPI_API_KEY = os.getenv("SERPAPI_KEY")
 GOOGLE_APPLICATION_CREDENTIALS = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 GCS_BUCKET_NAME = os.getenv("GCS_BUCKET_NAME")
 
+# Vector store backend: "pinecone" or "local" (in-process index, see pinecone_client)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+
 # Constants and Configuration
 RESEARCH_SESSION_LIMIT = 6
 EMBEDDING_MODEL = "text-embedding-ada-002"
 COMPLETION_MODEL = "gpt-4-turbo-preview"
 VECTOR_DIMENSION = 384
-VECTOR_SIMILARITY_THRESHOLD = 0.7
+# Minimum cosine similarity for reusing a cached research answer
+VECTOR_SIMILARITY_THRESHOLD = float(os.getenv("VECTOR_SIMILARITY_THRESHOLD", 0.95))
 MAX_CONTEXT_LENGTH = 1000
 
+# Vector index access from async code (bounded thread pool, per-call timeout)
+RETRIEVAL_MAX_WORKERS = int(os.getenv("RETRIEVAL_MAX_WORKERS", 16))
+RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv("RETRIEVAL_TIMEOUT_SECONDS", 10))
+
+# Cached GCS document catalog
+DOCUMENT_CATALOG_REFRESH_SECONDS = int(os.getenv("DOCUMENT_CATALOG_REFRESH_SECONDS", 300))
+
+# Shared HTTP client for arXiv/SerpAPI searches
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", 10))
+SEARCH_MAX_CONNECTIONS = int(os.getenv("SEARCH_MAX_CONNECTIONS", 20))
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", 8))
+
+# Shared TTL cache for arXiv/SerpAPI results
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", 900))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 1024))
+
+# Per-agent deadlines (seconds) in the research graph
+RAG_AGENT_DEADLINE = float(os.getenv("RAG_AGENT_DEADLINE", 60))
+ARXIV_AGENT_DEADLINE = float(os.getenv("ARXIV_AGENT_DEADLINE", 15))
+WEB_AGENT_DEADLINE = float(os.getenv("WEB_AGENT_DEADLINE", 15))
+
+# POST /research/batch limits
+BATCH_RESEARCH_CONCURRENCY = int(os.getenv("BATCH_RESEARCH_CONCURRENCY", 4))
+BATCH_RESEARCH_MAX_ITEMS = int(os.getenv("BATCH_RESEARCH_MAX_ITEMS", 200))
+
+# Bulk reindexing (api/scripts/reindex_documents.py)
+# Chunk size in text-embedding-3-small (cl100k_base) tokens
+REINDEX_CHUNK_MAX_TOKENS = int(os.getenv("REINDEX_CHUNK_MAX_TOKENS", 512))
+REINDEX_EMBED_BATCH_TOKENS = int(os.getenv("REINDEX_EMBED_BATCH_TOKENS", 60000))
+REINDEX_EMBED_BATCH_SIZE = int(os.getenv("REINDEX_EMBED_BATCH_SIZE", 512))
+REINDEX_EMBED_CONCURRENCY = int(os.getenv("REINDEX_EMBED_CONCURRENCY", 4))
+REINDEX_UPSERT_BATCH_SIZE = int(os.getenv("REINDEX_UPSERT_BATCH_SIZE", 100))
+REINDEX_UPSERT_CONCURRENCY = int(os.getenv("REINDEX_UPSERT_CONCURRENCY", 4))
+REINDEX_UPSERT_TIMEOUT_SECONDS = float(os.getenv("REINDEX_UPSERT_TIMEOUT_SECONDS", 60))
+REINDEX_PREFETCH_DOCUMENTS = int(os.getenv("REINDEX_PREFETCH_DOCUMENTS", 4))
+# Vector IDs written per source by the last successful reindex, to delete what a rerun no longer writes
+REINDEX_MANIFEST_PATH = os.getenv("REINDEX_MANIFEST_PATH", str(PROJECT_ROOT / "data" / "reindex_manifest.json"))
+
+# Query embedding cache (in-memory LRU backed by SQLite)
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", 1024))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(PROJECT_ROOT / "data" / "embedding_cache.sqlite3"))
+EMBEDDING_CACHE_DISK_LIMIT = int(os.getenv("EMBEDDING_CACHE_DISK_LIMIT", 20000))
+
+# Semantic answer cache for /research
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", 256))
+
 # Validate required environment variables
 required_vars = [
-    "PINECONE_API_KEY",
-    "PINECONE_ENVIRONMENT",
     "OPENAI_API_KEY",
     "GOOGLE_APPLICATION_CREDENTIALS",
     "GCS_BUCKET_NAME",
     "SERPAPI_KEY"
 ]
+if VECTOR_BACKEND == "pinecone":
+    required_vars += ["PINECONE_API_KEY", "PINECONE_ENVIRONMENT"]
 
 missing_vars = [var for var in required_vars if not os.getenv(var)]
 if missing_vars:
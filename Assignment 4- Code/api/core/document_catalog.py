@@ -0,0 +1,133 @@
+import asyncio
+import bisect
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import DOCUMENT_CATALOG_REFRESH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# A lookup miss may trigger a background refresh, but not more often than this
+MISS_REFRESH_INTERVAL = 30
+
+
+class DocumentCatalog:
+    """In-memory index of the documents available for research.
+
+    ``lister`` is a blocking callable returning ``{name: info}`` for every
+    document; it runs in a worker thread on load and on every refresh. Lookups
+    are O(1) against the last snapshot. A background task refreshes the
+    snapshot every ``refresh_interval`` seconds, and ``invalidate``, ``add``
+    and ``remove`` let ingestion keep it current between refreshes. A miss
+    on a stale snapshot answers from that snapshot and refreshes it in the
+    background, so no request waits for a storage listing once loaded.
+    """
+
+    def __init__(self, lister: Callable[[], Dict[str, Dict[str, Any]]],
+                 refresh_interval: float = DOCUMENT_CATALOG_REFRESH_SECONDS):
+        self.lister = lister
+        self.refresh_interval = refresh_interval
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._names: List[str] = []
+        self._loaded_at: Optional[float] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._miss_refresh: Optional[asyncio.Task] = None
+
+    async def contains(self, document_id: str) -> bool:
+        await self._ensure_loaded()
+        if document_id in self._documents:
+            return True
+        # A document uploaded since the last refresh should not 404 for a full interval
+        if time.monotonic() - self._loaded_at > MISS_REFRESH_INTERVAL:
+            self._refresh_in_background()
+        return False
+
+    async def list_documents(self, page_size: Optional[int] = None,
+                             page_token: Optional[str] = None) -> Tuple[List[str], Optional[str]]:
+        """Return one page of document names and the token for the next page"""
+        await self._ensure_loaded()
+        names = self._names
+        start = bisect.bisect_right(names, page_token) if page_token else 0
+        if page_size is None:
+            return names[start:], None
+        page = names[start:start + page_size]
+        next_token = page[-1] if start + page_size < len(names) else None
+        return page, next_token
+
+    async def refresh(self) -> int:
+        """Reload the catalog from storage; concurrent callers share one reload"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        requested_at = time.monotonic()
+        async with self._refresh_lock:
+            if self._loaded_at is not None and self._loaded_at >= requested_at:
+                return len(self._documents)
+            documents = await asyncio.to_thread(self.lister)
+            self._documents = documents
+            self._names = sorted(documents)
+            self._loaded_at = time.monotonic()
+            logger.info(f"Document catalog refreshed with {len(documents)} documents")
+            return len(documents)
+
+    def invalidate(self):
+        """Ask the background task to refresh now"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+        else:
+            self._loaded_at = None
+
+    def add(self, name: str, info: Optional[Dict[str, Any]] = None):
+        if name not in self._documents:
+            bisect.insort(self._names, name)
+        self._documents[name] = info or {}
+
+    def remove(self, name: str):
+        if self._documents.pop(name, None) is not None:
+            del self._names[bisect.bisect_left(self._names, name)]
+
+    async def start(self):
+        """Load the catalog and keep refreshing it in the background"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            # The first lookup retries the load, startup should not depend on GCS
+            logger.error(f"Initial document catalog load failed: {str(e)}")
+        self._wakeup = asyncio.Event()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._miss_refresh is not None:
+            self._miss_refresh.cancel()
+            self._miss_refresh = None
+        self._wakeup = None
+
+    def _refresh_in_background(self):
+        if self._miss_refresh is not None and not self._miss_refresh.done():
+            return
+        self._miss_refresh = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self):
+        try:
+            await self.refresh()
+        except Exception as e:
+            # Keep serving the previous snapshot until storage is reachable again
+            logger.error(f"Document catalog refresh failed: {str(e)}")
+
+    async def _ensure_loaded(self):
+        if self._loaded_at is None:
+            await self.refresh()
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._refresh_quietly()
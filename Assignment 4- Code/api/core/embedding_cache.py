@@ -0,0 +1,183 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import EMBEDDING_CACHE_DISK_LIMIT, EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different inputs share a cache entry"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache: an in-memory LRU in front of a SQLite store.
+
+    Entries are keyed by a SHA-256 of the model name and the normalized text.
+    Both tiers are size bounded; the disk tier evicts the least recently used
+    rows in batches once it grows past ``max_disk_items``. The SQLite file is
+    only created on the first lookup or store.
+    """
+
+    def __init__(self, max_memory_items: int = EMBEDDING_CACHE_SIZE,
+                 disk_path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 max_disk_items: int = EMBEDDING_CACHE_DISK_LIMIT):
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self.disk_path = disk_path
+        self._db = None
+        self._disk_items = 0
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return hashlib.sha256(f"{model}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Look up an embedding, promoting disk hits into memory"""
+        key = self.make_key(model, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return vector
+
+            if self._connect() is not None:
+                row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = np.frombuffer(row[0], dtype=np.float32).tolist()
+                    self._db.execute("UPDATE embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._db.commit()
+                    self._remember(key, vector)
+                    self._stats["disk_hits"] += 1
+                    return vector
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]):
+        """Store an embedding in both tiers"""
+        key = self.make_key(model, text)
+        with self._lock:
+            self._remember(key, vector)
+            if self._connect() is None:
+                return
+
+            blob = np.asarray(vector, dtype=np.float32).tobytes()
+            now = time.time()
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                (key, blob, now)
+            )
+            if cursor.rowcount:
+                self._disk_items += 1
+            else:
+                # An existing key is overwritten, which does not change the row count
+                self._db.execute("UPDATE embeddings SET vector = ?, last_used = ? WHERE key = ?", (blob, now, key))
+            if self._disk_items > self.max_disk_items:
+                self._evict_disk()
+            self._db.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "lookups": lookups,
+                "memory_items": len(self._memory),
+                "disk_items": self._disk_items
+            }
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use; callers hold the lock"""
+        if self._db is None and self.disk_path:
+            os.makedirs(os.path.dirname(self.disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            self._db.commit()
+            self._disk_items = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            logger.info(f"Embedding cache opened at {self.disk_path} with {self._disk_items} entries")
+        return self._db
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _evict_disk(self):
+        # Trim to 90% of the limit so eviction is not paid on every insert
+        target = int(self.max_disk_items * 0.9)
+        excess = self._disk_items - target
+        self._db.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self._disk_items = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self._stats["evictions"] += excess
+        logger.debug(f"Evicted {excess} embeddings from disk cache")
+
+
+class CachedEmbeddings:
+    """Wrap a LangChain embeddings client so repeated texts skip the API"""
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = getattr(embeddings, "model", type(embeddings).__name__)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # SQLite reads and commits run on a worker thread, off the event loop
+        vector = await asyncio.to_thread(self.cache.get, self.model, text)
+        if vector is None:
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self.cache.put, self.model, text, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts, sending only cache misses to the API in one call"""
+        vectors: List[Optional[List[float]]] = await asyncio.to_thread(
+            lambda: [self.cache.get(self.model, text) for text in texts]
+        )
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = await self.embeddings.aembed_documents([texts[i] for i in missing])
+
+            def store():
+                for i, vector in zip(missing, fresh):
+                    self.cache.put(self.model, texts[i], vector)
+                    vectors[i] = vector
+
+            await asyncio.to_thread(store)
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(self.model, text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(self.model, text, vector)
+        return vector
+
+
+embedding_cache = EmbeddingCache()
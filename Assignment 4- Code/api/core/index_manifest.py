@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from .config import REINDEX_MANIFEST_PATH
+
+logger = logging.getLogger(__name__)
+
+# IDs written by reindex runs before chunk IDs were deterministic: doc_{hash(text)}
+LEGACY_ID = re.compile(r"^doc_-?\d+$")
+
+DELETE_BATCH_SIZE = 1000
+
+
+class ReindexManifest:
+    """Vector IDs written per source by the last successful reindex.
+
+    A rerun with a different chunker or chunk budget writes new IDs, so
+    the vectors it no longer writes would otherwise stay in the index and
+    keep matching queries. The manifest is what lets them be found.
+    """
+
+    def __init__(self, path: str = REINDEX_MANIFEST_PATH):
+        self.path = Path(path)
+        self.ids_by_source: Dict[str, List[str]] = {}
+        self.legacy_ids_removed = False
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            self.ids_by_source = data.get("sources", {})
+            self.legacy_ids_removed = data.get("legacy_ids_removed", False)
+
+    def stale_ids(self, current: Dict[str, Iterable[str]], failed: Iterable[str] = ()) -> List[str]:
+        """IDs of the last run that ``current`` no longer writes.
+
+        Sources that failed to load this time keep their previous vectors.
+        """
+        failed = set(failed)
+        written: Set[str] = {vector_id for ids in current.values() for vector_id in ids}
+        kept = {vector_id for source in failed for vector_id in self.ids_by_source.get(source, [])}
+        return sorted({
+            vector_id
+            for ids in self.ids_by_source.values()
+            for vector_id in ids
+            if vector_id not in written and vector_id not in kept
+        })
+
+    def record(self, current: Dict[str, Iterable[str]], failed: Iterable[str] = ()):
+        sources = {source: sorted(set(ids)) for source, ids in current.items()}
+        for source in failed:
+            if source in self.ids_by_source and source not in sources:
+                sources[source] = self.ids_by_source[source]
+        self.ids_by_source = sources
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({
+            "sources": self.ids_by_source,
+            "legacy_ids_removed": self.legacy_ids_removed
+        }))
+        os.replace(tmp, self.path)
+
+
+def list_legacy_ids(index) -> List[str]:
+    """``doc_{hash}`` IDs in the index, or an empty list if it cannot list IDs"""
+    if not hasattr(index, "list"):
+        logger.warning("Index does not support listing IDs; legacy doc_ vectors were not removed")
+        return []
+    return [vector_id for page in index.list(prefix="doc_") for vector_id in page if LEGACY_ID.match(vector_id)]
+
+
+async def remove_stale_vectors(index, index_client, manifest: ReindexManifest,
+                               current: Dict[str, Iterable[str]], failed: Iterable[str] = ()) -> int:
+    """Delete vectors earlier runs wrote that this run did not, then record this run.
+
+    Only call this after a run whose upserts all succeeded; otherwise a
+    vector that failed to land would lose its previous version too.
+    """
+    failed = set(failed)
+    stale = manifest.stale_ids(current, failed)
+    if not manifest.legacy_ids_removed:
+        stale.extend(await asyncio.to_thread(list_legacy_ids, index))
+
+    for start in range(0, len(stale), DELETE_BATCH_SIZE):
+        await index_client.delete(stale[start:start + DELETE_BATCH_SIZE])
+
+    manifest.legacy_ids_removed = manifest.legacy_ids_removed or hasattr(index, "list")
+    manifest.record(current, failed)
+    manifest.save()
+    logger.info(f"Removed {len(stale)} stale vectors")
+    return len(stale)
@@ -2,6 +2,7 @@ import os
 from pinecone import Pinecone
 from dotenv import load_dotenv
 import logging
+from .vector_index import LocalVectorIndex
  
 logger = logging.getLogger(__name__)
  
@@ -10,14 +11,26 @@ load_dotenv()
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_ENVIRONMENT = os.getenv("PINECONE_ENVIRONMENT")
 INDEX_NAME = "research-publications-index"
+
+# Vector backend: "pinecone" (default) or "local" for the in-process index
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone").lower()
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/vector_index")
+LOCAL_INDEX_USE_HNSW = os.getenv("LOCAL_INDEX_USE_HNSW", "false").lower() == "true"
+
+# Sized to match the retrieval thread pool (see core.retrieval)
+PINECONE_POOL_SIZE = int(os.getenv("RETRIEVAL_MAX_WORKERS", 16))
  
 # Global index instance
 index = None
  
 def init_pinecone():
     """Initialize Pinecone client and get index"""
+    if VECTOR_BACKEND == "local":
+        return init_local_index()
     try:
-        pc = Pinecone(api_key=PINECONE_API_KEY)
+        pc = Pinecone(api_key=PINECONE_API_KEY, pool_threads=PINECONE_POOL_SIZE)
+        # One kept-alive HTTP connection per retrieval worker
+        pc.openapi_config.connection_pool_maxsize = PINECONE_POOL_SIZE
        
         # Get the index with 384 dimensions
         index = pc.Index(INDEX_NAME)
@@ -26,6 +39,16 @@ def init_pinecone():
     except Exception as e:
         logger.error(f"Pinecone initialization error: {str(e)}")
         raise
+
+def init_local_index():
+    """Open the in-process vector index stored under LOCAL_INDEX_PATH"""
+    try:
+        index = LocalVectorIndex(path=LOCAL_INDEX_PATH, use_hnsw=LOCAL_INDEX_USE_HNSW)
+        logger.info(f"Local vector index initialized from {LOCAL_INDEX_PATH}")
+        return index
+    except Exception as e:
+        logger.error(f"Local vector index initialization error: {str(e)}")
+        raise
  
 def get_index():
     """Get the Pinecone index instance"""
@@ -33,4 +56,3 @@ def get_index():
     if index is None:
         index = init_pinecone()
     return index
- 
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import RETRIEVAL_MAX_WORKERS, RETRIEVAL_TIMEOUT_SECONDS
+from .pinecone_client import get_index
+from .vector_index import LocalVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncIndexClient:
+    """Async facade over the blocking index client.
+
+    Calls run on a dedicated, bounded thread pool so the event loop keeps
+    serving other requests during a round trip. Each call is subject to a
+    timeout, and a semaphore caps queued calls at the pool size so a slow
+    backend applies backpressure instead of building an unbounded backlog.
+    """
+
+    def __init__(self, index_getter: Callable[[], Any] = get_index,
+                 max_workers: int = RETRIEVAL_MAX_WORKERS,
+                 timeout: float = RETRIEVAL_TIMEOUT_SECONDS):
+        self._index_getter = index_getter
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def query(self, timeout: Optional[float] = None, **kwargs) -> Any:
+        return await self._call("query", timeout, **kwargs)
+
+    async def fetch(self, ids: List[str], timeout: Optional[float] = None) -> Any:
+        return await self._call("fetch", timeout, ids=ids)
+
+    async def upsert(self, vectors: List[Any], timeout: Optional[float] = None) -> Any:
+        return await self._call("upsert", timeout, vectors=vectors)
+
+    async def delete(self, ids: List[str], timeout: Optional[float] = None) -> Any:
+        return await self._call("delete", timeout, ids=ids)
+
+    async def update(self, id: str, set_metadata: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        return await self._call("update", timeout, id=id, set_metadata=set_metadata)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    async def _call(self, method: str, timeout: Optional[float], **kwargs) -> Any:
+        timeout = timeout or self.timeout
+        index = self._index_getter()
+        if not isinstance(index, LocalVectorIndex):
+            # Let the HTTP layer give up too, so timed-out calls free their worker
+            kwargs["_request_timeout"] = timeout
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="vector-index"
+            )
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+        loop = asyncio.get_running_loop()
+
+        async def run():
+            async with self._semaphore:
+                return await loop.run_in_executor(
+                    self._executor,
+                    partial(getattr(index, method), **kwargs)
+                )
+
+        try:
+            return await asyncio.wait_for(run(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Vector index {method} timed out after {timeout}s")
+            raise TimeoutError(f"Vector index {method} timed out after {timeout}s")
+
+
+retrieval_client = AsyncIndexClient()
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from .config import (
+    SERPAPI_API_KEY,
+    SEARCH_MAX_CONCURRENCY,
+    SEARCH_MAX_CONNECTIONS,
+    SEARCH_TIMEOUT_SECONDS
+)
+from .result_cache import normalize_query, search_result_cache
+
+logger = logging.getLogger(__name__)
+
+ARXIV_API_URL = "https://export.arxiv.org/api/query"
+SERPAPI_URL = "https://serpapi.com/search.json"
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
+
+
+class SearchHTTPClient:
+    """Shared async HTTP client for external search APIs.
+
+    One pooled ``httpx.AsyncClient`` keeps connections alive across requests,
+    every call carries a timeout, and a semaphore per upstream caps how many
+    calls can be in flight against it, so a slow upstream only queues its own
+    callers instead of tying up the whole worker.
+    """
+
+    def __init__(self, timeout: float = SEARCH_TIMEOUT_SECONDS,
+                 max_connections: int = SEARCH_MAX_CONNECTIONS,
+                 max_concurrency: int = SEARCH_MAX_CONCURRENCY):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def get(self, upstream: str, url: str, params: Dict[str, Any]) -> httpx.Response:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                follow_redirects=True
+            )
+        semaphore = self._semaphores.setdefault(upstream, asyncio.Semaphore(self.max_concurrency))
+        async with semaphore:
+            response = await self._client.get(url, params=params)
+        response.raise_for_status()
+        return response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._semaphores = {}
+
+
+search_http_client = SearchHTTPClient()
+
+
+def parse_arxiv_feed(content: bytes) -> List[Dict[str, Any]]:
+    """Parse an arXiv Atom feed into plain result dicts"""
+    root = ET.fromstring(content)
+    results = []
+    for entry in root.findall(f"{ATOM_NS}entry"):
+        pdf_link = next(
+            (link.get("href") for link in entry.findall(f"{ATOM_NS}link") if link.get("title") == "pdf"),
+            None
+        )
+        results.append({
+            "title": " ".join(entry.findtext(f"{ATOM_NS}title", "").split()),
+            "summary": " ".join(entry.findtext(f"{ATOM_NS}summary", "").split()),
+            "published": entry.findtext(f"{ATOM_NS}published", ""),
+            "authors": [
+                author.findtext(f"{ATOM_NS}name", "")
+                for author in entry.findall(f"{ATOM_NS}author")
+            ],
+            "link": pdf_link or entry.findtext(f"{ATOM_NS}id", "")
+        })
+    return results
+
+
+async def search_arxiv(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Search arXiv by relevance, served from the shared result cache when fresh"""
+    async def fetch():
+        response = await search_http_client.get("arxiv", ARXIV_API_URL, {
+            "search_query": f"all:{query}",
+            "start": 0,
+            "max_results": max_results,
+            "sortBy": "relevance"
+        })
+        return parse_arxiv_feed(response.content)
+
+    return await search_result_cache.get_or_fetch(("arxiv", normalize_query(query), max_results), fetch)
+
+
+async def search_google(query: str, num: int = 5) -> List[Dict[str, Any]]:
+    """Search Google through SerpAPI, served from the shared result cache when fresh"""
+    async def fetch():
+        response = await search_http_client.get("serpapi", SERPAPI_URL, {
+            "q": query,
+            "num": num,
+            "engine": "google",
+            "api_key": SERPAPI_API_KEY
+        })
+        return response.json().get("organic_results", [])
+
+    return await search_result_cache.get_or_fetch(("web", normalize_query(query), num), fetch)
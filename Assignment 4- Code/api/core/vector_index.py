@@ -0,0 +1,476 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:  # HNSW is optional, exact search is used without it
+    hnswlib = None
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.jsonl"
+HNSW_FILE = "hnsw.bin"
+
+# Below this many filtered candidates an exact scan beats walking the graph
+EXACT_SEARCH_THRESHOLD = 2048
+
+
+@dataclass
+class ScoredVector:
+    id: str
+    score: float
+    values: List[float] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class QueryResponse:
+    matches: List[ScoredVector]
+    namespace: str = ""
+
+
+@dataclass
+class Vector:
+    id: str
+    values: List[float]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class FetchResponse:
+    vectors: Dict[str, Vector]
+    namespace: str = ""
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    """Evaluate a single Pinecone filter condition against a metadata value"""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+
+    for op, operand in condition.items():
+        if value is None and op not in ("$ne", "$nin"):
+            return False
+        values = _as_list(value)
+        if op == "$eq":
+            ok = operand in values
+        elif op == "$ne":
+            ok = operand not in values
+        elif op == "$in":
+            ok = any(v in operand for v in values)
+        elif op == "$nin":
+            ok = not any(v in operand for v in values)
+        elif op == "$gt":
+            ok = value > operand
+        elif op == "$gte":
+            ok = value >= operand
+        elif op == "$lt":
+            ok = value < operand
+        elif op == "$lte":
+            ok = value <= operand
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if not ok:
+            return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """Check metadata against a Pinecone-style metadata filter"""
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+class LocalVectorIndex:
+    """NumPy-backed vector index exposing the Pinecone ``Index`` surface.
+
+    Vectors live in a single float32 matrix that is memory-mapped from disk
+    when the index is loaded. Equality filters are resolved through an
+    inverted metadata index, and an optional HNSW graph (``hnswlib``) serves
+    unfiltered or broadly filtered queries on large corpora.
+    """
+
+    def __init__(self, path: Optional[str] = None, dimension: Optional[int] = None,
+                 metric: str = "cosine", use_hnsw: bool = False,
+                 hnsw_m: int = 16, hnsw_ef_construction: int = 200, hnsw_ef_search: int = 64):
+        if metric not in ("cosine", "dotproduct"):
+            raise ValueError(f"Unsupported metric: {metric}")
+        if use_hnsw and hnswlib is None:
+            logger.warning("hnswlib is not installed, falling back to exact search")
+            use_hnsw = False
+
+        self.path = Path(path) if path else None
+        self.dimension = dimension
+        self.metric = metric
+        self.use_hnsw = use_hnsw
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.hnsw_ef_search = hnsw_ef_search
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, dimension or 0), dtype=np.float32)
+        self._size = 0
+        self._ids: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._id_to_row: Dict[str, int] = {}
+        self._postings: Dict[str, Dict[Any, Set[int]]] = {}
+        self._hnsw = None
+
+        if self.path and (self.path / VECTORS_FILE).exists():
+            self._load()
+
+    # ------------------------------------------------------------------
+    # Pinecone-compatible surface
+    # ------------------------------------------------------------------
+
+    def upsert(self, vectors: Iterable[Any], namespace: Optional[str] = None) -> Dict[str, int]:
+        """Insert or overwrite vectors given as tuples or dicts"""
+        records = [self._normalize_record(v) for v in vectors]
+        with self._lock:
+            for vector_id, values, metadata in records:
+                self._upsert_one(vector_id, values, metadata)
+        return {"upserted_count": len(records)}
+
+    def query(self, vector: List[float], top_k: int = 10,
+              filter: Optional[Dict[str, Any]] = None, include_metadata: bool = False,
+              include_values: bool = False, namespace: Optional[str] = None) -> QueryResponse:
+        """Return the ``top_k`` nearest vectors that satisfy ``filter``"""
+        with self._lock:
+            if self._size == 0 or top_k <= 0:
+                return QueryResponse(matches=[])
+
+            query_vector = self._prepare(np.asarray(vector, dtype=np.float32))
+            candidates = self._candidate_rows(filter)
+            if candidates is not None and len(candidates) == 0:
+                return QueryResponse(matches=[])
+
+            if self._hnsw is not None and (candidates is None or len(candidates) > EXACT_SEARCH_THRESHOLD):
+                rows, scores = self._search_hnsw(query_vector, top_k, candidates)
+            else:
+                rows, scores = self._search_exact(query_vector, top_k, candidates)
+
+            matches = [
+                ScoredVector(
+                    id=self._ids[row],
+                    score=float(score),
+                    values=self._vectors[row].tolist() if include_values else [],
+                    metadata=dict(self._metadata[row]) if include_metadata else {}
+                )
+                for row, score in zip(rows, scores)
+            ]
+            return QueryResponse(matches=matches)
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None) -> FetchResponse:
+        """Fetch stored vectors by id, skipping unknown ids"""
+        with self._lock:
+            vectors = {}
+            for vector_id in ids:
+                row = self._id_to_row.get(vector_id)
+                if row is None:
+                    continue
+                vectors[vector_id] = Vector(
+                    id=vector_id,
+                    values=self._vectors[row].tolist(),
+                    metadata=dict(self._metadata[row])
+                )
+            return FetchResponse(vectors=vectors)
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False,
+               filter: Optional[Dict[str, Any]] = None, namespace: Optional[str] = None) -> Dict:
+        """Delete vectors by id, by metadata filter, or all of them"""
+        with self._lock:
+            if delete_all:
+                rows = list(self._id_to_row.values())
+            elif filter:
+                candidates = self._candidate_rows(filter)
+                rows = list(candidates) if candidates is not None else []
+            else:
+                rows = [self._id_to_row[i] for i in (ids or []) if i in self._id_to_row]
+
+            for row in rows:
+                self._delete_row(row)
+        return {}
+
+    def list(self, prefix: Optional[str] = None, limit: int = 100,
+             namespace: Optional[str] = None) -> Iterator[List[str]]:
+        """Yield pages of vector ids starting with ``prefix``, like Pinecone's ``list``"""
+        with self._lock:
+            ids = sorted(i for i in self._id_to_row if not prefix or i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def update(self, id: str, values: Optional[List[float]] = None,
+               set_metadata: Optional[Dict[str, Any]] = None, namespace: Optional[str] = None) -> Dict:
+        """Replace a vector's values and/or merge keys into its metadata"""
+        with self._lock:
+            row = self._id_to_row.get(id)
+            if row is None:
+                return {}
+            metadata = {**self._metadata[row], **(set_metadata or {})}
+            new_values = values if values is not None else self._vectors[row].tolist()
+            self._upsert_one(id, new_values, metadata)
+        return {}
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "dimension": self.dimension,
+                "total_vector_count": len(self._id_to_row),
+                "index_fullness": 0.0
+            }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def persist(self):
+        """Write vectors, records and the HNSW graph to ``path``"""
+        if not self.path:
+            raise ValueError("LocalVectorIndex has no storage path configured")
+
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            alive_rows = np.flatnonzero(self._alive[:self._size])
+
+            vectors_tmp = self.path / f"{VECTORS_FILE}.tmp"
+            with vectors_tmp.open("wb") as fp:
+                np.save(fp, np.ascontiguousarray(self._vectors[alive_rows]))
+            records_tmp = self.path / f"{RECORDS_FILE}.tmp"
+            with records_tmp.open("w") as fp:
+                for row in alive_rows:
+                    fp.write(json.dumps({"id": self._ids[row], "metadata": self._metadata[row]}) + "\n")
+
+            os.replace(vectors_tmp, self.path / VECTORS_FILE)
+            os.replace(records_tmp, self.path / RECORDS_FILE)
+
+            # Compaction drops tombstones, so rows (and HNSW labels) are renumbered
+            self._reload_from(np.load(self.path / VECTORS_FILE, mmap_mode="r"),
+                              [self._ids[row] for row in alive_rows],
+                              [self._metadata[row] for row in alive_rows])
+            if self.use_hnsw:
+                self._build_hnsw()
+                self._hnsw.save_index(str(self.path / HNSW_FILE))
+            logger.info(f"Persisted {self._size} vectors to {self.path}")
+
+    def _load(self):
+        vectors = np.load(self.path / VECTORS_FILE, mmap_mode="r")
+        ids, metadata = [], []
+        with (self.path / RECORDS_FILE).open() as fp:
+            for line in fp:
+                record = json.loads(line)
+                ids.append(record["id"])
+                metadata.append(record.get("metadata") or {})
+
+        self._reload_from(vectors, ids, metadata)
+        if self.use_hnsw:
+            hnsw_path = self.path / HNSW_FILE
+            if hnsw_path.exists():
+                self._hnsw = hnswlib.Index(space="ip", dim=self.dimension)
+                self._hnsw.load_index(str(hnsw_path), max_elements=max(self._size, 1))
+                self._hnsw.set_ef(self.hnsw_ef_search)
+            else:
+                self._build_hnsw()
+        logger.info(f"Loaded {self._size} vectors from {self.path}")
+
+    def _reload_from(self, vectors: np.ndarray, ids: List[str], metadata: List[Dict[str, Any]]):
+        # Keep the memory map read-only until the first write needs to grow it
+        self._vectors = vectors
+        self._size = len(ids)
+        if self._size:
+            self.dimension = vectors.shape[1]
+        self._ids = ids
+        self._metadata = metadata
+        self._alive = np.ones(self._size, dtype=bool)
+        self._id_to_row = {vector_id: row for row, vector_id in enumerate(ids)}
+        self._postings = {}
+        for row, meta in enumerate(metadata):
+            self._index_metadata(row, meta)
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _normalize_record(vector: Any):
+        if isinstance(vector, dict):
+            return vector["id"], vector["values"], vector.get("metadata") or {}
+        if len(vector) == 2:
+            return vector[0], vector[1], {}
+        return vector[0], vector[1], vector[2] or {}
+
+    def _prepare(self, values: np.ndarray) -> np.ndarray:
+        if self.metric == "cosine":
+            norm = np.linalg.norm(values)
+            if norm > 0:
+                values = values / norm
+        return values.astype(np.float32, copy=False)
+
+    def _ensure_capacity(self, rows: int):
+        if self._vectors.shape[0] >= rows and self._vectors.flags.writeable:
+            return
+        capacity = max(rows, 2 * self._vectors.shape[0], 64)
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._alive = alive
+
+    def _upsert_one(self, vector_id: str, values: List[float], metadata: Dict[str, Any]):
+        values = np.asarray(values, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = values.shape[0]
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        if values.shape != (self.dimension,):
+            raise ValueError(
+                f"Vector dimension {values.shape[0]} does not match index dimension {self.dimension}"
+            )
+        if self.use_hnsw and self._hnsw is None:
+            self._build_hnsw()
+
+        row = self._id_to_row.get(vector_id)
+        if row is None:
+            row = self._size
+            self._ensure_capacity(row + 1)
+            self._size += 1
+            self._ids.append(vector_id)
+            self._metadata.append({})
+            self._id_to_row[vector_id] = row
+        else:
+            self._ensure_capacity(self._size)
+            self._unindex_metadata(row, self._metadata[row])
+
+        self._vectors[row] = self._prepare(values)
+        self._alive[row] = True
+        self._metadata[row] = dict(metadata)
+        self._index_metadata(row, self._metadata[row])
+
+        if self._hnsw is not None:
+            if row >= self._hnsw.get_max_elements():
+                self._hnsw.resize_index(max(2 * self._hnsw.get_max_elements(), row + 1))
+            self._hnsw.add_items(self._vectors[row:row + 1], np.array([row]), replace_deleted=False)
+
+    def _delete_row(self, row: int):
+        if not self._alive[row]:
+            return
+        self._ensure_capacity(self._size)
+        self._alive[row] = False
+        self._unindex_metadata(row, self._metadata[row])
+        del self._id_to_row[self._ids[row]]
+        if self._hnsw is not None:
+            self._hnsw.mark_deleted(row)
+
+    def _index_metadata(self, row: int, metadata: Dict[str, Any]):
+        for key, value in metadata.items():
+            for item in _as_list(value):
+                if isinstance(item, (str, int, float, bool)):
+                    self._postings.setdefault(key, {}).setdefault(item, set()).add(row)
+
+    def _unindex_metadata(self, row: int, metadata: Dict[str, Any]):
+        for key, value in metadata.items():
+            for item in _as_list(value):
+                rows = self._postings.get(key, {}).get(item)
+                if rows is not None:
+                    rows.discard(row)
+
+    def _candidate_rows(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Resolve a filter to candidate rows, or ``None`` for all live rows"""
+        if not filter:
+            return None
+
+        # Narrow with the inverted index on $eq/$in conditions, then verify the rest
+        narrowed: Optional[Set[int]] = None
+        resolved = True
+        for key, condition in filter.items():
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            if key.startswith("$") or len(condition) != 1:
+                resolved = False
+                continue
+            if "$eq" in condition:
+                rows = self._postings.get(key, {}).get(condition["$eq"], set())
+            elif "$in" in condition:
+                rows = set().union(*(self._postings.get(key, {}).get(v, set()) for v in condition["$in"]))
+            else:
+                resolved = False
+                continue
+            narrowed = set(rows) if narrowed is None else narrowed & rows
+
+        # Postings only hold live rows, so a fully resolved filter needs no re-check
+        if narrowed is not None and resolved:
+            return np.fromiter(sorted(narrowed), dtype=np.int64, count=len(narrowed))
+
+        if narrowed is None:
+            scan: Iterable[int] = np.flatnonzero(self._alive[:self._size])
+        else:
+            scan = sorted(narrowed)
+        rows = [row for row in scan if self._alive[row] and matches_filter(self._metadata[row], filter)]
+        return np.asarray(rows, dtype=np.int64)
+
+    def _search_exact(self, query_vector: np.ndarray, top_k: int, candidates: Optional[np.ndarray]):
+        if candidates is None:
+            scores = self._vectors[:self._size] @ query_vector
+            scores = np.where(self._alive[:self._size], scores, -np.inf)
+            rows = np.arange(self._size)
+        else:
+            rows = candidates
+            scores = self._vectors[rows] @ query_vector
+
+        k = min(top_k, int(np.isfinite(scores).sum()))
+        if k == 0:
+            return [], []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return rows[top].tolist(), scores[top].tolist()
+
+    def _search_hnsw(self, query_vector: np.ndarray, top_k: int, candidates: Optional[np.ndarray]):
+        allowed: Optional[Callable[[int], bool]] = None
+        available = len(self._id_to_row)
+        if candidates is not None:
+            allowed_rows = set(candidates.tolist())
+            allowed = allowed_rows.__contains__
+            available = len(allowed_rows)
+
+        k = min(top_k, available)
+        try:
+            labels, distances = self._hnsw.knn_query(query_vector, k=k, filter=allowed)
+        except RuntimeError:
+            # hnswlib cannot always reach k results under a restrictive filter
+            return self._search_exact(query_vector, top_k, candidates)
+        # hnswlib "ip" space reports 1 - inner product as the distance
+        return labels[0].tolist(), (1.0 - distances[0]).tolist()
+
+    def _build_hnsw(self):
+        index = hnswlib.Index(space="ip", dim=self.dimension)
+        index.init_index(
+            max_elements=max(self._size, 1),
+            M=self.hnsw_m,
+            ef_construction=self.hnsw_ef_construction
+        )
+        alive_rows = np.flatnonzero(self._alive[:self._size])
+        if len(alive_rows):
+            index.add_items(self._vectors[alive_rows], alive_rows)
+        index.set_ef(self.hnsw_ef_search)
+        self._hnsw = index
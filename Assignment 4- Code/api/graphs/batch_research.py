@@ -0,0 +1,105 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..core.answer_cache import SemanticAnswerCache
+from ..models import ResearchResult
+from .research_graph import ResearchGraph
+
+logger = logging.getLogger(__name__)
+
+
+def build_research_result(document_id: str, query: str, results: Dict) -> ResearchResult:
+    return ResearchResult(
+        document_id=document_id,
+        query=query,
+        rag_response=ResearchGraph.extract_rag_answer(results.get("rag")),
+        arxiv_results=results.get("arxiv"),
+        web_results=results.get("web"),
+        combined_analysis=results.get("combined"),
+        partial=results.get("partial", False),
+        timed_out_agents=results.get("timed_out", []),
+        timestamp=datetime.now()
+    )
+
+
+def cached_research_result(result: ResearchResult, query: str, similarity: float) -> ResearchResult:
+    """A cached answer as returned for ``query``, flagged with the match similarity"""
+    return result.model_copy(update={
+        "query": query,
+        "cached": True,
+        "cache_similarity": similarity,
+        "timestamp": datetime.now()
+    })
+
+
+async def prepare_cached_batch(graph: ResearchGraph, items: List[Dict[str, str]],
+                               answer_cache: SemanticAnswerCache, agents: List[str]
+                               ) -> Tuple[List[Any], List[Any], Dict[int, Tuple[ResearchResult, float]]]:
+    """Embed a batch, look each item up in ``answer_cache`` and retrieve for the misses.
+
+    Returns per-item embeddings and matches, and the cache hits by item
+    index. Hits are not searched, since they are not researched again.
+    """
+    use_rag = "rag" in agents
+    embeddings = await graph.embed_batch(items, use_rag=use_rag)
+    hits = {}
+    if use_rag:
+        for index, (item, embedding) in enumerate(zip(items, embeddings)):
+            hit = answer_cache.lookup(item["document_id"], embedding, agents)
+            if hit:
+                hits[index] = hit
+    misses = [embedding if index not in hits else None for index, embedding in enumerate(embeddings)]
+    matches = await graph.retrieve_batch(items, misses)
+    return embeddings, matches, hits
+
+
+async def stream_batch_results(graph: ResearchGraph, items: List[Dict[str, str]],
+                               answer_cache: SemanticAnswerCache, agents: List[str],
+                               embeddings: Optional[List[Any]] = None,
+                               matches: Optional[List[Any]] = None,
+                               hits: Optional[Dict[int, Tuple[ResearchResult, float]]] = None
+                               ) -> AsyncIterator[str]:
+    """NDJSON lines for a research batch, one per item as it completes.
+
+    Each line is ``{"index": i, "result": ResearchResult}`` or
+    ``{"index": i, "document_id": ..., "query": ..., "error": ...}``.
+    ``embeddings``, ``matches`` and ``hits`` come from
+    ``prepare_cached_batch``, run before the response starts so its
+    failures can still get an error status. Cache hits are streamed first,
+    marked ``cached`` as ``/research`` returns them; only the other items
+    are researched. Closing the stream, e.g. when the client disconnects,
+    cancels the items still running.
+    """
+    hits = hits or {}
+    for index, (cached_result, similarity) in sorted(hits.items()):
+        result = cached_research_result(cached_result, items[index]["query"], similarity)
+        yield json.dumps({"index": index, "result": result.model_dump(mode="json")}) + "\n"
+
+    pending = [index for index in range(len(items)) if index not in hits]
+    if not pending:
+        return
+    batch = graph.execute_batch(
+        [items[index] for index in pending],
+        use_rag="rag" in agents,
+        use_arxiv="arxiv" in agents,
+        use_web="web" in agents,
+        embeddings=[embeddings[index] for index in pending] if embeddings is not None else None,
+        matches=[matches[index] for index in pending] if matches is not None else None
+    )
+    try:
+        async for position, results, error in batch:
+            index = pending[position]
+            item = items[index]
+            if error:
+                logger.error(f"Batch research item {index} failed: {error}")
+                line = {"index": index, "document_id": item["document_id"], "query": item["query"], "error": error}
+            else:
+                research_result = build_research_result(item["document_id"], item["query"], results)
+                if results.get("query_embedding") is not None and not research_result.partial:
+                    answer_cache.store(item["document_id"], results["query_embedding"], agents, research_result)
+                line = {"index": index, "result": research_result.model_dump(mode="json")}
+            yield json.dumps(line) + "\n"
+    finally:
+        await batch.aclose()
@@ -1,9 +1,16 @@
-from langchain_core.runnables import RunnablePassthrough
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import asyncio
 import logging
 from ..agents.rag_agent import RAGAgent
 from ..agents.arxiv_agent import ArxivAgent
 from ..agents.web_agent import WebAgent
+from ..core.config import (
+    RAG_AGENT_DEADLINE,
+    ARXIV_AGENT_DEADLINE,
+    WEB_AGENT_DEADLINE,
+    BATCH_RESEARCH_CONCURRENCY
+)
+from .scheduler import AgentNode, AgentScheduler
  
 logger = logging.getLogger(__name__)
  
@@ -15,18 +22,23 @@ class ResearchGraph:
         self.chain = self._create_chain()
  
     def _create_chain(self):
-        return RunnablePassthrough.assign(
-            rag=self._run_rag,
-            arxiv=self._run_arxiv,
-            web=self._run_web,
-            combined=self._combine_results
-        )
+        # Agents run concurrently; combining waits for all three (or their deadlines)
+        return AgentScheduler([
+            AgentNode("rag", self._run_rag, deadline=RAG_AGENT_DEADLINE),
+            AgentNode("arxiv", self._run_arxiv, deadline=ARXIV_AGENT_DEADLINE, fallback=[]),
+            AgentNode("web", self._run_web, deadline=WEB_AGENT_DEADLINE, fallback=[]),
+            AgentNode("combined", self._combine_results, depends_on=("rag", "arxiv", "web"))
+        ])
  
-    async def _run_rag(self, state: Dict[str, Any]) -> str:
+    async def _run_rag(self, state: Dict[str, Any]) -> Any:
+        if not state.get("use_rag", True):
+            return None
         try:
             return await self.rag_agent.execute_rag(
                 query=state["query"],
-                document_id=state["document_id"]
+                document_id=state["document_id"],
+                query_embedding=state.get("query_embedding"),
+                matches=state.get("matches")
             )
         except Exception as e:
             logger.error(f"RAG processing error: {str(e)}")
@@ -52,9 +64,9 @@ class ResearchGraph:
  
     async def _combine_results(self, state: Dict[str, Any]) -> str:
         try:
-            rag_response = state.get("rag", {}).get("answer", "No document analysis available.")
-            arxiv_results = state.get("arxiv", [])
-            web_results = state.get("web", [])
+            rag_response = self.extract_rag_answer(state.get("rag")) or "No document analysis available."
+            arxiv_results = state.get("arxiv") or []
+            web_results = state.get("web") or []
            
             combined = f"""
             Document Analysis:
@@ -66,12 +78,21 @@ class ResearchGraph:
             Web Resources:
             {self._format_web_results(web_results)}
             """
+            combined = combined.strip()
+ 
+            if state.get("timed_out"):
+                combined += f"\n\nNote: results from {', '.join(state['timed_out'])} did not arrive in time."
            
-            return combined.strip()
+            return combined
         except Exception as e:
             logger.error(f"Error combining results: {str(e)}")
             return "Error combining research results"
  
+    @staticmethod
+    def extract_rag_answer(rag: Any) -> Any:
+        """RAG returns a result dict, or an error string when it fails"""
+        return rag.get("answer") if isinstance(rag, dict) else rag
+ 
     def _format_arxiv_results(self, results: list) -> str:
         if not results:
             return "No relevant academic papers found."
@@ -83,7 +104,9 @@ class ResearchGraph:
         return "\n".join([f"- {r.title}: {r.snippet[:200]}..." for r in results[:3]])
  
     async def execute(self, document_id: str, query: str, use_rag: bool = True,
-                     use_arxiv: bool = True, use_web: bool = True) -> Dict[str, Any]:
+                     use_arxiv: bool = True, use_web: bool = True,
+                     query_embedding: Optional[List[float]] = None,
+                     matches: Optional[list] = None) -> Dict[str, Any]:
         """Execute the research workflow"""
         try:
             state = {
@@ -91,18 +114,97 @@ class ResearchGraph:
                 "query": query,
                 "use_rag": use_rag,
                 "use_arxiv": use_arxiv,
-                "use_web": use_web
+                "use_web": use_web,
+                "query_embedding": query_embedding,
+                "matches": matches
             }
            
             logger.info(f"Executing research workflow for document: {document_id}")
             result = await self.chain.ainvoke(state)
-            logger.info("Research workflow completed successfully")
+            logger.info(f"Research workflow completed in {result['timings']}")
+            if result["partial"]:
+                logger.warning(f"Partial research results, timed out: {result['timed_out']}")
            
             return result
         except Exception as e:
             logger.error(f"Research workflow failed: {str(e)}")
             raise ValueError(f"Research workflow failed: {str(e)}")
  
+    async def prepare_batch(self, items: List[Dict[str, str]], use_rag: bool = True
+                            ) -> Tuple[List[Optional[List[float]]], List[Optional[list]]]:
+        """Embed all queries in one call and run their vector searches concurrently.
+ 
+        Returns per-item embeddings and matches for ``execute_batch``. A
+        failed embedding call raises; a failed search leaves that item's
+        matches as None, to be retried inside execute_rag.
+        """
+        embeddings = await self.embed_batch(items, use_rag=use_rag)
+        return embeddings, await self.retrieve_batch(items, embeddings)
+ 
+    async def embed_batch(self, items: List[Dict[str, str]], use_rag: bool = True
+                          ) -> List[Optional[List[float]]]:
+        """Embed all queries in one call; None for every item without RAG"""
+        if not use_rag:
+            return [None] * len(items)
+        return await self.rag_agent.embeddings.aembed_documents([item["query"] for item in items])
+ 
+    async def retrieve_batch(self, items: List[Dict[str, str]],
+                             embeddings: List[Optional[List[float]]]) -> List[Optional[list]]:
+        """Vector searches for embedded items, run concurrently; None where skipped or failed"""
+        positions = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+        retrieved = await asyncio.gather(
+            *(self.rag_agent.retrieve(embeddings[i], items[i]["document_id"]) for i in positions),
+            return_exceptions=True
+        )
+        matches: List[Optional[list]] = [None] * len(items)
+        for i, result in zip(positions, retrieved):
+            matches[i] = None if isinstance(result, Exception) else result
+        return matches
+ 
+    async def execute_batch(self, items: List[Dict[str, str]], use_rag: bool = True,
+                            use_arxiv: bool = True, use_web: bool = True,
+                            concurrency: int = BATCH_RESEARCH_CONCURRENCY,
+                            embeddings: Optional[List[Optional[List[float]]]] = None,
+                            matches: Optional[List[Optional[list]]] = None
+                            ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """Research many (document_id, query) items, yielding
+        ``(index, result, error)`` in completion order.
+ 
+        ``embeddings`` and ``matches`` come from ``prepare_batch``, which
+        runs here when they are not given. The per-item agent and LLM work
+        is capped at ``concurrency`` items in flight. Closing the generator
+        early cancels the items still running.
+        """
+        queries = [item["query"] for item in items]
+        if embeddings is None or matches is None:
+            embeddings, matches = await self.prepare_batch(items, use_rag=use_rag)
+ 
+        semaphore = asyncio.Semaphore(concurrency)
+ 
+        async def run(index: int):
+            async with semaphore:
+                try:
+                    result = await self.execute(
+                        document_id=items[index]["document_id"],
+                        query=queries[index],
+                        use_rag=use_rag,
+                        use_arxiv=use_arxiv,
+                        use_web=use_web,
+                        query_embedding=embeddings[index],
+                        matches=matches[index]
+                    )
+                    return index, result, None
+                except Exception as e:
+                    return index, None, str(e)
+ 
+        tasks = [asyncio.create_task(run(i)) for i in range(len(items))]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+ 
 # Initialize agents
 rag_agent = RAGAgent()
 arxiv_agent = ArxivAgent()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AgentNode:
+    """A step in the research graph.
+
+    ``run`` receives the input state plus the results of its dependencies.
+    If it misses ``deadline`` seconds, ``fallback`` is used as its result
+    and the node is reported in ``timed_out``.
+    """
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    depends_on: Sequence[str] = ()
+    deadline: Optional[float] = None
+    fallback: Any = None
+
+
+class AgentScheduler:
+    """Run agent nodes as a DAG on the event loop.
+
+    Every node starts as soon as its dependencies have finished, so
+    independent agents overlap and downstream steps such as combining only
+    see completed inputs. The returned state contains one key per node plus
+    ``timed_out`` (names of nodes that hit their deadline), ``partial`` and
+    per-node ``timings`` in seconds.
+    """
+
+    def __init__(self, nodes: List[AgentNode]):
+        self.nodes = {node.name: node for node in nodes}
+        if len(self.nodes) != len(nodes):
+            raise ValueError("Agent node names must be unique")
+        self._order = self._topological_order()
+
+    async def ainvoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_node(node: AgentNode) -> Any:
+            if node.depends_on:
+                await asyncio.gather(*(tasks[dep] for dep in node.depends_on))
+
+            node_state = {**state, **results, "timed_out": list(timed_out)}
+            start = time.monotonic()
+            try:
+                result = await asyncio.wait_for(node.run(node_state), node.deadline)
+            except asyncio.TimeoutError:
+                logger.warning(f"Agent '{node.name}' missed its {node.deadline}s deadline")
+                timed_out.append(node.name)
+                result = node.fallback
+            timings[node.name] = round(time.monotonic() - start, 3)
+            results[node.name] = result
+            return result
+
+        for name in self._order:
+            tasks[name] = asyncio.create_task(run_node(self.nodes[name]), name=f"agent-{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        return {
+            **state,
+            **results,
+            "timed_out": timed_out,
+            "partial": bool(timed_out),
+            "timings": timings
+        }
+
+    def _topological_order(self) -> List[str]:
+        order: List[str] = []
+        visiting = set()
+
+        def visit(name: str):
+            if name in order:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle in agent graph at '{name}'")
+            if name not in self.nodes:
+                raise ValueError(f"Unknown agent dependency '{name}'")
+            visiting.add(name)
+            for dep in self.nodes[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name)
+        return order
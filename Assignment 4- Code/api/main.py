@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from .routers import router  # Update relative import
 from fastapi.middleware.cors import CORSMiddleware
 from .core.middleware import RateLimitMiddleware, ErrorHandlingMiddleware
+from .core.retrieval import retrieval_client
+from .core.search_clients import search_http_client
+from .service import document_catalog
 from fastapi.openapi.utils import get_openapi
 import logging
 
@@ -17,11 +20,15 @@ app = FastAPI(
 async def startup_event():
     logger.info("FastAPI application starting up...")
     # Initialize your components here
+    await document_catalog.start()
     logger.info("All components initialized successfully")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("FastAPI application shutting down...")
+    await document_catalog.stop()
+    retrieval_client.shutdown()
+    await search_http_client.aclose()
 
 # Add middleware
 app.add_middleware(ErrorHandlingMiddleware)
@@ -4,6 +4,7 @@ from datetime import datetime
 
 class DocumentResponse(BaseModel):
     available_documents: List[str]
+    next_page_token: Optional[str] = None
 
 class ArxivResult(BaseModel):
     title: str
@@ -24,6 +25,10 @@ class ResearchResult(BaseModel):
     arxiv_results: Optional[List[ArxivResult]] = None
     web_results: Optional[List[WebSearchResult]] = None
     combined_analysis: str
+    partial: bool = False
+    timed_out_agents: List[str] = []
+    cached: bool = False
+    cache_similarity: Optional[float] = None
     timestamp: datetime = datetime.now()
 
 class ResearchSession(BaseModel):
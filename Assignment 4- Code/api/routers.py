@@ -1,10 +1,20 @@
 # routers.py
 from fastapi import APIRouter, HTTPException, Query, Depends, Body
-from typing import Optional, Dict, Union
+from typing import Optional, Dict, List, Union
 from .models import DocumentResponse, ArxivResult, WebSearchResult, ResearchResult, ResearchSession
-from .service import get_available_documents_from_gcs, fetch_arxiv, web_search
+from .service import document_catalog, fetch_arxiv, web_search
 from .graphs.research_graph import research_graph
+from .graphs.batch_research import (
+    build_research_result,
+    cached_research_result,
+    prepare_cached_batch,
+    stream_batch_results
+)
 from .core.session_manager import research_session_manager
+from .core.answer_cache import research_answer_cache
+from .core.embedding_cache import embedding_cache
+from .core.result_cache import search_result_cache
+from .core.config import BATCH_RESEARCH_MAX_ITEMS
 from datetime import datetime
 import logging
 from fastapi.responses import StreamingResponse
@@ -31,17 +41,45 @@ class ResearchRequest(BaseModel):
     use_arxiv: bool = True
     use_web: bool = True
  
+class BatchResearchItem(BaseModel):
+    document_id: str
+    query: str
+ 
+class BatchResearchRequest(BaseModel):
+    items: List[BatchResearchItem]
+    use_rag: bool = True
+    use_arxiv: bool = True
+    use_web: bool = True
+ 
+def _enabled_agents(request) -> List[str]:
+    return [
+        name for name, enabled in (
+            ("rag", request.use_rag),
+            ("arxiv", request.use_arxiv),
+            ("web", request.use_web)
+        ) if enabled
+    ]
+ 
 @router.get("/documents", response_model=DocumentResponse)
-async def select_documents():
-    """Fetch available documents from GCS."""
+async def select_documents(
+    page_size: Optional[int] = Query(None, ge=1, le=1000),
+    page_token: Optional[str] = None
+):
+    """Fetch available documents from the cached GCS catalog, optionally paged."""
     try:
-        # Call the tool with invoke, passing an empty dictionary as `tool_input`
-        documents = get_available_documents_from_gcs.invoke({})
-        if documents is None:
-            raise HTTPException(status_code=500, detail="Error fetching documents from GCS.")
-        if not documents:
-            raise HTTPException(status_code=404, detail="No documents found in GCS.")
-        return {"available_documents": documents}
+        documents, next_page_token = await document_catalog.list_documents(page_size, page_token)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if not documents and not page_token:
+        raise HTTPException(status_code=404, detail="No documents found in GCS.")
+    return {"available_documents": documents, "next_page_token": next_page_token}
+ 
+@router.post("/documents/refresh")
+async def refresh_documents():
+    """Reload the document catalog from GCS, e.g. after new uploads."""
+    try:
+        count = await document_catalog.refresh()
+        return {"documents": count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
  
@@ -49,7 +87,7 @@ async def select_documents():
 @router.get("/arxiv_search", response_model=list[ArxivResult])
 async def arxiv_search(query: str):
     """Search for ArXiv papers based on a query."""
-    results = fetch_arxiv(query)
+    results = await fetch_arxiv.ainvoke({"query": query})
     if not results or isinstance(results, str):
         raise HTTPException(status_code=500, detail="Error fetching Arxiv results")
     return results
@@ -57,7 +95,7 @@ async def arxiv_search(query: str):
 @router.get("/web_search", response_model=list[WebSearchResult])
 async def perform_web_search(query: str):
     """Perform a web search using SerpAPI."""
-    results = web_search(query)
+    results = await web_search.ainvoke({"query": query})
     if not results:
         raise HTTPException(status_code=500, detail="No results found")
     return results
@@ -74,55 +112,67 @@ async def conduct_research(
         # Log the incoming request
         logger.info(f"Received research request: {request}")
  
-        # Validate document exists
-        docs = await get_available_documents_from_gcs.ainvoke({})
-        if not docs:
-            logger.error("No documents found in storage")
+        # Validate document exists against the cached catalog
+        try:
+            document_exists = await document_catalog.contains(request.document_id)
+        except Exception as e:
+            logger.error(f"Error accessing document storage: {str(e)}")
             raise HTTPException(
                 status_code=500,
                 detail="Error accessing document storage"
             )
  
-        # Find exact match for document
-        if request.document_id not in docs:
+        if not document_exists:
             logger.error(f"Document not found: {request.document_id}")
             raise HTTPException(
                 status_code=404,
                 detail=f"Document not found: {request.document_id}"
             )
  
-        # Execute research
-        logger.info(f"Starting research for document: {request.document_id}")
+        # Reuse a stored answer for a near-duplicate question; the embedding is reused by RAG
+        agents = _enabled_agents(request)
+        query_embedding = None
+        cached = None
         try:
-            results = await research_graph.execute(
-                document_id=request.document_id,
-                query=request.query,
-                use_rag=request.use_rag,
-                use_arxiv=request.use_arxiv,
-                use_web=request.use_web
+            query_embedding, cached = await research_answer_cache.lookup_query(
+                research_graph.rag_agent.embeddings, request.document_id, request.query, agents
             )
         except Exception as e:
-            logger.error(f"Research execution error: {str(e)}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Research execution failed: {str(e)}"
-            )
+            logger.warning(f"Answer cache lookup skipped: {str(e)}")
  
-        if not results:
-            raise HTTPException(
-                status_code=500,
-                detail="Research execution failed to return results"
-            )
+        if cached:
+            cached_result, similarity = cached
+            research_result = cached_research_result(cached_result, request.query, similarity)
+        else:
+            # Execute research
+            logger.info(f"Starting research for document: {request.document_id}")
+            try:
+                results = await research_graph.execute(
+                    document_id=request.document_id,
+                    query=request.query,
+                    use_rag=request.use_rag,
+                    use_arxiv=request.use_arxiv,
+                    use_web=request.use_web,
+                    query_embedding=query_embedding
+                )
+            except Exception as e:
+                logger.error(f"Research execution error: {str(e)}")
+                raise HTTPException(
+                    status_code=500,
+                    detail=f"Research execution failed: {str(e)}"
+                )
  
-        research_result = ResearchResult(
-            document_id=request.document_id,
-            query=request.query,
-            rag_response=results.get("rag"),
-            arxiv_results=results.get("arxiv"),
-            web_results=results.get("web"),
-            combined_analysis=results.get("combined"),
-            timestamp=datetime.now()
-        )
+            if not results:
+                raise HTTPException(
+                    status_code=500,
+                    detail="Research execution failed to return results"
+                )
+ 
+            research_result = build_research_result(request.document_id, request.query, results)
+ 
+            # Partial answers are not reused, the next ask may get every agent in time
+            if query_embedding is not None and not research_result.partial:
+                research_answer_cache.store(request.document_id, query_embedding, agents, research_result)
  
         session_id = await research_session_manager.add_result(
             request.document_id,
@@ -143,6 +193,74 @@ async def conduct_research(
             detail=f"Error conducting research: {str(e)}"
         )
  
+@router.post("/research/batch")
+async def conduct_batch_research(request: BatchResearchRequest = Body(...)):
+    """Research many queries at once, streaming NDJSON results as they complete.
+ 
+    Each line is ``{"index": i, "result": ResearchResult}`` or
+    ``{"index": i, "error": ...}``. Batch results are not added to research
+    sessions, so the per-document question limit does not apply.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No research items provided")
+    if len(request.items) > BATCH_RESEARCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many research items (max {BATCH_RESEARCH_MAX_ITEMS})"
+        )
+ 
+    try:
+        missing = [
+            doc_id for doc_id in {item.document_id for item in request.items}
+            if not await document_catalog.contains(doc_id)
+        ]
+    except Exception as e:
+        logger.error(f"Error accessing document storage: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error accessing document storage")
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Documents not found: {sorted(missing)}")
+ 
+    agents = _enabled_agents(request)
+    items = [item.model_dump() for item in request.items]
+    logger.info(f"Starting batch research for {len(items)} queries")
+ 
+    # Embed, check the answer cache and retrieve before the 200 response starts,
+    # so a failure here gets an error status
+    try:
+        embeddings, matches, hits = await prepare_cached_batch(
+            research_graph, items, research_answer_cache, agents
+        )
+    except Exception as e:
+        logger.error(f"Batch query embedding failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch query embedding failed: {str(e)}")
+    if hits:
+        logger.info(f"Serving {len(hits)} of {len(items)} batch queries from the answer cache")
+ 
+    return StreamingResponse(
+        stream_batch_results(research_graph, items, research_answer_cache, agents, embeddings, matches, hits),
+        media_type="application/x-ndjson"
+    )
+ 
+@router.delete("/research/cache")
+async def invalidate_research_cache(agent: Optional[str] = None, document_id: Optional[str] = None):
+    """Invalidate cached research answers, optionally per agent and/or document"""
+    try:
+        removed = research_answer_cache.invalidate(agent=agent, document_id=document_id)
+        # Search results are not document specific, drop them when their agent is invalidated
+        searches = search_result_cache.invalidate(agent) if agent in ("arxiv", "web") else 0
+        return {"invalidated": removed, "search_results_invalidated": searches}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+ 
+@router.get("/research/cache/stats")
+async def research_cache_stats():
+    """Report hit/miss counters for the answer and embedding caches"""
+    return {
+        "answers": research_answer_cache.stats(),
+        "embeddings": embedding_cache.stats(),
+        "search_results": search_result_cache.stats()
+    }
+ 
 @router.get("/research/session/{document_id}", response_model=ResearchSession)
 async def get_research_session(document_id: str):
     """Get or create a research session for a document"""
@@ -4,15 +4,36 @@ import sys
 # Add the project root directory to Python path
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(project_root)
+# Chunking and chunk IDs are shared with the Airflow ingestion DAG, from the repository's shared/ package
+shared_dir = os.getenv("SHARED_PACKAGE_DIR", os.path.join(os.path.dirname(os.path.dirname(project_root)), "shared"))
+if os.path.isdir(shared_dir):
+    sys.path.append(shared_dir)
+try:
+    from doc_chunking import StructuralChunker, TextBlock, chunk_id, content_hash, split_paragraphs, tiktoken_counter
+except ImportError as e:
+    raise ImportError(
+        f"The shared doc_chunking package was not found in {shared_dir} or on PYTHONPATH. "
+        "Copy the repository's shared/ directory into the image, or point SHARED_PACKAGE_DIR at it."
+    ) from e
  
 # Now you can import from api
 from api.core.pinecone_client import init_pinecone
+from api.core.retrieval import AsyncIndexClient
+from api.core.bulk_indexer import BulkIndexer, IndexRecord
+from api.core.index_manifest import ReindexManifest, remove_stale_vectors
+from api.core.config import (
+    REINDEX_CHUNK_MAX_TOKENS,
+    REINDEX_EMBED_BATCH_SIZE,
+    REINDEX_PREFETCH_DOCUMENTS,
+    REINDEX_UPSERT_CONCURRENCY,
+    REINDEX_UPSERT_TIMEOUT_SECONDS
+)
 from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from google.cloud import storage
-import tempfile
-from tqdm import tqdm
+from pypdf import PdfReader
+from collections import deque
+import asyncio
+import io
 import logging
  
 # Set up logging at the very start of the file
@@ -21,95 +42,181 @@ logger = logging.getLogger(__name__)
  
 logger.debug("Script starting...")
  
-async def load_documents_from_gcs():
-    """Load documents from Google Cloud Storage"""
-    try:
-        # Initialize GCS client
-        credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-        storage_client = storage.Client.from_service_account_json(credentials_path)
-        bucket_name = os.getenv("GCS_BUCKET_NAME")
-        bucket = storage_client.bucket(bucket_name)
- 
-        # List all PDF files in the bucket
-        blobs = bucket.list_blobs(prefix="cfai_publications/")
-        pdf_blobs = [blob for blob in blobs if blob.name.endswith('.pdf')]
- 
-        documents = []
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200
-        )
+def split_pdf_bytes(data: bytes, source: str, chunker: StructuralChunker) -> list:
+    """Parse a PDF from memory into (source, page, text) chunks.
+
+    Paragraphs are packed across page breaks; a chunk's page is the one
+    it starts on.
+    """
+    reader = PdfReader(io.BytesIO(data))
+    blocks = (
+        TextBlock(text=paragraph, page=page_number)
+        for page_number, page in enumerate(reader.pages)
+        for paragraph in split_paragraphs(page.extract_text() or "")
+    )
+    return [(source, chunk.page, chunk.text) for chunk in chunker.chunk(blocks)]
  
-        for blob in tqdm(pdf_blobs, desc="Loading documents"):
-            # Create a temporary file to store the PDF
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
-                blob.download_to_filename(temp_file.name)
-               
-                # Load and split the PDF
-                loader = PyPDFLoader(temp_file.name)
-                doc_pages = loader.load()
-               
-                # Add source metadata
-                for page in doc_pages:
-                    page.metadata["source"] = blob.name
-               
-                # Split into chunks
-                chunks = text_splitter.split_documents(doc_pages)
-                documents.extend(chunks)
-               
-                # Clean up temp file
-                os.unlink(temp_file.name)
- 
-        return documents
+async def stream_document_chunks(prefetch: int = REINDEX_PREFETCH_DOCUMENTS, failed: set = None):
+    """Yield (source, page, text) chunks for every PDF in the bucket.
  
-    except Exception as e:
-        logger.error(f"Error loading documents: {str(e)}")
-        raise
+    PDFs are downloaded and parsed in memory on worker threads, up to
+    ``prefetch`` documents ahead of the consumer, and chunks are yielded in
+    bucket order. Embedding starts with the first document while later
+    ones are still downloading, and memory holds at most ``prefetch``
+    documents at a time. Documents that fail to load are skipped and
+    added to ``failed``.
+    """
+    # Initialize GCS client
+    credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    storage_client = storage.Client.from_service_account_json(credentials_path)
+    bucket_name = os.getenv("GCS_BUCKET_NAME")
+    bucket = storage_client.bucket(bucket_name)
+ 
+    # List all PDF files in the bucket
+    pdf_blobs = await asyncio.to_thread(
+        lambda: [blob for blob in bucket.list_blobs(prefix="cfai_publications/") if blob.name.endswith('.pdf')]
+    )
+    logger.info(f"Found {len(pdf_blobs)} PDFs to index")
+ 
+    # Same chunker as the ingestion DAG, budgeted in the OpenAI embedding model's tokens
+    chunker = StructuralChunker(REINDEX_CHUNK_MAX_TOKENS, tiktoken_counter("cl100k_base"))
+ 
+    def load(blob):
+        return split_pdf_bytes(blob.download_as_bytes(), blob.name, chunker)
+ 
+    remaining = iter(pdf_blobs)
+    window = deque()
+    for blob in remaining:
+        window.append((blob.name, asyncio.create_task(asyncio.to_thread(load, blob))))
+        if len(window) >= prefetch:
+            break
+ 
+    while window:
+        name, task = window.popleft()
+        next_blob = next(remaining, None)
+        if next_blob is not None:
+            window.append((next_blob.name, asyncio.create_task(asyncio.to_thread(load, next_blob))))
+        try:
+            chunks = await task
+        except Exception as e:
+            logger.error(f"Error loading document {name}: {str(e)}")
+            if failed is not None:
+                failed.add(name)
+            continue
+        logger.info(f"Loaded {name}: {len(chunks)} chunks")
+        for chunk in chunks:
+            yield chunk
+ 
+class ChunkRecordStream:
+    """Turn streamed chunks into index records with deterministic IDs.
+ 
+    A chunk's ID depends only on its source, position and content, so
+    rerunning the reindex overwrites vectors instead of duplicating them.
+    Text seen before, in the same or an earlier document, is not embedded
+    again; ``metadata_updates`` then lists the sources of each repeated
+    chunk so its one vector can be found from every document.
+    ``ids_by_source`` holds the vector IDs each source's chunks map to.
+    """
+ 
+    def __init__(self):
+        self.chunks = 0
+        self._positions = {}
+        self._first_seen = {}
+        self._repeats = {}
+        self.ids_by_source = {}
+ 
+    async def records(self, chunks):
+        async for source, page, text in chunks:
+            if not text.strip():
+                continue
+            self.chunks += 1
+            position = self._positions[source] = self._positions.get(source, -1) + 1
+            digest = content_hash(text)
+ 
+            first = self._first_seen.get(digest)
+            if first is not None:
+                vector_id, first_source = first
+                repeat = self._repeats.setdefault(vector_id, {"sources": {first_source}, "occurrences": 1})
+                repeat["sources"].add(source)
+                repeat["occurrences"] += 1
+                self.ids_by_source.setdefault(source, set()).add(vector_id)
+                continue
+ 
+            vector_id = chunk_id(source, position, text)
+            self._first_seen[digest] = (vector_id, source)
+            self.ids_by_source.setdefault(source, set()).add(vector_id)
+            yield IndexRecord(
+                id=vector_id,
+                text=text,
+                metadata={"text": text, "document_id": source, "page": page}
+            )
+ 
+    @property
+    def repeats(self) -> int:
+        return sum(repeat["occurrences"] - 1 for repeat in self._repeats.values())
+ 
+    def metadata_updates(self):
+        for vector_id, repeat in self._repeats.items():
+            sources = sorted(repeat["sources"])
+            yield vector_id, {
+                "occurrences": repeat["occurrences"],
+                "document_id": sources if len(sources) > 1 else sources[0]
+            }
  
 async def reindex_documents():
     """Reindex documents with correct embedding dimensions"""
     try:
-        # Initialize embeddings with correct model
+        # Initialize embeddings with correct model; batches are sized by BulkIndexer
         embeddings = OpenAIEmbeddings(
             model="text-embedding-3-small",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
+            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            chunk_size=REINDEX_EMBED_BATCH_SIZE
         )
        
         # Initialize Pinecone
         index = init_pinecone()
+        index_client = AsyncIndexClient(
+            index_getter=lambda: index,
+            max_workers=REINDEX_UPSERT_CONCURRENCY,
+            timeout=REINDEX_UPSERT_TIMEOUT_SECONDS
+        )
        
-        # Load documents from GCS
-        logger.info("Loading documents from GCS...")
-        documents = await load_documents_from_gcs()
-        logger.info(f"Loaded {len(documents)} document chunks")
-       
-        # Create embeddings and upsert to Pinecone
+        # Stream chunks from GCS straight into token-budgeted embedding batches and bulk upserts
         logger.info("Starting indexing process...")
-        for doc in tqdm(documents, desc="Indexing documents"):
-            try:
-                # Generate embedding
-                embedding = await embeddings.aembed_query(doc.page_content)
-               
-                # Prepare metadata
-                metadata = {
-                    "text": doc.page_content,
-                    "document_id": doc.metadata.get("source", ""),
-                    "page": doc.metadata.get("page", 0)
-                }
-               
-                # Upsert to Pinecone
-                index.upsert(
-                    vectors=[{
-                        "id": f"doc_{hash(doc.page_content)}",
-                        "values": embedding,
-                        "metadata": metadata
-                    }]
-                )
-            except Exception as e:
-                logger.error(f"Error indexing document chunk: {str(e)}")
-                continue
+        chunk_stream = ChunkRecordStream()
+        failed_sources = set()
+        try:
+            stats = await BulkIndexer(embeddings, index_client).run(
+                chunk_stream.records(stream_document_chunks(failed=failed_sources))
+            )
+ 
+            # Point each repeated chunk at every document it appears in
+            updates = list(chunk_stream.metadata_updates())
+            results = await asyncio.gather(
+                *(index_client.update(vector_id, metadata) for vector_id, metadata in updates),
+                return_exceptions=True
+            )
+            for (vector_id, _), result in zip(updates, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error updating metadata of repeated chunk {vector_id}: {str(result)}")
+
+            # Vectors from earlier runs with other chunk IDs would keep matching queries
+            if stats.failed:
+                logger.warning(f"{stats.failed} chunks failed to index; keeping vectors from earlier runs")
+            else:
+                await remove_stale_vectors(index, index_client, ReindexManifest(),
+                                           chunk_stream.ids_by_source, failed_sources)
+        finally:
+            index_client.shutdown()
+        logger.info(f"{chunk_stream.chunks} chunks, {chunk_stream.repeats} repeats stored once")
+ 
+        # The in-process backend keeps vectors in memory until persisted
+        if hasattr(index, "persist"):
+            index.persist()
  
+        logger.info(f"Indexing throughput: {stats.summary()}")
         logger.info("Indexing completed successfully")
+        return stats
  
     except Exception as e:
         logger.error(f"Reindexing failed: {str(e)}")
@@ -135,6 +242,5 @@ if __name__ == "__main__":
         raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
    
     # Run the reindexing
-    import asyncio
     asyncio.run(reindex_documents())
  
\ No newline at end of file
@@ -1,12 +1,12 @@
 import os
 import logging
 from google.cloud import storage
-import requests
-from serpapi import GoogleSearch
-import xml.etree.ElementTree as ET
 from dotenv import load_dotenv
 from langchain_core.tools import tool
 from api.core.pinecone_client import get_index
+from api.core.retrieval import retrieval_client
+from api.core.search_clients import search_arxiv, search_google
+from api.core.document_catalog import DocumentCatalog
 from api.models import ResearchResult
 from urllib.parse import quote, unquote
 import re
@@ -21,10 +21,7 @@ index = get_index()
 # GCS setup
 bucket_name = os.getenv("GCS_BUCKET_NAME")
 credentials_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-file_paths = [
-    "cfai_publications/Investment Horizon, Serial Correlation, and Better (Retirement) Portfolios/Investment Horizon, Serial Correlation, and Better (Retirement) Portfolios.pdf",
-    "cfai_publications/An Introduction to Alternative Credit/An Introduction to Alternative Credit.pdf"
-]
+DOCUMENT_PREFIX = "cfai_publications/"
  
 # Initialize GCS client with better error handling
 try:
@@ -46,45 +43,33 @@ except Exception as e:
     logger.error(f"Failed to initialize GCS client: {str(e)}")
     raise
  
-# Document Selection Tool
-@tool("select_document")
-def get_available_documents_from_gcs():
-    """Fetches the specified documents from Google Cloud Storage if they exist."""
-    try:
-        logger.info("Fetching specified documents from GCS.")
-       
-        if not bucket_name:
-            raise ValueError("GCS_BUCKET_NAME environment variable not set")
-           
-        if not gcs_client:
-            raise ValueError("GCS client not properly initialized")
-           
-        bucket = gcs_client.bucket(bucket_name)
-        available_docs = []
+def list_gcs_documents():
+    """List every PDF under the publications prefix with its object metadata"""
+    if not bucket_name:
+        raise ValueError("GCS_BUCKET_NAME environment variable not set")
  
-        if not bucket.exists():
-            raise ValueError(f"Bucket {bucket_name} does not exist")
+    documents = {}
+    for blob in gcs_client.list_blobs(bucket_name, prefix=DOCUMENT_PREFIX):
+        if blob.name.endswith('.pdf'):
+            documents[blob.name] = {
+                "size": blob.size,
+                "generation": blob.generation,
+                "updated": blob.updated.isoformat() if blob.updated else None
+            }
+    return documents
  
-        # Normalize document paths
-        for file_path in file_paths:
-            try:
-                # Normalize the path
-                normalized_path = re.sub(r'[\\/:*?"<>|]', '_', file_path)
-                blob = bucket.blob(file_path)
-                if blob.exists():
-                    logger.info(f"Document found: {file_path}")
-                    # Store the original path
-                    available_docs.append(file_path)
-                else:
-                    logger.warning(f"Document not found in GCS: {file_path}")
-            except Exception as blob_error:
-                logger.error(f"Error checking blob {file_path}: {str(blob_error)}")
+# Cached catalog used to validate document ids without GCS round trips
+document_catalog = DocumentCatalog(list_gcs_documents)
  
-        if not available_docs:
+# Document Selection Tool
+@tool("select_document")
+async def get_available_documents_from_gcs():
+    """Fetches the available documents from the cached Google Cloud Storage catalog."""
+    try:
+        documents, _ = await document_catalog.list_documents()
+        if not documents:
             logger.warning("No documents found in GCS")
-            return []
- 
-        return available_docs
+        return documents
  
     except Exception as e:
         logger.error(f"Error in get_available_documents_from_gcs: {str(e)}")
@@ -101,47 +86,19 @@ def normalize_document_path(doc_path: str) -> str:
  
 # Arxiv Fetch Function
 @tool("fetch_arxiv")
-def fetch_arxiv(query: str):
+async def fetch_arxiv(query: str):
     """Fetches research papers from ArXiv based on a query."""
-    url = f"http://export.arxiv.org/api/query?search_query=all:{query}&start=0&max_results=5"
-    response = requests.get(url)
-    if response.status_code != 200:
+    try:
+        return await search_arxiv(query, max_results=5)
+    except Exception as e:
+        logger.error(f"Error fetching data from Arxiv: {str(e)}")
         return "Error fetching data from Arxiv."
  
-    root = ET.fromstring(response.content)
-    results = []
-    for entry in root.findall("{http://www.w3.org/2005/Atom}entry"):
-        title = entry.find("{http://www.w3.org/2005/Atom}title").text
-        summary = entry.find("{http://www.w3.org/2005/Atom}summary").text
-        published = entry.find("{http://www.w3.org/2005/Atom}published").text
-        authors = [
-            author.find("{http://www.w3.org/2005/Atom}name").text
-            for author in entry.findall("{http://www.w3.org/2005/Atom}author")
-        ]
-        link = entry.find("{http://www.w3.org/2005/Atom}id").text
- 
-        results.append({
-            "title": title,
-            "summary": summary,
-            "published": published,
-            "authors": authors,
-            "link": link
-        })
-    return results
- 
 # Web Search Function using SerpAPI
-serpapi_api_key = os.getenv("SERPAPI_KEY")
- 
 @tool("web_search")
-def web_search(query: str):
+async def web_search(query: str):
     """Performs a Google search for general knowledge queries using SerpAPI."""
-    search = GoogleSearch({
-        "q": query,
-        "num": 5,
-        "engine": "google",
-        "api_key": serpapi_api_key
-    })
-    results = search.get_dict().get("organic_results", [])
+    results = await search_google(query, num=5)
     return [{
         "title": x["title"],
         "snippet": x["snippet"],
@@ -152,7 +109,7 @@ def web_search(query: str):
 async def validate_document_processing(document_id: str):
     """Add error handling for missing documents"""
     try:
-        response = index.fetch([document_id])
+        response = await retrieval_client.fetch([document_id])
         if not response.vectors:
             logger.warning(f"Document {document_id} not found in Pinecone")
             return False
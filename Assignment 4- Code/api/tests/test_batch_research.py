@@ -0,0 +1,146 @@
+import asyncio
+import json
+import pytest
+from ..core.answer_cache import SemanticAnswerCache
+from ..graphs.batch_research import build_research_result, prepare_cached_batch, stream_batch_results
+from ..graphs.research_graph import ResearchGraph
+
+class FakeEmbeddings:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        if self.fail:
+            raise RuntimeError("embedding service unavailable")
+        return [[float(len(text)), 1.0] for text in texts]
+
+class FakeRagAgent:
+    """Answers after a per-query delay and records cancelled queries"""
+
+    def __init__(self, delays=None, fail_embedding=False):
+        self.embeddings = FakeEmbeddings(fail=fail_embedding)
+        self.delays = delays or {}
+        self.cancelled = []
+        self.retrieved = []
+        self.executed = []
+
+    async def retrieve(self, query_embedding, document_id=None):
+        self.retrieved.append(document_id)
+        return [{"document_id": document_id}]
+
+    async def execute_rag(self, query, document_id=None, query_embedding=None, matches=None):
+        self.executed.append(query)
+        try:
+            await asyncio.sleep(self.delays.get(query, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(query)
+            raise
+        return {"answer": f"{document_id}: {query}", "matches": matches, "embedding": query_embedding}
+
+class FakeSearchAgent:
+    async def search_papers(self, state):
+        return []
+
+    async def search_web(self, state):
+        return []
+
+def _graph(rag_agent, failing_query=None):
+    search = FakeSearchAgent()
+    graph = ResearchGraph(rag_agent, search, search)
+    execute = graph.execute
+
+    async def execute_or_fail(**kwargs):
+        if kwargs["query"] == failing_query:
+            raise ValueError(f"Research workflow failed: {failing_query}")
+        return await execute(**kwargs)
+
+    graph.execute = execute_or_fail
+    return graph
+
+async def _lines(stream):
+    return [json.loads(line) async for line in stream]
+
+@pytest.mark.asyncio
+async def test_batch_stream_correlates_results_and_errors():
+    """Test one NDJSON line per item, tied to its index, with an error line for a failed query"""
+    rag = FakeRagAgent(delays={"slow question": 0.1})
+    graph = _graph(rag, failing_query="broken question")
+    items = [
+        {"document_id": "doc_a", "query": "slow question"},
+        {"document_id": "doc_b", "query": "broken question"},
+        {"document_id": "doc_c", "query": "fast question"}
+    ]
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    embeddings, matches = await graph.prepare_batch(items)
+
+    lines = await _lines(stream_batch_results(graph, items, cache, ["rag"], embeddings, matches))
+
+    assert len(rag.embeddings.calls) == 1
+    assert sorted(line["index"] for line in lines) == [0, 1, 2]
+    # Completion order, not request order: the slow item comes last
+    assert lines[-1]["index"] == 0
+    by_index = {line["index"]: line for line in lines}
+    assert by_index[1] == {
+        "index": 1, "document_id": "doc_b", "query": "broken question",
+        "error": "Research workflow failed: broken question"
+    }
+    for index in (0, 2):
+        result = by_index[index]["result"]
+        assert result["document_id"] == items[index]["document_id"]
+        assert result["query"] == items[index]["query"]
+        assert result["rag_response"] == f"{items[index]['document_id']}: {items[index]['query']}"
+    assert cache.stats()["stores"] == 2
+
+@pytest.mark.asyncio
+async def test_batch_embedding_failure_raises_before_streaming():
+    """Test a failed batch embedding surfaces from prepare_batch, not mid-stream"""
+    graph = _graph(FakeRagAgent(fail_embedding=True))
+    with pytest.raises(RuntimeError):
+        await graph.prepare_batch([{"document_id": "doc", "query": "question"}])
+
+@pytest.mark.asyncio
+async def test_batch_stream_cancels_pending_items_when_closed():
+    """Test closing the stream early, as on client disconnect, cancels the items still running"""
+    rag = FakeRagAgent(delays={"slow 1": 5, "slow 2": 5})
+    graph = _graph(rag)
+    items = [{"document_id": "doc", "query": query} for query in ("fast", "slow 1", "slow 2")]
+
+    stream = stream_batch_results(graph, items, SemanticAnswerCache(), ["rag"])
+    first = json.loads(await stream.__anext__())
+    await stream.aclose()
+    # Cancellation reaches the agents through the scheduler's own tasks
+    await asyncio.sleep(0.05)
+
+    assert first["result"]["query"] == "fast"
+    assert sorted(rag.cancelled) == ["slow 1", "slow 2"]
+
+@pytest.mark.asyncio
+async def test_batch_serves_cache_hits_without_researching_them():
+    """Test cached answers stream first, flagged like /research, and only misses are researched"""
+    rag = FakeRagAgent()
+    graph = _graph(rag)
+    cache = SemanticAnswerCache(threshold=0.999, ttl_seconds=60)
+    cached_answer = build_research_result("doc_a", "what was revenue", {"rag": {"answer": "10"}, "combined": "10"})
+    cache.store("doc_a", [17.0, 1.0], ["rag"], cached_answer)
+    items = [
+        {"document_id": "doc_b", "query": "new question"},
+        # Same embedding as the stored answer, but a differently worded question
+        {"document_id": "doc_a", "query": "What was revenue"}
+    ]
+
+    embeddings, matches, hits = await prepare_cached_batch(graph, items, cache, ["rag"])
+    lines = await _lines(stream_batch_results(graph, items, cache, ["rag"], embeddings, matches, hits))
+
+    assert len(rag.embeddings.calls) == 1
+    assert rag.retrieved == ["doc_b"]
+    assert rag.executed == ["new question"]
+    assert [line["index"] for line in lines] == [1, 0]
+    hit = lines[0]["result"]
+    assert hit["cached"] is True
+    assert hit["cache_similarity"] == pytest.approx(1.0, abs=1e-4)
+    assert hit["query"] == "What was revenue"
+    assert hit["rag_response"] == "10"
+    assert lines[1]["result"]["cached"] is False
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,68 @@
+import asyncio
+import pytest
+from ..core.bulk_indexer import BulkIndexer, IndexRecord
+from ..core.retrieval import AsyncIndexClient
+from ..core.vector_index import LocalVectorIndex
+
+class FakeEmbeddings:
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.batches = []
+        self.active = 0
+        self.max_active = 0
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.fail_on in texts:
+                raise RuntimeError("embedding failed")
+            return [[float(len(text)), 1.0] for text in texts]
+        finally:
+            self.active -= 1
+
+def _records(n):
+    return [IndexRecord(id=f"c{i}", text="x" * (i % 7 + 1), metadata={"n": i}) for i in range(n)]
+
+@pytest.mark.asyncio
+async def test_bulk_indexer_batches_by_token_budget():
+    """Test texts are grouped under the token and size limits and all vectors land"""
+    index = LocalVectorIndex()
+    embeddings = FakeEmbeddings()
+    indexer = BulkIndexer(
+        embeddings, AsyncIndexClient(index_getter=lambda: index),
+        max_batch_tokens=20, max_batch_size=5, upsert_batch_size=8,
+        token_counter=len
+    )
+    stats = await indexer.run(_records(50))
+
+    assert all(sum(map(len, batch)) <= 20 and len(batch) <= 5 for batch in embeddings.batches)
+    assert stats.chunks == stats.vectors == 50
+    assert stats.upsert_batches == 7
+    assert index.describe_index_stats()["total_vector_count"] == 50
+    assert index.fetch(ids=["c3"]).vectors["c3"].metadata == {"n": 3}
+
+@pytest.mark.asyncio
+async def test_bulk_indexer_overlaps_embedding_batches_and_skips_failures():
+    """Test embedding calls run concurrently and one failed batch does not stop the run"""
+    index = LocalVectorIndex()
+    embeddings = FakeEmbeddings(delay=0.05, fail_on="x" * 7)
+    records = [IndexRecord(id=f"c{i}", text="x" * (i % 7 + 1)) for i in range(40)]
+
+    async def stream():
+        for record in records:
+            yield record
+
+    indexer = BulkIndexer(
+        embeddings, AsyncIndexClient(index_getter=lambda: index),
+        max_batch_size=4, embed_concurrency=4, upsert_batch_size=10, token_counter=len
+    )
+    stats = await indexer.run(stream())
+
+    assert embeddings.max_active == 4
+    assert stats.failed > 0
+    assert stats.vectors + stats.failed == 40
+    assert index.describe_index_stats()["total_vector_count"] == stats.vectors
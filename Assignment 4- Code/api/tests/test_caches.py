@@ -0,0 +1,266 @@
+import asyncio
+import time
+import pytest
+from ..core.embedding_cache import EmbeddingCache, CachedEmbeddings
+from ..core.answer_cache import SemanticAnswerCache
+from ..core.result_cache import TTLResultCache, normalize_query
+from ..core.document_catalog import DocumentCatalog
+from ..models import ResearchResult
+
+class FakeEmbeddings:
+    model = "fake-embedding"
+
+    def __init__(self):
+        self.calls = []
+
+    async def aembed_query(self, text):
+        self.calls.append([text])
+        return [float(len(text)), 1.0]
+
+    async def aembed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+@pytest.mark.asyncio
+async def test_embedding_cache_skips_repeated_queries(tmp_path):
+    """Test normalized repeats are served from memory without an API call"""
+    cache = EmbeddingCache(disk_path=str(tmp_path / "cache.sqlite3"))
+    embeddings = CachedEmbeddings(FakeEmbeddings(), cache)
+
+    first = await embeddings.aembed_query("What are the key findings?")
+    second = await embeddings.aembed_query("  What are the   key findings? ")
+
+    assert first == second
+    assert len(embeddings.embeddings.calls) == 1
+    stats = cache.stats()
+    assert stats["memory_hits"] == 1
+    assert stats["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_embedding_cache_disk_tier_survives_restart(tmp_path):
+    """Test entries persist on disk and are keyed by model name"""
+    path = str(tmp_path / "cache.sqlite3")
+    EmbeddingCache(disk_path=path).put("model-a", "private equity", [0.5, 0.25])
+
+    cache = EmbeddingCache(disk_path=path)
+    assert cache.get("model-a", "private equity") == [0.5, 0.25]
+    assert cache.get("model-b", "private equity") is None
+    assert cache.stats()["disk_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_embedding_cache_batches_only_misses(tmp_path):
+    """Test batch embedding sends just the uncached texts upstream"""
+    cache = EmbeddingCache(disk_path=None)
+    embeddings = CachedEmbeddings(FakeEmbeddings(), cache)
+    await embeddings.aembed_query("alpha")
+
+    vectors = await embeddings.aembed_documents(["alpha", "beta", "gamma"])
+
+    assert [v[0] for v in vectors] == [5.0, 4.0, 5.0]
+    assert embeddings.embeddings.calls[-1] == ["beta", "gamma"]
+
+def test_embedding_cache_is_size_bounded(tmp_path):
+    """Test both tiers evict least recently used entries"""
+    cache = EmbeddingCache(max_memory_items=2, disk_path=str(tmp_path / "c.sqlite3"), max_disk_items=10)
+    for i in range(15):
+        cache.put("m", f"text {i}", [float(i)])
+
+    stats = cache.stats()
+    assert stats["memory_items"] == 2
+    assert stats["disk_items"] <= 10
+    assert cache.get("m", "text 14") == [14.0]
+    assert cache.get("m", "text 0") is None
+
+def test_embedding_cache_opens_disk_lazily_and_counts_overwrites(tmp_path):
+    """Test the SQLite file appears on first use and rewriting a key keeps the count"""
+    path = tmp_path / "cache.sqlite3"
+    cache = EmbeddingCache(disk_path=str(path))
+    assert not path.exists()
+
+    cache.put("m", "same text", [1.0])
+    cache.put("m", "same text", [2.0])
+    cache.put("m", "other text", [3.0])
+
+    assert path.exists()
+    assert cache.stats()["disk_items"] == 2
+    assert EmbeddingCache(disk_path=str(path)).get("m", "same text") == [2.0]
+
+def _result(query):
+    return ResearchResult(document_id="doc", query=query, combined_analysis=f"Answer to {query}")
+
+def test_answer_cache_matches_similar_queries():
+    """Test near-duplicate queries for the same document and agents hit"""
+    cache = SemanticAnswerCache(threshold=0.95, ttl_seconds=60)
+    cache.store("doc", [1.0, 0.0], ["rag", "web"], _result("original question"))
+
+    hit = cache.lookup("doc", [0.99, 0.05], ["web", "rag"])
+    assert hit is not None
+    assert hit[0].query == "original question"
+    assert hit[1] > 0.95
+
+    assert cache.lookup("doc", [0.0, 1.0], ["rag", "web"]) is None
+    assert cache.lookup("doc", [1.0, 0.0], ["rag"]) is None
+    assert cache.lookup("other_doc", [1.0, 0.0], ["rag", "web"]) is None
+
+def test_answer_cache_expires_entries():
+    """Test entries older than the TTL are not served"""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=0)
+    cache.store("doc", [1.0, 0.0], ["rag"], _result("question"))
+
+    assert cache.lookup("doc", [1.0, 0.0], ["rag"]) is None
+    assert cache.stats()["entries"] == 0
+
+def test_answer_cache_invalidates_per_agent():
+    """Test invalidation drops only entries that used the given agent"""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    cache.store("doc", [1.0, 0.0], ["rag", "web"], _result("with web"))
+    cache.store("doc", [0.0, 1.0], ["rag"], _result("rag only"))
+
+    assert cache.invalidate(agent="web") == 1
+    assert cache.lookup("doc", [1.0, 0.0], ["rag", "web"]) is None
+    assert cache.lookup("doc", [0.0, 1.0], ["rag"]) is not None
+
+    assert cache.invalidate(document_id="doc") == 1
+    with pytest.raises(ValueError):
+        cache.invalidate(agent="unknown")
+
+def test_answer_cache_only_serves_answers_for_the_requested_document():
+    """Test an answer stored for one document is never returned for another"""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    cache.store("doc_a", [1.0, 0.0], ["rag"], _result("question"))
+    # A result whose document_id disagrees with its key is not stored
+    cache.store("doc_b", [1.0, 0.0], ["rag"], _result("question"))
+
+    assert cache.lookup("doc", [1.0, 0.0], ["rag"]) is None
+    assert cache.lookup("doc_b", [1.0, 0.0], ["rag"]) is None
+    assert cache.lookup("doc_a", [1.0, 0.0], ["rag"]) is None
+    assert cache.stats()["entries"] == 0
+
+    cache.store("doc", [1.0, 0.0], ["rag"], _result("question"))
+    assert cache.lookup("doc", [1.0, 0.0], ["rag"])[0].document_id == "doc"
+    assert cache.lookup("other", [1.0, 0.0], ["rag"]) is None
+
+@pytest.mark.asyncio
+async def test_answer_cache_skips_embedding_without_rag():
+    """Test arXiv/web-only requests neither embed the query nor hit the cache"""
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    embeddings = FakeEmbeddings()
+
+    assert await cache.lookup_query(embeddings, "doc", "question", ["arxiv", "web"]) == (None, None)
+    assert embeddings.calls == []
+
+    embedding, hit = await cache.lookup_query(embeddings, "doc", "question", ["rag"])
+    assert embedding == [8.0, 1.0] and hit is None
+    cache.store("doc", embedding, ["rag"], _result("question"))
+    _, hit = await cache.lookup_query(embeddings, "doc", "question", ["rag"])
+    assert hit[0].query == "question"
+
+@pytest.mark.asyncio
+async def test_result_cache_coalesces_concurrent_requests():
+    """Test N concurrent identical fetches trigger a single upstream call"""
+    cache = TTLResultCache(ttl_seconds=60, max_entries=10)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    key = ("web", normalize_query("  Private   Equity "), 5)
+    results = await asyncio.gather(*(cache.get_or_fetch(key, fetch) for _ in range(10)))
+
+    assert results == [["result"]] * 10
+    assert len(calls) == 1
+    assert await cache.get_or_fetch(("web", "private equity", 5), fetch) == ["result"]
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 9
+
+@pytest.mark.asyncio
+async def test_result_cache_does_not_cache_failures():
+    """Test a failed fetch propagates and the next call retries"""
+    cache = TTLResultCache(ttl_seconds=60, max_entries=10)
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    async def working():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_fetch(("arxiv", "q", 5), failing)
+    assert await cache.get_or_fetch(("arxiv", "q", 5), working) == "ok"
+
+@pytest.mark.asyncio
+async def test_result_cache_expires_evicts_and_invalidates():
+    """Test TTL expiry, size-bounded eviction and namespace invalidation"""
+    async def value(v):
+        return v
+
+    expired = TTLResultCache(ttl_seconds=0, max_entries=10)
+    await expired.get_or_fetch(("web", "q", 5), lambda: value(1))
+    assert await expired.get_or_fetch(("web", "q", 5), lambda: value(2)) == 2
+
+    cache = TTLResultCache(ttl_seconds=60, max_entries=2)
+    for i in range(3):
+        await cache.get_or_fetch(("arxiv", f"q{i}", 5), lambda i=i: value(i))
+    await cache.get_or_fetch(("web", "q", 5), lambda: value("w"))
+    assert cache.stats()["entries"] == 2
+    assert cache.invalidate("web") == 1
+    assert cache.stats()["entries"] == 1
+
+@pytest.mark.asyncio
+async def test_document_catalog_lookups_and_paging():
+    """Test O(1) lookups after one listing, cursor paging and explicit hooks"""
+    listings = []
+
+    def lister():
+        listings.append(1)
+        return {f"cfai_publications/doc{i}.pdf": {} for i in range(5)}
+
+    catalog = DocumentCatalog(lister, refresh_interval=300)
+    assert await catalog.contains("cfai_publications/doc3.pdf")
+    assert await catalog.contains("cfai_publications/doc0.pdf")
+    assert len(listings) == 1
+
+    page, token = await catalog.list_documents(page_size=2)
+    assert page == ["cfai_publications/doc0.pdf", "cfai_publications/doc1.pdf"]
+    page, token = await catalog.list_documents(page_size=2, page_token=token)
+    assert page == ["cfai_publications/doc2.pdf", "cfai_publications/doc3.pdf"]
+    page, token = await catalog.list_documents(page_size=2, page_token=token)
+    assert page == ["cfai_publications/doc4.pdf"] and token is None
+
+    catalog.add("cfai_publications/new.pdf")
+    catalog.remove("cfai_publications/doc0.pdf")
+    documents, _ = await catalog.list_documents()
+    assert "cfai_publications/new.pdf" in documents
+    assert "cfai_publications/doc0.pdf" not in documents
+
+    catalog.invalidate()
+    assert await catalog.contains("cfai_publications/doc0.pdf")
+    assert len(listings) == 2
+
+@pytest.mark.asyncio
+async def test_document_catalog_miss_refreshes_in_background(monkeypatch):
+    """Test a miss answers from the snapshot at once and the listing runs off the request path"""
+    from ..core import document_catalog as catalog_module
+    monkeypatch.setattr(catalog_module, "MISS_REFRESH_INTERVAL", 0)
+    documents = {"cfai_publications/old.pdf": {}}
+    listings = []
+
+    def lister():
+        listings.append(1)
+        time.sleep(0.1)
+        return dict(documents)
+
+    catalog = DocumentCatalog(lister, refresh_interval=300)
+    await catalog.contains("cfai_publications/old.pdf")
+    documents["cfai_publications/new.pdf"] = {}
+
+    start = time.perf_counter()
+    results = [await catalog.contains("cfai_publications/new.pdf") for _ in range(3)]
+    assert time.perf_counter() - start < 0.05
+    assert results == [False, False, False]
+
+    await asyncio.sleep(0.2)
+    assert len(listings) == 2
+    assert await catalog.contains("cfai_publications/new.pdf")
@@ -0,0 +1,41 @@
+import pytest
+from ..core.index_manifest import ReindexManifest, remove_stale_vectors
+from ..core.retrieval import AsyncIndexClient
+from ..core.vector_index import LocalVectorIndex
+
+def _index(ids):
+    index = LocalVectorIndex()
+    index.upsert(vectors=[(vector_id, [1.0, float(i)], {}) for i, vector_id in enumerate(ids)])
+    return index
+
+def _ids(index):
+    return sorted(vector_id for page in index.list() for vector_id in page)
+
+@pytest.mark.asyncio
+async def test_reindex_removes_vectors_of_earlier_runs_and_legacy_ids(tmp_path):
+    """Test a rerun deletes IDs it no longer writes and legacy doc_ IDs, keeping failed sources"""
+    path = tmp_path / "manifest.json"
+    previous = ReindexManifest(str(path))
+    previous.record({"a.pdf": ["a-old", "shared"], "b.pdf": ["b-old"], "c.pdf": ["c-old"]})
+    previous.save()
+
+    index = _index(["a-old", "shared", "b-old", "c-old", "doc_123", "doc_-45", "doc_notes", "a-new"])
+    client = AsyncIndexClient(index_getter=lambda: index)
+    manifest = ReindexManifest(str(path))
+    try:
+        removed = await remove_stale_vectors(
+            index, client, manifest, {"a.pdf": {"a-new", "shared"}}, failed={"b.pdf"}
+        )
+    finally:
+        client.shutdown()
+
+    assert removed == 4
+    assert _ids(index) == ["a-new", "b-old", "doc_notes", "shared"]
+    saved = ReindexManifest(str(path))
+    assert saved.ids_by_source == {"a.pdf": ["a-new", "shared"], "b.pdf": ["b-old"]}
+    assert saved.legacy_ids_removed
+
+def test_local_index_lists_ids_in_pages():
+    """Test ID listing by prefix, a page of at most ``limit`` IDs at a time"""
+    index = _index([f"doc_{i}" for i in range(5)] + ["other"])
+    assert list(index.list(prefix="doc_", limit=2)) == [["doc_0", "doc_1"], ["doc_2", "doc_3"], ["doc_4"]]
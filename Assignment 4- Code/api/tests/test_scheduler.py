@@ -0,0 +1,59 @@
+import asyncio
+import time
+import pytest
+from ..graphs.scheduler import AgentNode, AgentScheduler
+
+def _sleeper(delay, value):
+    async def run(state):
+        await asyncio.sleep(delay)
+        return value
+    return run
+
+@pytest.mark.asyncio
+async def test_scheduler_runs_independent_agents_in_parallel():
+    """Test latency tracks the slowest agent, not the sum of all agents"""
+    async def combine(state):
+        return [state["a"], state["b"], state["c"]]
+
+    scheduler = AgentScheduler([
+        AgentNode("a", _sleeper(0.2, 1)),
+        AgentNode("b", _sleeper(0.2, 2)),
+        AgentNode("c", _sleeper(0.2, 3)),
+        AgentNode("combined", combine, depends_on=("a", "b", "c"))
+    ])
+    start = time.perf_counter()
+    result = await scheduler.ainvoke({"query": "q"})
+
+    assert time.perf_counter() - start < 0.5
+    assert result["combined"] == [1, 2, 3]
+    assert result["query"] == "q"
+    assert result["partial"] is False
+
+@pytest.mark.asyncio
+async def test_scheduler_returns_partial_results_on_deadline():
+    """Test a late agent is replaced by its fallback and reported"""
+    async def combine(state):
+        return {"fast": state["fast"], "slow": state["slow"], "timed_out": state["timed_out"]}
+
+    scheduler = AgentScheduler([
+        AgentNode("fast", _sleeper(0.01, "ok"), deadline=1),
+        AgentNode("slow", _sleeper(5, "late"), deadline=0.1, fallback=[]),
+        AgentNode("combined", combine, depends_on=("fast", "slow"))
+    ])
+    start = time.perf_counter()
+    result = await scheduler.ainvoke({})
+
+    assert time.perf_counter() - start < 1
+    assert result["combined"] == {"fast": "ok", "slow": [], "timed_out": ["slow"]}
+    assert result["timed_out"] == ["slow"]
+    assert result["partial"] is True
+
+def test_scheduler_rejects_invalid_graphs():
+    """Test unknown dependencies and cycles are caught up front"""
+    with pytest.raises(ValueError):
+        AgentScheduler([AgentNode("a", _sleeper(0, 1), depends_on=("missing",))])
+    with pytest.raises(ValueError):
+        AgentScheduler([
+            AgentNode("a", _sleeper(0, 1), depends_on=("b",)),
+            AgentNode("b", _sleeper(0, 1), depends_on=("a",))
+        ])
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import pytest
+from ..core.vector_index import LocalVectorIndex, matches_filter
+from ..core.retrieval import AsyncIndexClient
+
+def _build_index(path=None):
+    index = LocalVectorIndex(path=path)
+    index.upsert(vectors=[
+        ("a1", [1.0, 0.0, 0.0], {"document_id": "doc_a", "page": 1, "text": "alpha"}),
+        ("a2", [0.9, 0.1, 0.0], {"document_id": "doc_a", "page": 2, "text": "beta"}),
+        {"id": "b1", "values": [0.0, 1.0, 0.0], "metadata": {"document_id": "doc_b", "page": 1}},
+    ])
+    return index
+
+def test_query_ranks_by_cosine_similarity():
+    """Test nearest neighbours come back best-first with Pinecone-style matches"""
+    index = _build_index()
+    results = index.query(vector=[1.0, 0.0, 0.0], top_k=2, include_metadata=True)
+
+    assert [m.id for m in results.matches] == ["a1", "a2"]
+    assert results.matches[0].score == pytest.approx(1.0)
+    assert results.matches[0].metadata["text"] == "alpha"
+
+def test_query_applies_metadata_filter():
+    """Test equality and operator filters restrict the candidates"""
+    index = _build_index()
+
+    results = index.query(vector=[1.0, 0.0, 0.0], top_k=3, filter={"document_id": "doc_b"})
+    assert [m.id for m in results.matches] == ["b1"]
+
+    results = index.query(vector=[1.0, 0.0, 0.0], top_k=3, filter={"page": {"$gte": 2}})
+    assert [m.id for m in results.matches] == ["a2"]
+
+    results = index.query(vector=[1.0, 0.0, 0.0], top_k=3, filter={"document_id": "missing"})
+    assert results.matches == []
+
+def test_upsert_overwrites_and_delete_removes():
+    """Test re-upserting an id replaces it and deleted ids disappear"""
+    index = _build_index()
+    index.upsert(vectors=[("a1", [0.0, 0.0, 1.0], {"document_id": "doc_c"})])
+    index.delete(ids=["b1"])
+
+    assert index.query(vector=[0.0, 0.0, 1.0], top_k=1).matches[0].id == "a1"
+    assert index.query(vector=[1.0, 0.0, 0.0], top_k=3, filter={"document_id": "doc_a"}).matches[0].id == "a2"
+    assert set(index.fetch(["a1", "b1"]).vectors) == {"a1"}
+    assert index.describe_index_stats()["total_vector_count"] == 2
+
+def test_update_merges_metadata_and_reindexes_filters():
+    """Test set_metadata keeps the vector and makes new filter values match"""
+    index = _build_index()
+    index.update(id="a1", set_metadata={"document_id": ["doc_a", "doc_b"]})
+
+    matches = index.query(vector=[1.0, 0.0, 0.0], top_k=3, filter={"document_id": "doc_b"}, include_metadata=True).matches
+    assert [m.id for m in matches] == ["a1", "b1"]
+    assert matches[0].score == pytest.approx(1.0)
+    assert matches[0].metadata["text"] == "alpha"
+
+def test_persist_and_reload(tmp_path):
+    """Test the index round-trips through its on-disk memory-mapped form"""
+    index = _build_index(path=tmp_path)
+    index.delete(ids=["a2"])
+    index.persist()
+
+    reloaded = LocalVectorIndex(path=tmp_path)
+    results = reloaded.query(vector=[0.0, 1.0, 0.0], top_k=5, include_metadata=True)
+    assert [m.id for m in results.matches] == ["b1", "a1"]
+    assert reloaded.fetch(["b1"]).vectors["b1"].metadata["document_id"] == "doc_b"
+
+    # Writes after a reload copy the read-only memory map before mutating it
+    reloaded.upsert(vectors=[("c1", [0.0, 1.0, 0.0], {"document_id": "doc_c"})])
+    assert reloaded.describe_index_stats()["total_vector_count"] == 3
+
+def test_matches_filter_logical_operators():
+    """Test $and/$or/$in combinations against list-valued metadata"""
+    metadata = {"document_id": ["doc_a", "doc_b"], "page": 3}
+
+    assert matches_filter(metadata, {"document_id": "doc_b"})
+    assert matches_filter(metadata, {"$or": [{"page": 1}, {"document_id": {"$in": ["doc_a"]}}]})
+    assert not matches_filter(metadata, {"$and": [{"page": 3}, {"document_id": {"$nin": ["doc_a"]}}]})
+
+class SlowIndex:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def query(self, **kwargs):
+        time.sleep(self.delay)
+        return kwargs["top_k"]
+
+@pytest.mark.asyncio
+async def test_async_index_client_runs_queries_concurrently():
+    """Test blocking queries overlap on the pool instead of serializing"""
+    client = AsyncIndexClient(index_getter=lambda: SlowIndex(0.2), max_workers=8, timeout=5)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.query(vector=[1.0], top_k=k) for k in range(8)))
+    elapsed = time.perf_counter() - start
+    client.shutdown()
+
+    assert results == list(range(8))
+    assert elapsed < 1.0
+
+@pytest.mark.asyncio
+async def test_async_index_client_enforces_timeout():
+    """Test a slow backend call raises TimeoutError after the per-call budget"""
+    client = AsyncIndexClient(index_getter=lambda: SlowIndex(1.0), max_workers=1, timeout=5)
+    with pytest.raises(TimeoutError):
+        await client.query(vector=[1.0], top_k=1, timeout=0.1)
+    client.shutdown()
@@ -4,8 +4,11 @@ import os
 from google.oauth2 import service_account
 from google.cloud import storage
 from airflow import DAG
-from airflow.operators.python_operator import PythonOperator 
-from datetime import datetime
+from airflow.decorators import task_group
+from airflow.operators.python_operator import PythonOperator
+from datetime import datetime, timedelta
+
+from ingestion.config import MAX_PARALLEL_DOCUMENTS, TASK_RETRIES
 
 
 load_dotenv()
@@ -20,345 +23,352 @@ if credentials_path:
 else:
     raise ValueError("GOOGLE_APPLICATION_CREDENTIALS environment variable not set")
 
-def download_files_from_gcs():
-    
-    # Fetch bucket name from environment variable
-    bucket_name = os.getenv("GCS_BUCKET_NAME")
-    
-    # Check if bucket name is loaded correctly
-    if not bucket_name:
-        raise ValueError("Bucket name not found. Ensure GCS_BUCKET_NAME is set in .env file.")
-    
-    print("Bucket name:", bucket_name)
-    
-    # Initialize the Google Cloud Storage client
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    
-    # List of specific files to download
-    file_paths = [
-        "cfai_publications/The Economics of Private Equity: A Critical Review/The Economics of Private Equity: A Critical Review.pdf",
-        "cfai_publications/Investment Horizon, Serial Correlation, and Better (Retirement) Portfolios/Investment Horizon, Serial Correlation, and Better (Retirement) Portfolios.pdf",
-        "cfai_publications/An Introduction to Alternative Credit/An Introduction to Alternative Credit.pdf"
-    ]
-    
-    # Set the current directory as the destination for downloads
-    current_directory = os.getcwd()
-    
-    # Download each file
-    for file_path in file_paths:
-        blob = bucket.blob(file_path)
-        local_file_path = os.path.join(current_directory, os.path.basename(file_path))
-        blob.download_to_filename(local_file_path)
-        print(f"Downloaded {file_path} to {local_file_path}")
-
-def process_and_save_pdfs():
+def discover_publications(dag_run=None):
+    from ingestion.config import GCS_PREFIX, MANIFEST_PATH
+    from ingestion.gcs import get_bucket, list_publications, object_info
+    from ingestion.manifest import IngestionManifest
+
+    # Every PDF under the prefix is a publication to ingest
+    bucket = get_bucket()
+    blobs = list_publications(bucket)
+    print(f"Found {len(blobs)} publications under gs://{bucket.name}/{GCS_PREFIX}")
+
+    # Compare the bucket against the manifest of earlier runs
+    with IngestionManifest(MANIFEST_PATH).locked() as manifest:
+        changes = manifest.sync({blob.name: object_info(blob) for blob in blobs})
+    print("Document changes:", {kind: len(names) for kind, names in changes.items()})
+
+    names = sorted(blob.name for blob in blobs)
+    # Runs triggered by the publication watcher carry just the objects that changed
+    conf = (dag_run.conf or {}) if dag_run else {}
+    if "publications" in conf:
+        requested = set(conf["publications"])
+        names = [name for name in names if name in requested]
+        print(f"Triggered for {len(names)} changed publications: {names}")
+
+    # Returned value goes to XCom and maps one task group instance per publication;
+    # unchanged documents finish in their first task
+    return names
+
+def get_index(create_if_missing=False):
+    """Connect to the Pinecone index; returns (index, created)"""
+    from pinecone import Pinecone, ServerlessSpec
+    from ingestion.config import PINECONE_INDEX_NAME, PINECONE_REGION
+
+    # Initialize Pinecone with environment variables
+    pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    if PINECONE_INDEX_NAME in pc.list_indexes().names():
+        return pc.Index(PINECONE_INDEX_NAME), False
+    if not create_if_missing:
+        return None, False
+
+    print(f"Creating Pinecone index: {PINECONE_INDEX_NAME}")
+    pc.create_index(
+        name=PINECONE_INDEX_NAME,
+        dimension=load_embedding_models(images=False)[0].get_sentence_embedding_dimension(),
+        metric='cosine',
+        spec=ServerlessSpec(cloud='aws', region=PINECONE_REGION)
+    )
+    return pc.Index(PINECONE_INDEX_NAME), True
+
+def prepare_index():
+    # Create the Pinecone index on first run; later runs update it in place
+    _index, created = get_index(create_if_missing=True)
+    # Goes to XCom: a new index is empty, so every document has to be uploaded again
+    return {"created": created}
+
+def delete_removed_publications():
+    from ingestion.config import MANIFEST_PATH
+    from ingestion.manifest import IngestionManifest, delete_vectors
+
+    # Delete vectors of documents that are gone from the bucket
+    manifest = IngestionManifest(MANIFEST_PATH)
+    removed = manifest.removed()
+    if not removed:
+        return
+    index, _created = get_index()
+    for name in removed:
+        if index is not None:
+            delete_vectors(index, manifest.get(name, "vector_ids", []))
+        print(f"Deleted vectors of removed document '{name}'")
+    with manifest.locked():
+        for name in removed:
+            manifest.forget(name)
+
+def download_publication(name):
+    from ingestion.config import MANIFEST_PATH
+    from ingestion.download import DownloadCache
+    from ingestion.gcs import get_bucket
+    from ingestion.manifest import IngestionManifest
+
+    manifest = IngestionManifest(MANIFEST_PATH)
+    blob = get_bucket().get_blob(name)
+    if blob is None:
+        raise FileNotFoundError(f"{name} is no longer in the bucket")
+
+    # Current cached copies are reused; large objects are fetched in parallel ranges
+    path, downloaded = DownloadCache().fetch(blob)
+    if not manifest.is_current(name, "download", "") or manifest.get(name, "local_path") != path:
+        with manifest.locked():
+            manifest.mark(name, "download", "", local_path=path)
+    if downloaded:
+        print(f"Downloaded {name} to {path}")
+    else:
+        print(f"Unchanged, using cached copy of {name}")
+
+def parse_publication(name):
 
     import logging
-    import time
     from pathlib import Path
-    import pandas as pd
-    import json
-    from docling.datamodel.base_models import InputFormat
-    from docling.datamodel.pipeline_options import PdfPipelineOptions
-    from docling.document_converter import DocumentConverter, PdfFormatOption
-    from docling_core.types.doc import ImageRefMode, PictureItem, TableItem
-    from docling_core.transforms.chunker import HierarchicalChunker
+    from ingestion.artifacts import clear_document_artifacts
+    from ingestion.config import MANIFEST_PATH, MAX_PARALLEL_DOCUMENTS, PARSED_CONTENT_DIR, PARSER_SETTINGS
+    from ingestion.manifest import IngestionManifest, config_fingerprint
+    from ingestion.parsing import parse_documents
 
     # Configure logging
     logging.basicConfig(level=logging.INFO)
     _log = logging.getLogger(__name__)
-    
-    # Define the resolution scale for images
-    IMAGE_RESOLUTION_SCALE = 2.0
-    
-    # Paths to local PDF files
-    file_paths = [
-        "The Economics of Private Equity: A Critical Review.pdf",
-        "Investment Horizon, Serial Correlation, and Better (Retirement) Portfolios.pdf",
-        "An Introduction to Alternative Credit.pdf"
-    ]
-    
+
+    # Skip documents parsed since their last download with the same settings
+    manifest = IngestionManifest(MANIFEST_PATH)
+    parser_fingerprint = config_fingerprint(PARSER_SETTINGS)
+    if manifest.is_current(name, "parse", parser_fingerprint):
+        _log.info(f"{name} is already parsed")
+        return
+
     # Output directory
-    output_dir = Path("parsed_content")  # Replace with your desired output directory path
+    output_dir = Path(PARSED_CONTENT_DIR)
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Function to process PDF files
-    def process_pdf(file_path):
-        pipeline_options = PdfPipelineOptions()
-        pipeline_options.images_scale = IMAGE_RESOLUTION_SCALE
-        pipeline_options.generate_page_images = True
-        pipeline_options.generate_table_images = True
-        pipeline_options.generate_picture_images = True
-    
-        doc_converter = DocumentConverter(
-            format_options={
-                InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
-            }
+
+    file_path = manifest.get(name, "local_path")
+    if not file_path or not os.path.exists(file_path):
+        raise FileNotFoundError(f"Local copy of {name} is missing, run its download task first")
+    clear_document_artifacts(output_dir, Path(file_path).stem)
+
+    # Long PDFs are still split into page ranges that convert in parallel, with
+    # the worker's cores shared by up to MAX_PARALLEL_DOCUMENTS parse tasks
+    for _path, elapsed, error in parse_documents([file_path], output_dir,
+                                                 concurrent_documents=MAX_PARALLEL_DOCUMENTS):
+        if error:
+            raise RuntimeError(f"Failed to parse {name}: {error}")
+        _log.info(f"Parse time {elapsed:.2f}s: {Path(file_path).stem}")
+    with manifest.locked():
+        manifest.mark(name, "parse", parser_fingerprint, doc_filename=Path(file_path).stem)
+
+def load_embedding_models(images=True, concurrent_documents=1):
+    """(text model, image embedder); the embedding server's warm models when it is up.
+
+    A local CLIP model shares the cores with ``concurrent_documents`` tasks.
+    """
+    import logging
+    import requests
+    from ingestion.config import EMBEDDING_SERVER_URL, IMAGE_EMBEDDING_MODEL, TEXT_EMBEDDING_MODEL
+    from ingestion.embedding_client import EmbeddingClient
+    from ingestion.images import ClipImageEmbedder
+
+    if EMBEDDING_SERVER_URL:
+        client = EmbeddingClient()
+        try:
+            client.check_models(TEXT_EMBEDDING_MODEL, IMAGE_EMBEDDING_MODEL)
+            logging.info(f"Embedding with the server at {EMBEDDING_SERVER_URL}")
+            return client, client
+        except requests.RequestException as e:
+            logging.warning(f"Embedding server unavailable, loading the models in this task: {e}")
+
+    from sentence_transformers import SentenceTransformer
+    embedding_model = SentenceTransformer(TEXT_EMBEDDING_MODEL)
+
+    # Initialize CLIP model and processor for image embeddings; text-only runs skip it
+    image_embedder = None
+    if images:
+        from transformers import CLIPProcessor, CLIPModel
+        image_embedder = ClipImageEmbedder(
+            CLIPModel.from_pretrained(IMAGE_EMBEDDING_MODEL),
+            CLIPProcessor.from_pretrained(IMAGE_EMBEDDING_MODEL),
+            concurrent_documents=concurrent_documents
         )
-    
-        start_time = time.time()
-        conv_res = doc_converter.convert(file_path)
-        doc_filename = Path(file_path).stem
-    
-        # Save page images
-        for page_no, page in conv_res.document.pages.items():
-            page_image_filename = output_dir / f"{doc_filename}-page-{page_no}.png"
-            with page_image_filename.open("wb") as fp:
-                page.image.pil_image.save(fp, format="PNG")
-            _log.info(f"Saved page image: {page_image_filename}")
-    
-        # Save images of figures and tables
-        table_counter = 0
-        picture_counter = 0
-        for element, _level in conv_res.document.iterate_items():
-            if isinstance(element, TableItem):
-                table_counter += 1
-                table_image_filename = output_dir / f"{doc_filename}-table-{table_counter}.png"
-                with page_image_filename.open("wb") as fp:
-                    element.image.pil_image.save(fp, "PNG")
-                _log.info(f"Saved table image: {table_image_filename}")
-    
-                # Save the table as CSV and HTML
-                table_df: pd.DataFrame = element.export_to_dataframe()
-                table_csv_filename = output_dir / f"{doc_filename}-table-{table_counter}.csv"
-                table_df.to_csv(table_csv_filename)
-                table_html_filename = output_dir / f"{doc_filename}-table-{table_counter}.html"
-                with table_html_filename.open("w") as fp:
-                    fp.write(element.export_to_html())
-                _log.info(f"Saved table CSV: {table_csv_filename} and HTML: {table_html_filename}")
-    
-            if isinstance(element, PictureItem):
-                picture_counter += 1
-                picture_image_filename = output_dir / f"{doc_filename}-picture-{picture_counter}.png"
-                with picture_image_filename.open("wb") as fp:
-                    element.image.pil_image.save(fp, "PNG")
-                _log.info(f"Saved picture image: {picture_image_filename}")
-    
-        # Apply hierarchy-aware chunking for further processing
-        chunks = list(HierarchicalChunker(min_chunk_length=500, max_chunk_length=1500, split_by='paragraph', overlap=50).chunk(conv_res.document))
-    
-        # Prepare to save chunk data
-        chunk_data = []
-    
-        # Process each chunk and display metadata
-        for i, chunk in enumerate(chunks):
-            text_content = chunk.text  # Directly access 'text' attribute
-            # Convert meta information to a dictionary, or extract relevant fields to avoid serialization issues
-            meta_info = chunk.meta.dict() if hasattr(chunk.meta, "dict") else str(chunk.meta)
-    
-            # Store each chunk's content and metadata for further use
-            chunk_metadata = {
-                "document": doc_filename,
-                "chunk_id": i,
-                "text": text_content,
-                "meta": meta_info
-            }
-            chunk_data.append(chunk_metadata)
-            print(f"Chunk {i}: {chunk_metadata['text'][:100]}...")  # Preview the first 100 characters
-    
-        # Save chunks data to a JSON file for each document
-        chunks_json_filename = output_dir / f"{doc_filename}_chunks.json"
-        with chunks_json_filename.open("w") as json_fp:
-            json.dump(chunk_data, json_fp, indent=4)
-        _log.info(f"Chunks saved to JSON file: {chunks_json_filename}")
-    
-        # Export markdown with embedded images for content
-        content_md = conv_res.document.export_to_markdown(image_mode=ImageRefMode.EMBEDDED)
-        md_filename = output_dir / f"{doc_filename}-with-images.md"
-        with md_filename.open("w") as fp:
-            fp.write(content_md)
-        _log.info(f"Markdown with images saved: {md_filename}")
-    
-        end_time = time.time() - start_time
-        _log.info(f"{doc_filename} converted and figures exported in {end_time:.2f} seconds.")
-    
-    # Process each file in the list
-    for file_path in file_paths:
-        process_pdf(file_path)
-
-def process_and_upload_to_pinecone():
+    return embedding_model, image_embedder
+
+def embed_publication(name, ti=None):
     import os
-    import json
-    import glob
     import logging
-    import pandas as pd
-    from dotenv import load_dotenv
     from pathlib import Path
-    from pinecone import Pinecone, ServerlessSpec
-    from sentence_transformers import SentenceTransformer
-    from transformers import CLIPProcessor, CLIPModel
-    from PIL import Image
-    import pytesseract
-    import torch
-    import platform
+    from ingestion.artifacts import chunk_store_prefix, document_artifacts, vector_archive_prefix
+    from ingestion.chunk_store import RecordStore, VectorArchive
+    from doc_chunking import chunk_id, content_hash, tokenizer_counter
+    from ingestion.config import (
+        CHUNK_TOKENIZER,
+        EMBEDDING_SETTINGS,
+        MANIFEST_PATH,
+        PAGE_IMAGE_MODE,
+        PARSED_CONTENT_DIR
+    )
+    from ingestion.images import ImageIngestor
+    from ingestion.manifest import IngestionManifest, config_fingerprint, delete_vectors, stale_ids
+    from ingestion.page_images import PageImageRenderer
+    from ingestion.tables import TableIngestor
+    from ingestion.upload import BatchUploader, ThroughputTracker
 
 
     os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-    # Set the Tesseract path from the environment variable
+    # The Tesseract path is handed to the OCR worker processes
     tesseract_path = os.getenv("TESSERACT_PATH")
-    if tesseract_path:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-    else:
+    if not tesseract_path:
         raise EnvironmentError("TESSERACT_PATH is not set in .env")
 
     # Set up logging
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-    # Load environment variables
-    load_dotenv()
-
-    # Initialize Pinecone with environment variables
-    pinecone_api_key = os.getenv("PINECONE_API_KEY")
-    pinecone_env = "us-east-1"
-    pc = Pinecone(api_key=pinecone_api_key)
-
-    # Define Pinecone index parameters
-    index_name = "research-publications-index"
-    embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-    embedding_dimension = embedding_model.get_sentence_embedding_dimension()
-
-    # Initialize CLIP model and processor for image embeddings
-    clip_model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-    clip_processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-    clip_embedding_dim = clip_model.config.projection_dim
-
-    # Check if index exists, delete if it does
-    if index_name in pc.list_indexes().names():
-        logging.info(f"Index '{index_name}' already exists. Deleting the existing index.")
-        pc.delete_index(index_name)
-
-    # Create the Pinecone index
-    logging.info(f"Creating Pinecone index: {index_name}")
-    pc.create_index(
-        name=index_name,
-        dimension=embedding_dimension,
-        metric='cosine',
-        spec=ServerlessSpec(cloud='aws', region=pinecone_env)
-    )
+    # A new index starts empty, so every document goes in; unchanged ones from their vector archive
+    index_created = bool((ti.xcom_pull(task_ids="prepare_index") or {}).get("created")) if ti else False
 
-    # Connect to the index
-    index = pc.Index(index_name)
-    logging.info(f"Connected to Pinecone index: {index_name}")
+    # Work out whether the document needs (re-)embedding before loading any model
+    manifest = IngestionManifest(MANIFEST_PATH)
+    embedding_fingerprint = config_fingerprint(EMBEDDING_SETTINGS)
+    is_current = manifest.is_current(name, "upload", embedding_fingerprint)
+    if is_current and not index_created:
+        logging.info(f"{name} is unchanged, index is up to date.")
+        return
 
     # Path to the directory with parsed content
-    parsed_content_dir = "parsed_content"
-
-    # Function to chunk text into smaller parts if it exceeds max token length
-    def chunk_text(text, max_length=512):
-        return [text[i:i+max_length] for i in range(0, len(text), max_length)]
-
-    # Step 1: Process each JSON file containing chunked text data
-    for json_file_path in glob.glob(os.path.join(parsed_content_dir, "*_chunks.json")):
-        with open(json_file_path, 'r') as f:
-            chunks = json.load(f)
-            
-            for chunk in chunks:
-                try:
-                    # Extract text and metadata
-                    text_content = chunk['text']
-                    pdf_filename = chunk['meta']['origin']['filename']
-                    page_no = chunk['meta']['doc_items'][0]['prov'][0].get("page_no")
-                    
-                    # Chunk large text content
-                    for text_chunk in chunk_text(text_content):
-                        embedding = embedding_model.encode(text_chunk).tolist()
-                        
-                        # Metadata for each chunk
-                        metadata = {
-                            "document": chunk['document'],
-                            "chunk_id": chunk['chunk_id'],
-                            "page_no": page_no,
-                            "type": "text_chunk",
-                            "pdf_filename": pdf_filename
-                        }
-                        
-                        # Upload the chunk to Pinecone
-                        index.upsert([(f"{chunk['document']}_{chunk['chunk_id']}", embedding, metadata)])
-                        logging.info(f"Uploaded text chunk {chunk['chunk_id']} from document '{chunk['document']}'")
-                
-                except Exception as e:
-                    logging.error(f"Failed to process text chunk in {json_file_path}: {e}")
-
-    # Step 2: Embed and upload each table row with pdf_filename reference
-    for table_csv_path in glob.glob(os.path.join(parsed_content_dir, "*-table-*.csv")):
-        try:
-            doc_filename = Path(table_csv_path).stem.split('-table')[0]
-            
-            # Read the table data
-            table_data = pd.read_csv(table_csv_path)
-            
-            # Iterate over each row in the table
-            for row_idx, row in table_data.iterrows():
-                row_data = row.to_string()
-                row_embedding = embedding_model.encode(row_data).tolist()
-                
-                # Metadata for each row
-                row_metadata = {
-                    "document": doc_filename,
-                    "type": "table_row",
-                    "row_index": row_idx,
-                    "filename": os.path.basename(table_csv_path),
-                    "pdf_filename": f"{doc_filename}.pdf"
-                }
-                
-                # Upsert row data into Pinecone
-                index.upsert([(f"{doc_filename}_table_row_{row_idx}", row_embedding, row_metadata)])
-                logging.info(f"Uploaded row {row_idx} of table from '{table_csv_path}'")
-        
-        except Exception as e:
-            logging.error(f"Failed to process table file {table_csv_path}: {e}")
-
-    # Step 3: Extract text from images, embed, and upload to Pinecone
-    for image_path in glob.glob(os.path.join(parsed_content_dir, "*-page-*.png")) + glob.glob(os.path.join(parsed_content_dir, "*-picture-*.png")):
-        try:
-            doc_filename = Path(image_path).stem.split('-page')[0].split('-picture')[0]
-            
-            # Load and preprocess image for CLIP
-            image = Image.open(image_path)
-
-            # Extract text from image using OCR
-            extracted_text = pytesseract.image_to_string(image)
-            logging.info(f"Extracted text from image '{image_path}': {extracted_text[:100]}...")
-
-            # Embed extracted text using the embedding model
-            if extracted_text.strip():
-                text_embedding = embedding_model.encode(extracted_text).tolist()
-                text_metadata = {
-                    "document": doc_filename,
-                    "type": "image_text",
-                    "filename": os.path.basename(image_path),
-                    "pdf_filename": f"{doc_filename}.pdf"
+    parsed_content_dir = PARSED_CONTENT_DIR
+    doc_filename = manifest.get(name, "doc_filename")
+
+    index, _created = get_index()
+    if index is None:
+        raise RuntimeError("Pinecone index is missing, run the prepare_index task first")
+
+    # Texts are encoded in bulk and vectors upserted in batches
+    tracker = ThroughputTracker()
+    # Every vector is also kept, to archive the document's vectors once it is uploaded
+    computed = {}
+
+    def keep_vector(vector_id, values, metadata):
+        computed[vector_id] = (vector_id, values, metadata)
+
+    # Vector IDs written for the document, to clean up what a new version no longer has
+    vector_ids = {}
+    seen_content = set()
+    duplicates = 0
+
+    def add_text(stage, vector_id, text, metadata):
+        # Repeated boilerplate (running headers, disclaimers) is embedded once per document
+        nonlocal duplicates
+        digest = content_hash(text)
+        if digest in seen_content:
+            duplicates += 1
+            return
+        seen_content.add(digest)
+        vector_ids[vector_id] = None
+        uploader.add_text(stage, vector_id, text, metadata)
+
+    def add_vector(vector_id, values, metadata):
+        vector_ids[vector_id] = None
+        uploader.add_vector(vector_id, values, metadata)
+
+    # Vectors saved by an earlier upload with the same settings, e.g. when the index was recreated
+    archive = VectorArchive(vector_archive_prefix(parsed_content_dir, doc_filename))
+    restored = is_current and archive.exists()
+    if restored:
+        uploader = BatchUploader(index, None, tracker)
+        for vector_id, values, metadata in archive:
+            add_vector(vector_id, values, metadata)
+        logging.info(f"Queued {len(archive)} archived vectors of '{name}'")
+    else:
+        # Step 1: Stream the document's chunk records
+        chunk_store = RecordStore(chunk_store_prefix(parsed_content_dir, doc_filename))
+        if not chunk_store.exists():
+            raise FileNotFoundError(f"Chunk store of '{name}' is missing, run its parse task first")
+
+        # Up to MAX_PARALLEL_DOCUMENTS embed tasks share the worker's cores for CLIP and OCR
+        embedding_model, image_embedder = load_embedding_models(
+            images=PAGE_IMAGE_MODE != "off", concurrent_documents=MAX_PARALLEL_DOCUMENTS
+        )
+        embedding_dimension = embedding_model.get_sentence_embedding_dimension()
+        uploader = BatchUploader(index, embedding_model, tracker, on_vector=keep_vector)
+
+        # Chunks were sized to the embedding model's token limit when parsing
+        for chunk in chunk_store:
+            try:
+                # Metadata for each chunk
+                metadata = {
+                    "document": chunk['document'],
+                    "chunk_id": chunk['chunk_id'],
+                    "page_no": chunk['page_no'],
+                    "type": "text_chunk",
+                    "pdf_filename": chunk['pdf_filename']
                 }
-                # Upload extracted text embedding to Pinecone
-                index.upsert([(f"{doc_filename}_{Path(image_path).stem}_text", text_embedding, text_metadata)])
-                logging.info(f"Uploaded extracted text from image '{image_path}'")
-
-            # Create image embedding with CLIP
-            inputs = clip_processor(images=image, return_tensors="pt")
-            with torch.no_grad():
-                image_embedding = clip_model.get_image_features(**inputs).squeeze().tolist()
-
-            # Truncate the image embedding to match text embedding dimension
-            truncated_image_embedding = image_embedding[:embedding_dimension]
-            
-            # Image metadata
-            image_metadata = {
-                "document": doc_filename,
-                "type": "image",
-                "filename": os.path.basename(image_path),
-                "pdf_filename": f"{doc_filename}.pdf"
-            }
-            
-            # Upload image data into Pinecone
-            index.upsert([(f"{doc_filename}_{Path(image_path).stem}", truncated_image_embedding, image_metadata)])
-            logging.info(f"Uploaded image data for '{image_path}'")
-        
-        except Exception as e:
-            logging.error(f"Failed to process image file {image_path}: {e}")
-
-    logging.info("Data successfully embedded and uploaded to Pinecone.")
+
+                vector_id = chunk_id(chunk['document'], chunk['chunk_id'], chunk['text'])
+                add_text("text_chunks", vector_id, chunk['text'], metadata)
+
+            except Exception as e:
+                logging.error(f"Failed to process text chunk in {chunk_store.data_path}: {e}")
+        logging.info(f"Queued {len(chunk_store)} text chunks from '{chunk_store.data_path}'")
+
+        # Step 2: Embed each table as a whole, in row groups and, for small tables, row by row
+        table_csv_paths = document_artifacts(parsed_content_dir, doc_filename, "tables")
+        if table_csv_paths:
+            # Row groups are sized with the text model's own tokenizer
+            table_ingestor = TableIngestor(tokenizer_counter(CHUNK_TOKENIZER), tracker=tracker)
+        for table_csv_path in table_csv_paths:
+            try:
+                for stage, vector_id, text, metadata in table_ingestor.records(table_csv_path, doc_filename):
+                    add_text(stage, vector_id, text, metadata)
+
+            except Exception as e:
+                logging.error(f"Failed to process table file {table_csv_path}: {e}")
+
+        # Step 3: OCR and CLIP-embed page and picture images; unchanged images come from the cache
+        if image_embedder is not None:
+            if PAGE_IMAGE_MODE == "lazy":
+                # Only pages the text chunks do not cover are rendered, from the downloaded PDF
+                pdf_path = manifest.get(name, "local_path")
+                renderer = PageImageRenderer()
+                page_images = renderer.render_pages(pdf_path, renderer.pages_needing_images(pdf_path))
+            else:
+                page_images = document_artifacts(parsed_content_dir, doc_filename, "pages")
+            image_paths = page_images + document_artifacts(parsed_content_dir, doc_filename, "pictures")
+            with ImageIngestor(image_embedder, tracker=tracker, tesseract_path=tesseract_path,
+                               concurrent_documents=MAX_PARALLEL_DOCUMENTS) as image_ingestor:
+                for image_path, extracted_text, image_embedding in image_ingestor.process(image_paths):
+                    image_metadata = {
+                        "document": doc_filename,
+                        "filename": os.path.basename(image_path),
+                        "pdf_filename": f"{doc_filename}.pdf"
+                    }
+
+                    # Embed extracted text using the embedding model
+                    if extracted_text and extracted_text.strip():
+                        add_text("image_text", f"{doc_filename}_{Path(image_path).stem}_text", extracted_text,
+                                 {**image_metadata, "type": "image_text"})
+
+                    # Truncate the image embedding to match text embedding dimension
+                    if image_embedding is not None:
+                        add_vector(f"{doc_filename}_{Path(image_path).stem}", image_embedding[:embedding_dimension],
+                                   {**image_metadata, "type": "image"})
+            logging.info(f"Image results: {image_ingestor.stats}")
+
+    # Encode and upsert whatever is still buffered
+    uploader.flush()
+    tracker.log()
+    logging.info(f"Uploaded {uploader.uploaded} vectors, {uploader.failed} failed, {duplicates} duplicate texts skipped")
+    if uploader.failed_ids:
+        raise RuntimeError(f"Failed to upload {len(uploader.failed_ids)} vectors of {name}")
+
+    if not restored:
+        VectorArchive.write(
+            vector_archive_prefix(parsed_content_dir, doc_filename),
+            [computed[vector_id] for vector_id in vector_ids]
+        )
+
+    # New vectors are live; now drop the ones an older version left behind
+    stale = stale_ids(manifest.get(name, "vector_ids", []), vector_ids)
+    delete_vectors(index, stale)
+    with manifest.locked():
+        manifest.mark(name, "upload", embedding_fingerprint, vector_ids=list(vector_ids))
+    logging.info(f"Uploaded '{name}' ({len(vector_ids)} vectors, {len(stale)} stale deleted)")
 
 # Define the DAG
 with DAG(
@@ -366,22 +376,54 @@ with DAG(
     schedule_interval='@daily',  # Set the desired schedule interval
     start_date=datetime(2024, 11, 12),  # Change to your desired start date
     catchup=False,
+    # Runs triggered by the publication watcher queue behind a running one
+    max_active_runs=1,
+    # Each document task retries on its own; a bad PDF fails only its own task group
+    default_args={'retries': TASK_RETRIES, 'retry_delay': timedelta(minutes=2)},
     tags=['parsing', 'pineconeupload']
 ) as dag:
 
-    download_publications = PythonOperator(
-        task_id='download_publications',
-        python_callable=download_files_from_gcs
+    discover_task = PythonOperator(
+        task_id='discover_publications',
+        python_callable=discover_publications
     )
 
-    parse_task = PythonOperator(
-        task_id='parse_task',
-        python_callable=process_and_save_pdfs
+    prepare_index_task = PythonOperator(
+        task_id='prepare_index',
+        python_callable=prepare_index
     )
 
-    pineconeupload_task = PythonOperator(
-        task_id='pineconeupload_task',
-        python_callable=process_and_upload_to_pinecone
+    delete_removed_task = PythonOperator(
+        task_id='delete_removed_publications',
+        python_callable=delete_removed_publications
     )
-    # Set task dependencies
-    download_publications >> parse_task >> pineconeupload_task
\ No newline at end of file
+
+    @task_group(group_id='publication')
+    def ingest_publication(name):
+        # The three tasks of one map index depend only on each other, so
+        # documents move through download, parse and embed independently
+        download_task = PythonOperator(
+            task_id='download',
+            python_callable=download_publication,
+            op_kwargs={'name': name}
+        )
+
+        parse_task = PythonOperator(
+            task_id='parse',
+            python_callable=parse_publication,
+            op_kwargs={'name': name},
+            max_active_tis_per_dagrun=MAX_PARALLEL_DOCUMENTS
+        )
+
+        embed_task = PythonOperator(
+            task_id='embed',
+            python_callable=embed_publication,
+            op_kwargs={'name': name},
+            max_active_tis_per_dagrun=MAX_PARALLEL_DOCUMENTS
+        )
+        download_task >> parse_task >> embed_task
+
+    # Set task dependencies: one task group instance per publication in the bucket
+    publications = ingest_publication.expand(name=discover_task.output)
+    discover_task >> [prepare_index_task, delete_removed_task]
+    prepare_index_task >> publications
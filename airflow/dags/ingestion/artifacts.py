@@ -0,0 +1,39 @@
+import glob
+from pathlib import Path
+from typing import List
+
+# File name patterns written by the parse task for one document
+ARTIFACT_PATTERNS = {
+    "chunks": "{doc}_chunks.jsonl",
+    "chunk_files": "{doc}_chunks.*",
+    "vectors": "{doc}_vectors.*",
+    "tables": "{doc}-table-*.csv",
+    "table_files": "{doc}-table-*.*",
+    "pages": "{doc}-page-*.png",
+    "pictures": "{doc}-picture-*.png",
+    "markdown": "{doc}-with-images.md"
+}
+
+
+def document_artifacts(output_dir, doc_filename: str, kind: str) -> List[str]:
+    """Parsed output files of one kind (see ARTIFACT_PATTERNS) for a document"""
+    pattern = ARTIFACT_PATTERNS[kind].format(doc=glob.escape(doc_filename))
+    return sorted(glob.glob(str(Path(output_dir) / pattern)))
+
+
+def clear_document_artifacts(output_dir, doc_filename: str) -> int:
+    """Remove a document's previous parse output before it is parsed again"""
+    removed = 0
+    for kind in ("chunk_files", "vectors", "table_files", "pages", "pictures", "markdown"):
+        for path in document_artifacts(output_dir, doc_filename, kind):
+            Path(path).unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+def chunk_store_prefix(output_dir, doc_filename: str) -> Path:
+    return Path(output_dir) / f"{doc_filename}_chunks"
+
+
+def vector_archive_prefix(output_dir, doc_filename: str) -> Path:
+    return Path(output_dir) / f"{doc_filename}_vectors"
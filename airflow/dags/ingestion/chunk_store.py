@@ -0,0 +1,127 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _json_default(value):
+    # numpy scalars from pandas and docling metadata
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _replace_with(path: Path, write):
+    tmp_path = path.with_name(path.name + ".tmp")
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+class RecordStore:
+    """Line-delimited JSON records with a byte-offset index.
+
+    ``<prefix>.jsonl`` holds one compact JSON object per line and
+    ``<prefix>.offsets.npy`` the start offset of every line plus the end of
+    the file. Records can be streamed in order without loading the file,
+    or read one at a time by position through the memory-mapped offsets.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = str(prefix)
+        self.data_path = Path(f"{self.prefix}.jsonl")
+        self.offsets_path = Path(f"{self.prefix}.offsets.npy")
+        self._offsets = None
+
+    @classmethod
+    def write(cls, prefix, records: Iterable[Dict[str, Any]]) -> "RecordStore":
+        store = cls(prefix)
+        offsets = [0]
+
+        def write_data(path: Path):
+            with path.open("wb") as f:
+                for record in records:
+                    f.write(json.dumps(record, separators=(",", ":"), default=_json_default).encode("utf-8"))
+                    f.write(b"\n")
+                    offsets.append(f.tell())
+
+        def write_offsets(path: Path):
+            with path.open("wb") as f:
+                np.save(f, np.asarray(offsets, dtype=np.int64))
+
+        # Data first: an index is never left pointing into a missing file
+        _replace_with(store.data_path, write_data)
+        _replace_with(store.offsets_path, write_offsets)
+        return store
+
+    def exists(self) -> bool:
+        return self.data_path.exists() and self.offsets_path.exists()
+
+    @property
+    def offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._offsets = np.load(self.offsets_path, mmap_mode="r")
+        return self._offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        with self.data_path.open("rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(f"record {position} out of range for {self.data_path}")
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        with self.data_path.open("rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start))
+
+
+class VectorArchive:
+    """Vectors of one document kept on disk next to its parsed chunks.
+
+    ``<prefix>.npy`` is a float32 matrix with one row per vector, loaded
+    memory-mapped. The matching ``RecordStore`` at ``<prefix>`` holds the
+    ID and metadata of each row. Uploading the archive to a new index or
+    backend reuses the vectors instead of recomputing them.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = str(prefix)
+        self.matrix_path = Path(f"{self.prefix}.npy")
+        self.records = RecordStore(prefix)
+
+    @classmethod
+    def write(cls, prefix, vectors: Sequence[Tuple[str, Sequence[float], Dict[str, Any]]]) -> "VectorArchive":
+        archive = cls(prefix)
+        if vectors:
+            matrix = np.asarray([values for _, values, _ in vectors], dtype=np.float32)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+
+        def write_matrix(path: Path):
+            with path.open("wb") as f:
+                np.save(f, matrix)
+
+        # The records are written last, so they only exist once the matrix is complete
+        archive.records.data_path.unlink(missing_ok=True)
+        _replace_with(archive.matrix_path, write_matrix)
+        RecordStore.write(prefix, ({"id": vector_id, "metadata": metadata} for vector_id, _, metadata in vectors))
+        return archive
+
+    def exists(self) -> bool:
+        return self.matrix_path.exists() and self.records.exists()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[Tuple[str, List[float], Dict[str, Any]]]:
+        matrix = np.load(self.matrix_path, mmap_mode="r")
+        for row, record in zip(matrix, self.records):
+            yield record["id"], row.tolist(), record["metadata"]
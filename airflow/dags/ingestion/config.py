@@ -0,0 +1,116 @@
+import os
+
+# Working data of the pipeline (download cache, manifest, checkpoints)
+DATA_DIR = os.getenv("INGEST_DATA_DIR", os.path.join(os.getenv("AIRFLOW_HOME", os.getcwd()), "ingestion_data"))
+
+# Sentences per SentenceTransformer.encode forward pass
+EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", 64))
+# Texts collected before they are encoded together
+ENCODE_BUFFER_SIZE = int(os.getenv("INGEST_ENCODE_BUFFER_SIZE", 1024))
+# Vectors per Pinecone upsert request
+UPSERT_BATCH_SIZE = int(os.getenv("INGEST_UPSERT_BATCH_SIZE", 100))
+
+# Publications are discovered by listing the bucket under this prefix
+GCS_PREFIX = os.getenv("INGEST_GCS_PREFIX", "cfai_publications/")
+# How often the watcher lists the bucket for new or changed publications
+WATCH_INTERVAL_MINUTES = float(os.getenv("INGEST_WATCH_INTERVAL_MINUTES", 2))
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "research-publications-index")
+PINECONE_REGION = os.getenv("PINECONE_REGION", "us-east-1")
+# Mapped per-document tasks: attempts per document and how many parse or embed at once
+TASK_RETRIES = int(os.getenv("INGEST_TASK_RETRIES", 2))
+MAX_PARALLEL_DOCUMENTS = int(os.getenv("INGEST_MAX_PARALLEL_DOCUMENTS", 4))
+
+# Per-document record of finished stages, shared by the DAG tasks
+MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", os.path.join(DATA_DIR, "manifest.json"))
+
+# Object versions the watcher has already handed to an ingestion run
+WATCH_STATE_PATH = os.getenv("INGEST_WATCH_STATE_PATH", os.path.join(DATA_DIR, "watch_state.json"))
+
+# Local copies of GCS objects, fetched concurrently; large objects in byte ranges
+DOWNLOAD_CACHE_DIR = os.getenv("INGEST_DOWNLOAD_CACHE_DIR", os.path.join(DATA_DIR, "gcs_cache"))
+DOWNLOAD_WORKERS = int(os.getenv("INGEST_DOWNLOAD_WORKERS", 8))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("INGEST_DOWNLOAD_CHUNK_SIZE", 16 * 1024 * 1024))
+RANGED_DOWNLOAD_THRESHOLD = int(os.getenv("INGEST_RANGED_DOWNLOAD_THRESHOLD", 64 * 1024 * 1024))
+
+# Settings that change parse output; editing them reparses every document
+IMAGE_RESOLUTION_SCALE = float(os.getenv("INGEST_IMAGE_RESOLUTION_SCALE", 2.0))
+# Longer PDFs are converted as concurrent page ranges of this size
+PARSE_PAGES_PER_RANGE = int(os.getenv("INGEST_PARSE_PAGES_PER_RANGE", 50))
+# "eager" writes a PNG of every page while parsing, "lazy" renders at embed time
+# only the pages the text layer does not cover, "off" skips all rasterization
+PAGE_IMAGE_MODE = os.getenv("INGEST_PAGE_IMAGE_MODE", "lazy")
+if PAGE_IMAGE_MODE not in ("eager", "lazy", "off"):
+    raise ValueError(f"INGEST_PAGE_IMAGE_MODE must be eager, lazy or off, not '{PAGE_IMAGE_MODE}'")
+# Chunks are packed up to this many tokens of the text embedding model's tokenizer;
+# all-MiniLM-L6-v2 reads 256 tokens, two of which are special tokens
+CHUNK_MAX_TOKENS = int(os.getenv("INGEST_CHUNK_MAX_TOKENS", 254))
+CHUNK_TOKENIZER = os.getenv("INGEST_CHUNK_TOKENIZER", "sentence-transformers/all-MiniLM-L6-v2")
+PARSER_SETTINGS = {
+    "parser": "docling",
+    "images_scale": IMAGE_RESOLUTION_SCALE,
+    "page_images": PAGE_IMAGE_MODE == "eager",
+    "table_images": PAGE_IMAGE_MODE != "off",
+    "picture_images": PAGE_IMAGE_MODE != "off",
+    "pages_per_range": PARSE_PAGES_PER_RANGE,
+    "chunk_format": "jsonl-v1",
+    "chunker": {"strategy": "structural", "max_tokens": CHUNK_MAX_TOKENS, "tokenizer": CHUNK_TOKENIZER}
+}
+
+# Parser worker processes per machine, divided between concurrent parse tasks;
+# each holds its own docling models in memory
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", min(4, os.cpu_count() or 1)))
+# Markdown, chunks, tables and images written by the parse task, read back by the embed task
+PARSED_CONTENT_DIR = os.getenv("INGEST_PARSED_CONTENT_DIR", os.path.join(DATA_DIR, "parsed_content"))
+# Converted page ranges are kept here until their document is fully parsed
+PARSE_CHECKPOINT_DIR = os.getenv("INGEST_PARSE_CHECKPOINT_DIR", os.path.join(DATA_DIR, "parse_checkpoints"))
+
+# Lazily rendered page images: scale, compact format and where they are cached
+PAGE_IMAGE_SCALE = float(os.getenv("INGEST_PAGE_IMAGE_SCALE", IMAGE_RESOLUTION_SCALE))
+PAGE_IMAGE_FORMAT = os.getenv("INGEST_PAGE_IMAGE_FORMAT", "webp")
+PAGE_IMAGE_QUALITY = int(os.getenv("INGEST_PAGE_IMAGE_QUALITY", 85))
+PAGE_IMAGE_CACHE_DIR = os.getenv("INGEST_PAGE_IMAGE_CACHE_DIR", os.path.join(DATA_DIR, "page_images"))
+# Lazy mode only renders pages with embedded images or less text than this;
+# the text of the other pages is already in their chunks
+PAGE_IMAGE_MIN_TEXT_CHARS = int(os.getenv("INGEST_PAGE_IMAGE_MIN_TEXT_CHARS", 200))
+
+# Image ingestion: Tesseract worker processes, CLIP batch size and torch threads per
+# machine; concurrent embed tasks divide the workers and threads between them
+OCR_WORKERS = int(os.getenv("INGEST_OCR_WORKERS", os.cpu_count() or 1))
+CLIP_BATCH_SIZE = int(os.getenv("INGEST_CLIP_BATCH_SIZE", 32))
+CLIP_THREADS = int(os.getenv("INGEST_CLIP_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+# OCR text and image embeddings keyed by image hash
+IMAGE_CACHE_PATH = os.getenv("INGEST_IMAGE_CACHE_PATH", os.path.join(DATA_DIR, "image_cache.sqlite3"))
+
+# Tables of up to this many rows also get one vector per row; every table gets a
+# table-level vector and, when it does not fit in one, row groups of CHUNK_MAX_TOKENS tokens
+TABLE_ROW_VECTOR_LIMIT = int(os.getenv("INGEST_TABLE_ROW_VECTOR_LIMIT", 50))
+
+# Embedding server holding the models warm between tasks; unset, each task loads its own
+EMBEDDING_SERVER_URL = os.getenv("INGEST_EMBEDDING_SERVER_URL", "")
+EMBEDDING_SERVER_TIMEOUT = float(os.getenv("INGEST_EMBEDDING_SERVER_TIMEOUT", 300))
+EMBEDDING_SERVER_HOST = os.getenv("EMBEDDING_SERVER_HOST", "0.0.0.0")
+EMBEDDING_SERVER_PORT = int(os.getenv("EMBEDDING_SERVER_PORT", 8100))
+# Torch threads per forward pass, and how requests from many callers are merged
+EMBEDDING_SERVER_THREADS = int(os.getenv("EMBEDDING_SERVER_THREADS", max(1, (os.cpu_count() or 2) // 2)))
+EMBEDDING_SERVER_MAX_BATCH = int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", 256))
+EMBEDDING_SERVER_MAX_WAIT_MS = float(os.getenv("EMBEDDING_SERVER_MAX_WAIT_MS", 10))
+
+# Settings that change the vectors; editing them re-embeds every document
+TEXT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+IMAGE_EMBEDDING_MODEL = "openai/clip-vit-base-patch32"
+EMBEDDING_SETTINGS = {
+    "text_model": TEXT_EMBEDDING_MODEL,
+    "image_model": IMAGE_EMBEDDING_MODEL,
+    "page_images": {
+        "mode": PAGE_IMAGE_MODE,
+        "scale": PAGE_IMAGE_SCALE if PAGE_IMAGE_MODE == "lazy" else IMAGE_RESOLUTION_SCALE,
+        "format": PAGE_IMAGE_FORMAT if PAGE_IMAGE_MODE == "lazy" else "png",
+        "min_text_chars": PAGE_IMAGE_MIN_TEXT_CHARS if PAGE_IMAGE_MODE == "lazy" else None
+    },
+    "tables": {
+        "serialization": "column-value-v2",
+        "max_tokens": CHUNK_MAX_TOKENS,
+        "row_vector_limit": TABLE_ROW_VECTOR_LIMIT
+    },
+    "vector_ids": "content-hash-v1"
+}
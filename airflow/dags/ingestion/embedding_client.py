@@ -0,0 +1,83 @@
+import base64
+import logging
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import requests
+
+from .config import EMBEDDING_SERVER_TIMEOUT, EMBEDDING_SERVER_URL
+
+logger = logging.getLogger(__name__)
+
+
+def encode_matrix(matrix: np.ndarray) -> dict:
+    """Ship vectors as base64 float32 instead of JSON numbers"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return {"shape": list(matrix.shape), "data": base64.b64encode(matrix.tobytes()).decode("ascii")}
+
+
+def decode_matrix(payload: dict) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+
+class EmbeddingClient:
+    """Client of the embedding server, usable wherever the local models were.
+
+    ``encode`` and ``get_sentence_embedding_dimension`` match the parts of
+    ``SentenceTransformer`` the uploader uses. ``embed_images`` matches
+    ``ClipImageEmbedder``. Large inputs are sent in parts of
+    ``request_size`` items.
+    """
+
+    def __init__(self, url: str = EMBEDDING_SERVER_URL, timeout: float = EMBEDDING_SERVER_TIMEOUT,
+                 request_size: int = 256):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.request_size = request_size
+        self.session = requests.Session()
+        self._info: Optional[Dict] = None
+
+    def info(self) -> Dict:
+        if self._info is None:
+            response = self.session.get(f"{self.url}/health", timeout=self.timeout)
+            response.raise_for_status()
+            self._info = response.json()
+        return self._info
+
+    def check_models(self, text_model: str, image_model: str):
+        """Refuse a server whose models differ from the ones the index was built with"""
+        info = self.info()
+        if info["text_model"] != text_model or info["image_model"] != image_model:
+            raise RuntimeError(
+                f"Embedding server at {self.url} serves {info['text_model']} and {info['image_model']}, "
+                f"expected {text_model} and {image_model}"
+            )
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.info()["text_dimension"]
+
+    def encode(self, texts: Sequence[str], batch_size: int = None, show_progress_bar: bool = False,
+               **kwargs) -> np.ndarray:
+        # batch_size is chosen by the server, which batches across callers
+        return self._post_all("/embed/text", "texts", list(texts), self.get_sentence_embedding_dimension())
+
+    def embed_images(self, paths: List[str]) -> np.ndarray:
+        images = []
+        for path in paths:
+            with open(path, "rb") as f:
+                images.append(base64.b64encode(f.read()).decode("ascii"))
+        return self._post_all("/embed/image", "images", images, self.info()["image_dimension"])
+
+    def _post_all(self, endpoint: str, field: str, items: list, dimension: int) -> np.ndarray:
+        parts = []
+        for start in range(0, len(items), self.request_size):
+            response = self.session.post(
+                f"{self.url}{endpoint}",
+                json={field: items[start:start + self.request_size]},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            parts.append(decode_matrix(response.json()))
+        if not parts:
+            return np.zeros((0, dimension), dtype=np.float32)
+        return np.concatenate(parts)
@@ -0,0 +1,223 @@
+"""Long-lived embedding service for the ingestion tasks.
+
+Loading the sentence-transformers and CLIP models takes tens of seconds,
+so this process loads them once and keeps them warm. DAG tasks send it
+texts and images over HTTP through ``EmbeddingClient``. Run it with::
+
+    python -m ingestion.embedding_server
+
+from the ``dags`` directory. ``docker-compose.yaml`` starts it as the
+``embedding-server`` service.
+"""
+import asyncio
+import base64
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
+
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from .config import (
+    EMBED_BATCH_SIZE,
+    EMBEDDING_SERVER_HOST,
+    EMBEDDING_SERVER_MAX_BATCH,
+    EMBEDDING_SERVER_MAX_WAIT_MS,
+    EMBEDDING_SERVER_PORT,
+    EMBEDDING_SERVER_THREADS,
+    IMAGE_EMBEDDING_MODEL,
+    TEXT_EMBEDDING_MODEL
+)
+from .embedding_client import encode_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Merge concurrent requests into shared model calls.
+
+    Requests are queued. The worker takes the first one, then waits up to
+    ``max_wait`` seconds for others until ``max_batch`` items are queued,
+    and runs them through ``fn`` in one call on ``executor``. Each caller
+    gets back the rows for its own items. Batches run one at a time, so a
+    model never has two forward passes competing for the same cores.
+    """
+
+    def __init__(self, fn: Callable[[list], np.ndarray], executor: ThreadPoolExecutor,
+                 max_batch: int = EMBEDDING_SERVER_MAX_BATCH,
+                 max_wait: float = EMBEDDING_SERVER_MAX_WAIT_MS / 1000):
+        self.fn = fn
+        self.executor = executor
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+
+    async def submit(self, items: list) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((items, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self._queue.get()]
+            size = len(requests[0][0])
+            deadline = loop.time() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                requests.append(request)
+                size += len(request[0])
+
+            items = [item for request_items, _ in requests for item in request_items]
+            try:
+                matrix = await loop.run_in_executor(self.executor, self.fn, items)
+            except Exception as e:
+                logger.error(f"Embedding batch of {len(items)} items failed: {e}")
+                for _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(items)
+            start = 0
+            for request_items, future in requests:
+                if not future.done():
+                    future.set_result(matrix[start:start + len(request_items)])
+                start += len(request_items)
+
+
+class TextRequest(BaseModel):
+    texts: List[str]
+
+
+class ImageRequest(BaseModel):
+    images: List[str]  # base64-encoded image files
+
+
+class EmbeddingService:
+    """Warm models plus one batcher per model, sharing a capped thread pool"""
+
+    def __init__(self, threads: int = EMBEDDING_SERVER_THREADS):
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="embed")
+        self.text_model = None
+        self.clip_model = None
+        self.clip_processor = None
+        self.text_batcher = MicroBatcher(self._encode_texts, self.executor)
+        self.image_batcher = MicroBatcher(self._encode_images, self.executor)
+
+    def load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from transformers import CLIPModel, CLIPProcessor
+
+        # The two batchers share the cores; each forward pass gets this many threads
+        torch.set_num_threads(self.threads)
+        start = time.perf_counter()
+        self.text_model = SentenceTransformer(TEXT_EMBEDDING_MODEL)
+        self.clip_model = CLIPModel.from_pretrained(IMAGE_EMBEDDING_MODEL)
+        self.clip_model.eval()
+        self.clip_processor = CLIPProcessor.from_pretrained(IMAGE_EMBEDDING_MODEL)
+        # A first forward pass so the first real request does not pay for lazy initialization
+        self.text_model.encode(["warm up"], show_progress_bar=False)
+        logger.info(f"Embedding models loaded in {time.perf_counter() - start:.1f}s")
+
+    def info(self) -> dict:
+        return {
+            "text_model": TEXT_EMBEDDING_MODEL,
+            "text_dimension": self.text_model.get_sentence_embedding_dimension(),
+            "image_model": IMAGE_EMBEDDING_MODEL,
+            "image_dimension": self.clip_model.config.projection_dim,
+            "threads": self.threads,
+            "text_batches": self.text_batcher.batches,
+            "texts": self.text_batcher.items,
+            "image_batches": self.image_batcher.batches,
+            "images": self.image_batcher.items
+        }
+
+    def _encode_texts(self, texts: List[str]) -> np.ndarray:
+        return self.text_model.encode(texts, batch_size=EMBED_BATCH_SIZE, show_progress_bar=False,
+                                      convert_to_numpy=True)
+
+    def _encode_images(self, images: List[bytes]) -> np.ndarray:
+        import torch
+        from PIL import Image
+
+        pil_images = [Image.open(io.BytesIO(data)).convert("RGB") for data in images]
+        inputs = self.clip_processor(images=pil_images, return_tensors="pt")
+        with torch.no_grad():
+            return self.clip_model.get_image_features(**inputs).cpu().numpy()
+
+
+def create_app(service: EmbeddingService = None) -> FastAPI:
+    service = service or EmbeddingService()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if service.text_model is None:
+            service.load()
+        service.text_batcher.start()
+        service.image_batcher.start()
+        yield
+        await service.text_batcher.stop()
+        await service.image_batcher.stop()
+        service.executor.shutdown(wait=False)
+
+    app = FastAPI(title="Ingestion embedding server", lifespan=lifespan)
+
+    @app.get("/health")
+    async def health():
+        return service.info()
+
+    @app.post("/embed/text")
+    async def embed_text(request: TextRequest):
+        if not request.texts:
+            return encode_matrix(np.zeros((0, service.info()["text_dimension"])))
+        try:
+            return encode_matrix(await service.text_batcher.submit(request.texts))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Text embedding failed: {str(e)}")
+
+    @app.post("/embed/image")
+    async def embed_image(request: ImageRequest):
+        if not request.images:
+            return encode_matrix(np.zeros((0, service.info()["image_dimension"])))
+        try:
+            images = [base64.b64decode(image, validate=True) for image in request.images]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid base64 image: {str(e)}")
+        try:
+            return encode_matrix(await service.image_batcher.submit(images))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Image embedding failed: {str(e)}")
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # One process: the models are loaded once and shared by every request
+    uvicorn.run(create_app(), host=EMBEDDING_SERVER_HOST, port=EMBEDDING_SERVER_PORT, workers=1)
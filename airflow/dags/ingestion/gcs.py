@@ -0,0 +1,26 @@
+import os
+from typing import List
+
+from .config import GCS_PREFIX
+
+
+def get_bucket():
+    from google.cloud import storage
+
+    # Fetch bucket name from environment variable
+    bucket_name = os.getenv("GCS_BUCKET_NAME")
+
+    # Check if bucket name is loaded correctly
+    if not bucket_name:
+        raise ValueError("Bucket name not found. Ensure GCS_BUCKET_NAME is set in .env file.")
+
+    return storage.Client().bucket(bucket_name)
+
+
+def list_publications(bucket, prefix: str = GCS_PREFIX) -> List:
+    """Blobs of every PDF under ``prefix``; a listing only reads object metadata"""
+    return [blob for blob in bucket.list_blobs(prefix=prefix) if blob.name.lower().endswith(".pdf")]
+
+
+def object_info(blob) -> dict:
+    return {"generation": blob.generation, "md5_hash": blob.md5_hash, "size": blob.size}
@@ -0,0 +1,239 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import CLIP_BATCH_SIZE, CLIP_THREADS, IMAGE_CACHE_PATH, IMAGE_EMBEDDING_MODEL, OCR_WORKERS
+
+logger = logging.getLogger(__name__)
+
+OCR_KIND = "ocr:tesseract"
+CLIP_KIND = f"clip:{IMAGE_EMBEDDING_MODEL}"
+
+
+def image_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class ImageResultCache:
+    """SQLite store of OCR text and image embeddings keyed by image content.
+
+    Keys are the SHA-256 of the image bytes plus a result kind that names
+    the engine or model. A re-rendered but identical image therefore hits,
+    and switching models misses.
+    """
+
+    def __init__(self, path: str = IMAGE_CACHE_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS image_results ("
+            "digest TEXT NOT NULL, kind TEXT NOT NULL, text TEXT, vector BLOB, "
+            "PRIMARY KEY (digest, kind))"
+        )
+        self._db.commit()
+
+    def get_texts(self, digests: List[str]) -> Dict[str, str]:
+        rows = self._select(OCR_KIND, digests, "text")
+        return {digest: text for digest, text in rows}
+
+    def get_vectors(self, kind: str, digests: List[str]) -> Dict[str, List[float]]:
+        rows = self._select(kind, digests, "vector")
+        return {digest: np.frombuffer(blob, dtype=np.float32).tolist() for digest, blob in rows}
+
+    def put_text(self, digest: str, text: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO image_results (digest, kind, text) VALUES (?, ?, ?)",
+                (digest, OCR_KIND, text)
+            )
+            self._db.commit()
+
+    def put_vectors(self, kind: str, vectors: Dict[str, List[float]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO image_results (digest, kind, vector) VALUES (?, ?, ?)",
+                [(digest, kind, np.asarray(v, dtype=np.float32).tobytes()) for digest, v in vectors.items()]
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+    def _select(self, kind: str, digests: List[str], column: str):
+        rows = []
+        with self._lock:
+            for start in range(0, len(digests), 500):
+                part = digests[start:start + 500]
+                rows.extend(self._db.execute(
+                    f"SELECT digest, {column} FROM image_results "
+                    f"WHERE kind = ? AND digest IN ({','.join('?' * len(part))})",
+                    [kind, *part]
+                ).fetchall())
+        return rows
+
+
+def _init_ocr_worker(tesseract_path: Optional[str]):
+    import pytesseract
+    if tesseract_path:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+
+def ocr_image(path: str) -> str:
+    import pytesseract
+    from PIL import Image
+
+    with Image.open(path) as image:
+        return pytesseract.image_to_string(image)
+
+
+class ClipImageEmbedder:
+    """CLIP image features in this process, under ``torch.no_grad()``.
+
+    ``threads`` is divided between the ``concurrent_documents`` embed tasks
+    that may run CLIP on this machine at once.
+    """
+
+    def __init__(self, clip_model, clip_processor, threads: int = CLIP_THREADS,
+                 concurrent_documents: int = 1):
+        self.clip_model = clip_model
+        self.clip_processor = clip_processor
+        self.threads = max(1, threads // max(1, concurrent_documents))
+
+    def embed_images(self, paths: List[str]) -> np.ndarray:
+        import torch
+        from PIL import Image
+
+        torch.set_num_threads(self.threads)
+        images = []
+        for path in paths:
+            with Image.open(path) as image:
+                images.append(image.convert("RGB"))
+        inputs = self.clip_processor(images=images, return_tensors="pt")
+        with torch.no_grad():
+            return self.clip_model.get_image_features(**inputs).cpu().numpy()
+
+
+class ImageIngestor:
+    """OCR and CLIP-embed images, reusing cached results by image hash.
+
+    OCR runs on a pool of ``ocr_workers`` processes, because Tesseract is
+    CPU bound and single threaded per image. While the pool works,
+    ``image_embedder`` (a ``ClipImageEmbedder`` or an ``EmbeddingClient``)
+    embeds the images ``clip_batch_size`` at a time. The OCR workers are
+    divided between the ``concurrent_documents`` ingestors that may run on
+    this machine at once, e.g. one per mapped embed task. Use it as a
+    context manager so the pool is shut down.
+    """
+
+    def __init__(self, image_embedder, cache: ImageResultCache = None, tracker=None,
+                 ocr_workers: int = OCR_WORKERS, clip_batch_size: int = CLIP_BATCH_SIZE,
+                 tesseract_path: Optional[str] = None, concurrent_documents: int = 1):
+        self.image_embedder = image_embedder
+        self.cache = cache or ImageResultCache()
+        self.tracker = tracker
+        self.clip_batch_size = clip_batch_size
+        self.ocr_workers = max(1, ocr_workers // max(1, concurrent_documents))
+        self.tesseract_path = tesseract_path
+        self.stats = {"ocr_cached": 0, "ocr_run": 0, "clip_cached": 0, "clip_run": 0}
+        self._pool = self._start_pool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.ocr_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_ocr_worker,
+            initargs=(self.tesseract_path,)
+        )
+
+    def process(self, image_paths: List[str]) -> Iterator[Tuple[str, Optional[str], Optional[List[float]]]]:
+        """Yield ``(path, ocr_text, clip_embedding)`` for each image in order.
+
+        A value is None when that step failed for the image. The failure is
+        logged.
+        """
+        digests = {}
+        for path in image_paths:
+            try:
+                digests[path] = image_digest(path)
+            except OSError as e:
+                logger.error(f"Failed to read image {path}: {e}")
+        unique = list(dict.fromkeys(digests.values()))
+
+        texts = self.cache.get_texts(unique)
+        self.stats["ocr_cached"] += len(texts)
+        ocr_paths = {}
+        for path, digest in digests.items():
+            if digest not in texts:
+                ocr_paths.setdefault(digest, path)
+        try:
+            ocr_futures = {digest: self._pool.submit(ocr_image, path) for digest, path in ocr_paths.items()}
+        except BrokenProcessPool:
+            # A crashed worker (e.g. Tesseract killed on a huge image) breaks the whole pool
+            logger.warning("OCR pool is broken, restarting it")
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._start_pool()
+            ocr_futures = {digest: self._pool.submit(ocr_image, path) for digest, path in ocr_paths.items()}
+
+        vectors = self.cache.get_vectors(CLIP_KIND, unique)
+        self.stats["clip_cached"] += len(vectors)
+        clip_paths = {}
+        for path, digest in digests.items():
+            if digest not in vectors:
+                clip_paths.setdefault(digest, path)
+        vectors.update(self._embed(clip_paths))
+
+        # Time spent waiting on OCR after CLIP is done; near zero when the two overlap fully
+        self._track("ocr wait", len(ocr_futures), lambda: wait(ocr_futures.values()))
+        for digest, future in ocr_futures.items():
+            try:
+                texts[digest] = future.result()
+                self.cache.put_text(digest, texts[digest])
+                self.stats["ocr_run"] += 1
+            except Exception as e:
+                logger.error(f"OCR failed for {ocr_paths[digest]}: {e}")
+
+        for path in image_paths:
+            digest = digests.get(path)
+            yield path, texts.get(digest), vectors.get(digest)
+
+    def _embed(self, paths_by_digest: Dict[str, str]) -> Dict[str, List[float]]:
+        vectors = {}
+        items = list(paths_by_digest.items())
+        for start in range(0, len(items), self.clip_batch_size):
+            batch = items[start:start + self.clip_batch_size]
+            try:
+                features = self._track("clip", len(batch),
+                                       lambda: self.image_embedder.embed_images([path for _, path in batch]))
+            except Exception as e:
+                logger.error(f"CLIP failed for a batch of {len(batch)} images: {e}")
+                continue
+            embedded = {digest: row.tolist() for (digest, _), row in zip(batch, features)}
+            self.cache.put_vectors(CLIP_KIND, embedded)
+            vectors.update(embedded)
+            self.stats["clip_run"] += len(batch)
+        return vectors
+
+    def _track(self, stage: str, items: int, fn):
+        if self.tracker is None:
+            return fn()
+        with self.tracker.track(stage, items):
+            return fn()
@@ -0,0 +1,143 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in order; redoing a stage invalidates the ones after it
+STAGES = ("download", "parse", "upload")
+
+
+def config_fingerprint(settings: Dict[str, Any]) -> str:
+    """Stable hash of the settings that shape a stage's output"""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def source_signature(info: Dict[str, Any]) -> str:
+    """Identify one version of a GCS object by generation and MD5"""
+    return f"{info.get('generation')}:{info.get('md5_hash')}"
+
+
+class IngestionManifest:
+    """Per-document record of what each ingestion stage has already done.
+
+    Each document entry is keyed by its GCS object name. For every finished
+    stage it stores the source signature and the config fingerprint the
+    stage ran with. A stage is current when both still match, so unchanged
+    documents are skipped and a config change only reruns the affected
+    stages. Entries also keep ``vector_ids``, so the vectors of a changed or
+    removed document can be deleted by ID. Serverless indexes cannot delete
+    by metadata filter.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.reload()
+
+    def reload(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.documents = json.load(f).get("documents", {})
+
+    @contextmanager
+    def locked(self):
+        """Reload, apply the caller's changes and save under an exclusive lock.
+
+        Per-document tasks run concurrently and each saves the whole file.
+        Without the lock, one task's save would drop another's changes.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.reload()
+                yield self
+                self.save()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def sync(self, objects: Dict[str, Dict[str, Any]]) -> Dict[str, List[str]]:
+        """Record the current bucket listing.
+
+        Returns the names that are new, changed, unchanged or removed.
+        Removed documents stay in the manifest, flagged ``removed``, until
+        their vectors are deleted.
+        """
+        changes = {"new": [], "changed": [], "unchanged": [], "removed": []}
+        for name, info in objects.items():
+            entry = self.documents.get(name)
+            signature = source_signature(info)
+            if entry is None:
+                changes["new"].append(name)
+                self.documents[name] = {"source": signature, "stages": {}, "vector_ids": []}
+            elif entry["source"] != signature or entry.get("removed"):
+                changes["changed"].append(name)
+                entry.update(source=signature, removed=False)
+            else:
+                changes["unchanged"].append(name)
+            self.documents[name].update(
+                generation=info.get("generation"),
+                md5_hash=info.get("md5_hash"),
+                size=info.get("size")
+            )
+        for name, entry in self.documents.items():
+            if name not in objects and not entry.get("removed"):
+                entry["removed"] = True
+                changes["removed"].append(name)
+        return changes
+
+    def is_current(self, name: str, stage: str, fingerprint: str) -> bool:
+        entry = self.documents.get(name)
+        if entry is None or entry.get("removed"):
+            return False
+        done = entry["stages"].get(stage)
+        return bool(done) and done["source"] == entry["source"] and done["config"] == fingerprint
+
+    def pending(self, stage: str, fingerprint: str) -> List[str]:
+        return [
+            name for name, entry in self.documents.items()
+            if not entry.get("removed") and not self.is_current(name, stage, fingerprint)
+        ]
+
+    def removed(self) -> List[str]:
+        return [name for name, entry in self.documents.items() if entry.get("removed")]
+
+    def mark(self, name: str, stage: str, fingerprint: str, **info):
+        entry = self.documents[name]
+        for later in STAGES[STAGES.index(stage) + 1:]:
+            entry["stages"].pop(later, None)
+        entry["stages"][stage] = {"source": entry["source"], "config": fingerprint}
+        entry.update(info)
+
+    def get(self, name: str, key: str, default: Any = None) -> Any:
+        return self.documents.get(name, {}).get(key, default)
+
+    def forget(self, name: str):
+        self.documents.pop(name, None)
+
+    def save(self):
+        """Write atomically so a crashed task never leaves a torn manifest"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"documents": self.documents}, f)
+        os.replace(tmp_path, self.path)
+
+
+def stale_ids(previous: Iterable[str], current: Iterable[str]) -> List[str]:
+    """IDs from an earlier upload that the new upload did not overwrite"""
+    current = set(current)
+    return [vector_id for vector_id in previous if vector_id not in current]
+
+
+def delete_vectors(index, ids: List[str], batch_size: int = 1000, namespace: Optional[str] = None):
+    for start in range(0, len(ids), batch_size):
+        kwargs = {"namespace": namespace} if namespace else {}
+        index.delete(ids=ids[start:start + batch_size], **kwargs)
@@ -0,0 +1,130 @@
+import glob
+import hashlib
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from .config import (
+    PAGE_IMAGE_CACHE_DIR,
+    PAGE_IMAGE_FORMAT,
+    PAGE_IMAGE_MIN_TEXT_CHARS,
+    PAGE_IMAGE_QUALITY,
+    PAGE_IMAGE_SCALE
+)
+
+logger = logging.getLogger(__name__)
+
+# File extension and Pillow format name of each supported output format
+IMAGE_FORMATS = {
+    "webp": ("webp", "WEBP"),
+    "jpeg": ("jpg", "JPEG"),
+    "jpg": ("jpg", "JPEG"),
+    "png": ("png", "PNG")
+}
+
+
+class PageImageRenderer:
+    """Render PDF pages to images on demand, with an on-disk cache.
+
+    The parse task no longer has to rasterize every page. Pages are
+    rendered with PyMuPDF only when the image pipeline or an export asks
+    for them, and the image pipeline only asks for ``pages_needing_images``:
+    pages whose text layer does not already cover them. They are rendered at the requested scale and saved in a
+    compact format (WebP by default). A rendered page lives under
+    ``<cache_dir>/<doc>-<key>/<scale>x-q<quality>/<doc>-page-<n>.<ext>``.
+    The key covers the file's size and mtime, so a new version of the PDF
+    never hits a stale image, and its renders replace the older version's.
+    """
+
+    def __init__(self, cache_dir: str = PAGE_IMAGE_CACHE_DIR, scale: float = PAGE_IMAGE_SCALE,
+                 image_format: str = PAGE_IMAGE_FORMAT, quality: int = PAGE_IMAGE_QUALITY):
+        if image_format.lower() not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported page image format '{image_format}', use one of {sorted(IMAGE_FORMATS)}")
+        self.cache_dir = Path(cache_dir)
+        self.scale = scale
+        self.image_format = image_format.lower()
+        self.quality = quality
+
+    def render_pages(self, pdf_path: str, pages: Optional[Iterable[int]] = None,
+                     scale: Optional[float] = None) -> List[str]:
+        """Paths of the rendered 1-based ``pages`` (all pages by default), in order.
+
+        Cached pages are returned without opening the PDF.
+        """
+        import fitz
+
+        scale = scale or self.scale
+        target_dir = self._dir_for(pdf_path, scale)
+        extension, _ = IMAGE_FORMATS[self.image_format]
+        stem = Path(pdf_path).stem
+
+        def page_path(page_no: int) -> Path:
+            return target_dir / f"{stem}-page-{page_no}.{extension}"
+
+        if pages is not None:
+            pages = list(pages)
+            if all(page_path(page_no).exists() for page_no in pages):
+                return [str(page_path(page_no)) for page_no in pages]
+
+        if not target_dir.exists():
+            self._prune_versions(pdf_path, target_dir.parent)
+            target_dir.mkdir(parents=True, exist_ok=True)
+
+        rendered = 0
+        paths = []
+        with fitz.open(pdf_path) as pdf:
+            page_numbers = pages if pages is not None else range(1, pdf.page_count + 1)
+            for page_no in page_numbers:
+                path = page_path(page_no)
+                if not path.exists():
+                    self._render(pdf[page_no - 1], scale, path)
+                    rendered += 1
+                paths.append(str(path))
+        if rendered:
+            logger.info(f"Rendered {rendered} pages of {Path(pdf_path).name} at {scale}x as {self.image_format}")
+        return paths
+
+    def pages_needing_images(self, pdf_path: str, min_text_chars: int = PAGE_IMAGE_MIN_TEXT_CHARS) -> List[int]:
+        """1-based pages with embedded images or under ``min_text_chars`` of text.
+
+        Scanned pages and figures are only readable from the page image;
+        the text of every other page is already in its chunks, so OCR of
+        its image would add nothing.
+        """
+        import fitz
+
+        with fitz.open(pdf_path) as pdf:
+            return [
+                page.number + 1
+                for page in pdf
+                if page.get_images() or len(page.get_text().strip()) < min_text_chars
+            ]
+
+    def render_page(self, pdf_path: str, page_no: int, scale: Optional[float] = None) -> str:
+        return self.render_pages(pdf_path, [page_no], scale)[0]
+
+    def _render(self, page, scale: float, path: Path):
+        import fitz
+        from PIL import Image
+
+        _, pil_format = IMAGE_FORMATS[self.image_format]
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False)
+        image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as fp:
+            image.save(fp, format=pil_format, quality=self.quality)
+        os.replace(tmp_path, path)
+
+    def _dir_for(self, pdf_path: str, scale: float) -> Path:
+        stat = os.stat(pdf_path)
+        key = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:12]
+        return self.cache_dir / f"{Path(pdf_path).stem}-{key}" / f"{scale:g}x-q{self.quality}"
+
+    def _prune_versions(self, pdf_path: str, current: Path):
+        """Drop pages rendered from an older version of the file"""
+        pattern = os.path.join(glob.escape(str(self.cache_dir)), f"{glob.escape(Path(pdf_path).stem)}-" + "[0-9a-f]" * 12)
+        for path in glob.glob(pattern):
+            if Path(path) != current and Path(path).is_dir():
+                shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,364 @@
+import glob
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from doc_chunking import StructuralChunker, TextBlock, tokenizer_counter
+
+from .artifacts import chunk_store_prefix
+from .chunk_store import RecordStore
+from .config import PARSE_CHECKPOINT_DIR, PARSE_PAGES_PER_RANGE, PARSE_WORKERS, PARSER_SETTINGS
+from .manifest import config_fingerprint
+
+_log = logging.getLogger(__name__)
+
+# One converter per worker process, built once by the pool initializer
+_converter = None
+_token_counter = None
+
+PageRange = Tuple[int, int]
+
+
+def build_converter():
+    from docling.datamodel.base_models import InputFormat
+    from docling.datamodel.pipeline_options import PdfPipelineOptions
+    from docling.document_converter import DocumentConverter, PdfFormatOption
+
+    pipeline_options = PdfPipelineOptions()
+    pipeline_options.images_scale = PARSER_SETTINGS["images_scale"]
+    pipeline_options.generate_page_images = PARSER_SETTINGS["page_images"]
+    pipeline_options.generate_table_images = PARSER_SETTINGS["table_images"]
+    pipeline_options.generate_picture_images = PARSER_SETTINGS["picture_images"]
+
+    converter = DocumentConverter(
+        format_options={
+            InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
+        }
+    )
+    # Load the layout and table models now rather than on the first document
+    converter.initialize_pipeline(InputFormat.PDF)
+    return converter
+
+
+def _set_torch_threads(torch_threads: int):
+    try:
+        import torch
+        # Workers share the cores; without this each one starts a thread per core
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+
+def _init_worker(torch_threads: int):
+    global _converter
+    logging.basicConfig(level=logging.INFO)
+    _set_torch_threads(torch_threads)
+    _converter = build_converter()
+
+
+class _InlineExecutor:
+    """Runs each submitted job at once in this process, for single-worker parses"""
+
+    def __init__(self, torch_threads: int):
+        _set_torch_threads(torch_threads)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, fn, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+def _get_converter():
+    global _converter
+    if _converter is None:
+        _converter = build_converter()
+    return _converter
+
+
+def _get_token_counter():
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = tokenizer_counter(PARSER_SETTINGS["chunker"]["tokenizer"])
+    return _token_counter
+
+
+def count_pages(file_path: str) -> Optional[int]:
+    try:
+        import fitz
+        with fitz.open(file_path) as pdf:
+            return pdf.page_count
+    except Exception as e:
+        _log.warning(f"Could not count pages of {file_path}, parsing it whole: {e}")
+        return None
+
+
+def split_page_ranges(page_count: Optional[int], pages_per_range: int) -> List[Optional[PageRange]]:
+    """1-based inclusive page ranges; ``[None]`` means convert the whole file"""
+    if not page_count or page_count <= pages_per_range:
+        return [None]
+    return [
+        (start, min(start + pages_per_range - 1, page_count))
+        for start in range(1, page_count + 1, pages_per_range)
+    ]
+
+
+def checkpoint_dir_for(file_path: str, checkpoint_root: str) -> Path:
+    """Checkpoint folder for this version of the file under these parser settings"""
+    stat = os.stat(file_path)
+    key = hashlib.sha256(
+        f"{stat.st_size}:{stat.st_mtime_ns}:{config_fingerprint(PARSER_SETTINGS)}".encode()
+    ).hexdigest()[:12]
+    return Path(checkpoint_root) / f"{Path(file_path).stem}-{key}"
+
+
+def convert_range(file_path: str, page_range: PageRange, checkpoint_path: str) -> float:
+    """Convert one page range and save it as a checkpoint; a saved range is skipped"""
+    from docling_core.types.doc import ImageRefMode
+
+    if os.path.exists(checkpoint_path):
+        _log.info(f"Reusing checkpoint {checkpoint_path}")
+        return 0.0
+    start_time = time.time()
+    conv_res = _get_converter().convert(file_path, page_range=page_range)
+    tmp_path = f"{checkpoint_path}.tmp"
+    conv_res.document.save_as_json(Path(tmp_path), image_mode=ImageRefMode.EMBEDDED)
+    os.replace(tmp_path, checkpoint_path)
+    elapsed = time.time() - start_time
+    _log.info(f"Converted pages {page_range[0]}-{page_range[1]} of {Path(file_path).name} in {elapsed:.2f}s")
+    return elapsed
+
+
+def export_document(documents, doc_filename: str, output_dir: Path):
+    """Write images, tables, chunks and markdown for a document.
+
+    ``documents`` are the converted parts of one PDF in page order. Table,
+    picture and chunk numbering carries on across parts, so a document
+    split into page ranges is written exactly like one converted whole.
+    """
+    import pandas as pd
+    from docling_core.types.doc import ImageRefMode, PictureItem, TableItem
+    from docling_core.transforms.chunker import HierarchicalChunker
+
+    table_counter = 0
+    picture_counter = 0
+    blocks = []
+    markdown_parts = []
+    pdf_filename = f"{doc_filename}.pdf"
+    # Docling's chunker yields one piece per document item, with its headings and page
+    item_chunker = HierarchicalChunker()
+
+    for document in documents:
+        # Save page images; in lazy mode they are rendered later, only when needed
+        for page_no, page in document.pages.items():
+            if page.image is None:
+                continue
+            page_image_filename = output_dir / f"{doc_filename}-page-{page_no}.png"
+            with page_image_filename.open("wb") as fp:
+                page.image.pil_image.save(fp, format="PNG")
+            _log.info(f"Saved page image: {page_image_filename}")
+
+        # Save images of figures and tables
+        for element, _level in document.iterate_items():
+            if isinstance(element, TableItem):
+                table_counter += 1
+                if element.image is not None:
+                    table_image_filename = output_dir / f"{doc_filename}-table-{table_counter}.png"
+                    with table_image_filename.open("wb") as fp:
+                        element.image.pil_image.save(fp, "PNG")
+                    _log.info(f"Saved table image: {table_image_filename}")
+
+                # Save the table as CSV and HTML
+                table_df: pd.DataFrame = element.export_to_dataframe()
+                table_csv_filename = output_dir / f"{doc_filename}-table-{table_counter}.csv"
+                table_df.to_csv(table_csv_filename)
+                table_html_filename = output_dir / f"{doc_filename}-table-{table_counter}.html"
+                with table_html_filename.open("w") as fp:
+                    fp.write(element.export_to_html())
+                _log.info(f"Saved table CSV: {table_csv_filename} and HTML: {table_html_filename}")
+
+            if isinstance(element, PictureItem) and element.image is not None:
+                picture_counter += 1
+                picture_image_filename = output_dir / f"{doc_filename}-picture-{picture_counter}.png"
+                with picture_image_filename.open("wb") as fp:
+                    element.image.pil_image.save(fp, "PNG")
+                _log.info(f"Saved picture image: {picture_image_filename}")
+
+        # Apply hierarchy-aware chunking for further processing
+        for item in item_chunker.chunk(document):
+            blocks.append(_text_block(item))
+        origin = getattr(document, "origin", None)
+        if origin is not None and origin.filename:
+            pdf_filename = origin.filename
+
+        markdown_parts.append(document.export_to_markdown(image_mode=ImageRefMode.EMBEDDED))
+
+    # Pack the items into token-budgeted chunks that stay within one section
+    chunker = StructuralChunker(PARSER_SETTINGS["chunker"]["max_tokens"], _get_token_counter())
+    chunk_data = (
+        {
+            "document": doc_filename,
+            "chunk_id": position,
+            "text": chunk.text,
+            "page_no": chunk.page,
+            "pdf_filename": pdf_filename,
+            "headings": list(chunk.headings),
+            "tokens": chunk.tokens
+        }
+        for position, chunk in enumerate(chunker.chunk(blocks))
+    )
+
+    # Save chunks as line-delimited records with an offset index
+    store = RecordStore.write(chunk_store_prefix(output_dir, doc_filename), chunk_data)
+    _log.info(f"{len(store)} chunks saved to {store.data_path}")
+
+    # Export markdown with embedded images for content
+    md_filename = output_dir / f"{doc_filename}-with-images.md"
+    with md_filename.open("w") as fp:
+        fp.write("\n\n".join(markdown_parts))
+    _log.info(f"Markdown with images saved: {md_filename}")
+
+
+def _text_block(item) -> TextBlock:
+    """Headings and page of a docling chunk, instead of its full metadata"""
+    meta = item.meta
+    doc_items = getattr(meta, "doc_items", None) or []
+    prov = getattr(doc_items[0], "prov", None) if doc_items else None
+    return TextBlock(
+        text=item.text,
+        headings=tuple(getattr(meta, "headings", None) or ()),
+        page=prov[0].page_no if prov else None
+    )
+
+
+def process_pdf(file_path: str, output_dir: str) -> float:
+    """Convert a whole PDF in one go and write its output"""
+    start_time = time.time()
+    conv_res = _get_converter().convert(file_path)
+    export_document([conv_res.document], Path(file_path).stem, Path(output_dir))
+    elapsed = time.time() - start_time
+    _log.info(f"{Path(file_path).stem} converted and figures exported in {elapsed:.2f} seconds.")
+    return elapsed
+
+
+def merge_ranges(file_path: str, checkpoint_paths: List[str], output_dir: str) -> float:
+    """Write the output of a range-converted PDF from its checkpoints, in page order"""
+    from docling_core.types.doc import DoclingDocument
+
+    start_time = time.time()
+    documents = (DoclingDocument.load_from_json(Path(path)) for path in checkpoint_paths)
+    export_document(documents, Path(file_path).stem, Path(output_dir))
+    return time.time() - start_time
+
+
+def parse_documents(file_paths: List[str], output_dir,
+                    max_workers: int = PARSE_WORKERS,
+                    pages_per_range: int = PARSE_PAGES_PER_RANGE,
+                    checkpoint_root: str = PARSE_CHECKPOINT_DIR,
+                    concurrent_documents: int = 1
+                    ) -> Iterator[Tuple[str, Optional[float], Optional[str]]]:
+    """Parse PDFs across a process pool, yielding results as documents finish.
+
+    Each worker process builds one converter at startup and keeps it for
+    every document it handles. PDFs longer than ``pages_per_range`` are
+    split into page ranges that convert concurrently. Each finished range
+    is checkpointed under ``checkpoint_root``, so a rerun after a failure
+    converts only the missing ranges. Once all ranges of a document are
+    done, they are merged in page order into the usual output files.
+
+    Yields ``(file_path, seconds, error)``, where ``seconds`` is the worker
+    time spent on the document and ``error`` is None on success. Workers
+    are started with ``spawn`` so they never inherit the forked state of an
+    Airflow task process.
+
+    ``concurrent_documents`` is how many calls run at once on this machine,
+    e.g. one per mapped Airflow task; the workers and torch threads are
+    divided between them so the calls together stay within the cores. A
+    call left with a single worker converts in this process instead of
+    spawning one, which also saves loading the models twice.
+    """
+    if not file_paths:
+        return
+    plans = {path: split_page_ranges(count_pages(path), pages_per_range) for path in file_paths}
+    jobs = sum(len(ranges) for ranges in plans.values())
+    concurrent_documents = max(1, concurrent_documents)
+    workers = max(1, min(max_workers // concurrent_documents, jobs))
+    torch_threads = max(1, (os.cpu_count() or 1) // (workers * concurrent_documents))
+
+    if workers == 1:
+        executor = _InlineExecutor(torch_threads)
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(torch_threads,)
+        )
+    with executor:
+        futures = {}
+        remaining = {}
+        checkpoints = {}
+        seconds = {path: 0.0 for path in file_paths}
+        failed = set()
+
+        for path, ranges in plans.items():
+            if ranges == [None]:
+                futures[executor.submit(process_pdf, path, str(output_dir))] = ("whole", path)
+                continue
+            checkpoint_dir = checkpoint_dir_for(path, checkpoint_root)
+            _clear_stale_checkpoints(path, checkpoint_root, checkpoint_dir)
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            checkpoints[path] = [
+                str(checkpoint_dir / f"pages-{start:05d}-{end:05d}.json") for start, end in ranges
+            ]
+            remaining[path] = len(ranges)
+            _log.info(f"Splitting {Path(path).name} into {len(ranges)} page ranges")
+            for page_range, checkpoint_path in zip(ranges, checkpoints[path]):
+                future = executor.submit(convert_range, path, page_range, checkpoint_path)
+                futures[future] = ("range", path)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, path = futures.pop(future)
+                if path in failed:
+                    continue
+                try:
+                    seconds[path] += future.result()
+                except Exception as e:
+                    failed.add(path)
+                    yield path, None, str(e)
+                    continue
+
+                if kind == "range":
+                    remaining[path] -= 1
+                    if remaining[path] == 0:
+                        merge = executor.submit(merge_ranges, path, checkpoints[path], str(output_dir))
+                        futures[merge] = ("merge", path)
+                    continue
+
+                if kind == "merge":
+                    shutil.rmtree(Path(checkpoints[path][0]).parent, ignore_errors=True)
+                yield path, seconds[path], None
+
+
+def _clear_stale_checkpoints(file_path: str, checkpoint_root: str, current: Path):
+    """Drop checkpoints left by an older version of the file or other settings"""
+    pattern = os.path.join(glob.escape(checkpoint_root), f"{glob.escape(Path(file_path).stem)}-" + "[0-9a-f]" * 12)
+    for path in glob.glob(pattern):
+        if Path(path) != current and Path(path).is_dir():
+            shutil.rmtree(path, ignore_errors=True)
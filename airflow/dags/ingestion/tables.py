@@ -0,0 +1,165 @@
+import logging
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from doc_chunking import TokenCounter, approximate_token_count, chunk_id
+
+from .config import CHUNK_MAX_TOKENS, TABLE_ROW_VECTOR_LIMIT
+from .upload import ThroughputTracker
+
+logger = logging.getLogger(__name__)
+
+# Header label pandas invents for a column without a header cell
+_UNNAMED_COLUMN = re.compile(r"^Unnamed: \d+$")
+
+
+def _is_unnamed(label: str, position: int) -> bool:
+    """Whether a header was invented: by pandas, or by docling, which numbers columns from 0.
+
+    A numeric header at another position, like a year, is a real label.
+    """
+    return bool(_UNNAMED_COLUMN.match(label)) or label == str(position)
+
+
+@dataclass
+class TableText:
+    """A text to embed for a table, with the stage it is encoded in"""
+    stage: str
+    key: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+def load_table(csv_path: str) -> pd.DataFrame:
+    """Read a table CSV written by the parse task, every cell as a string"""
+    # The parse task writes the DataFrame index as the first column
+    return pd.read_csv(csv_path, index_col=0, dtype=str, keep_default_na=False)
+
+
+def serialize_rows(table: pd.DataFrame) -> pd.Series:
+    """One ``column: value; ...`` line per row, built a column at a time.
+
+    Empty and missing cells are left out, and cells of unnamed columns are
+    written without a label.
+    """
+    text = pd.Series("", index=table.index, dtype=object)
+    for position, column in enumerate(table.columns):
+        values = table.iloc[:, position].fillna("").astype(str).str.strip()
+        label = str(column).strip()
+        cells = values if _is_unnamed(label, position) else f"{label}: " + values
+        cells = cells.where(values != "", "")
+        separator = ((text != "") & (cells != "")).map({True: "; ", False: ""})
+        text = text + separator + cells
+    return text
+
+
+def group_rows(row_tokens: List[int], max_tokens: int) -> List[Tuple[int, int]]:
+    """Split rows into consecutive ``[start, end)`` ranges of at most ``max_tokens`` tokens.
+
+    A row larger than the budget gets a range of its own.
+    """
+    groups = []
+    start, tokens = 0, 0
+    for position, count in enumerate(row_tokens):
+        # The line break between rows costs about one token
+        if position > start and tokens + count + 1 > max_tokens:
+            groups.append((start, position))
+            start, tokens = position, 0
+        tokens += count + (1 if position > start else 0)
+    if row_tokens:
+        groups.append((start, len(row_tokens)))
+    return groups
+
+
+class TableIngestor:
+    """Turn a table CSV into table-level, row-group and row texts.
+
+    Every table gets one ``tables`` text: its name, size and columns
+    followed by as many leading rows as fit in ``max_tokens``. Tables that
+    do not fit in one text are also split into ``table_row_groups`` of
+    consecutive rows after those, each within ``max_tokens``. Only tables of up to
+    ``row_vector_limit`` rows additionally get one ``table_rows`` text per
+    row, so a large table yields a few dozen vectors instead of thousands.
+    Texts are only produced here; the caller embeds them in bulk, one
+    encode buffer per stage.
+    """
+
+    def __init__(self, token_counter: TokenCounter = approximate_token_count,
+                 max_tokens: int = CHUNK_MAX_TOKENS,
+                 row_vector_limit: int = TABLE_ROW_VECTOR_LIMIT,
+                 tracker: ThroughputTracker = None):
+        self.count_tokens = token_counter
+        self.max_tokens = max_tokens
+        self.row_vector_limit = row_vector_limit
+        self.tracker = tracker or ThroughputTracker()
+
+    def process(self, csv_path: str) -> List[TableText]:
+        table = load_table(csv_path)
+        with self.tracker.track("table rows", len(table)):
+            texts = list(self._texts(table, Path(csv_path).stem))
+        logger.info(f"{Path(csv_path).name}: {len(table)} rows as {len(texts)} texts")
+        return texts
+
+    def records(self, csv_path: str, doc_filename: str) -> Iterator[Tuple[str, str, str, Dict[str, Any]]]:
+        """``(stage, vector_id, text, metadata)`` to upload for a table of ``doc_filename``"""
+        table_filename = os.path.basename(csv_path)
+        for table_text in self.process(csv_path):
+            metadata = {
+                "document": doc_filename,
+                "filename": table_filename,
+                "pdf_filename": f"{doc_filename}.pdf",
+                **table_text.metadata
+            }
+            vector_id = chunk_id(doc_filename, f"{table_filename}:{table_text.key}", table_text.text)
+            yield table_text.stage, vector_id, table_text.text, metadata
+
+    def _texts(self, table: pd.DataFrame, name: str) -> Iterator[TableText]:
+        rows = serialize_rows(table)
+        keep = (rows != "").to_numpy()
+        rows = rows[keep]
+        row_indices = [int(position) for position in np.flatnonzero(keep)]
+        row_texts = rows.tolist()
+        columns = [
+            str(column) for position, column in enumerate(table.columns)
+            if not _is_unnamed(str(column).strip(), position)
+        ]
+
+        summary = f"Table {name}: {len(table)} rows, {len(table.columns)} columns"
+        if columns:
+            summary += f" ({', '.join(columns)})"
+        # Leave room for the summary line in every group, so the first one fits under it
+        budget = max(1, self.max_tokens - self.count_tokens(summary) - 1)
+        groups = group_rows([self.count_tokens(text) for text in row_texts], budget)
+
+        first_rows = "\n".join(row_texts[slice(*groups[0])]) if groups else ""
+        yield TableText(
+            stage="tables",
+            key="table",
+            text=f"{summary}\n{first_rows}".strip(),
+            metadata={"type": "table", "rows": len(table), "columns": len(table.columns)}
+        )
+
+        # The first group is already in the table-level text
+        if len(groups) > 1:
+            for start, end in groups[1:]:
+                first, last = row_indices[start], row_indices[end - 1]
+                yield TableText(
+                    stage="table_row_groups",
+                    key=f"rows:{first}-{last}",
+                    text=f"{summary}\n" + "\n".join(row_texts[start:end]),
+                    metadata={"type": "table_row_group", "row_start": first, "row_end": last}
+                )
+
+        if len(table) <= self.row_vector_limit:
+            for row_index, text in zip(row_indices, row_texts):
+                yield TableText(
+                    stage="table_rows",
+                    key=str(row_index),
+                    text=text,
+                    metadata={"type": "table_row", "row_index": row_index}
+                )
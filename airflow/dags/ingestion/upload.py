@@ -0,0 +1,119 @@
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .config import EMBED_BATCH_SIZE, ENCODE_BUFFER_SIZE, UPSERT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class ThroughputTracker:
+    """Accumulates item counts and wall time per pipeline stage"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = defaultdict(lambda: {"items": 0, "seconds": 0.0})
+
+    @contextmanager
+    def track(self, stage: str, items: int):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage]["items"] += items
+            self.stages[stage]["seconds"] += time.perf_counter() - start
+
+    def report(self) -> List[str]:
+        lines = []
+        for stage, totals in self.stages.items():
+            rate = totals["items"] / totals["seconds"] if totals["seconds"] else 0.0
+            lines.append(f"{stage}: {int(totals['items'])} items in {totals['seconds']:.2f}s ({rate:.1f}/s)")
+        return lines
+
+    def log(self):
+        for line in self.report():
+            logger.info(f"Throughput {line}")
+
+
+class BatchUploader:
+    """Collects texts and vectors, encodes texts in bulk and upserts in batches.
+
+    ``add_text`` buffers a text per stage (e.g. ``"table_rows"``) and encodes
+    the buffer with one ``model.encode`` call once it holds
+    ``encode_buffer_size`` texts. ``add_vector`` takes an already computed
+    vector. Vectors go to the index ``upsert_batch_size`` at a time; call
+    ``flush`` at the end to send whatever is left. A failed encode or upsert
+    is logged and counted in ``failed``, with the affected IDs in
+    ``failed_ids``, and the run carries on. ``on_vector`` is called with
+    ``(vector_id, values, metadata)`` for every vector, e.g. to keep a copy
+    on disk.
+    """
+
+    def __init__(self, index, model, tracker: ThroughputTracker = None,
+                 embed_batch_size: int = EMBED_BATCH_SIZE,
+                 encode_buffer_size: int = ENCODE_BUFFER_SIZE,
+                 upsert_batch_size: int = UPSERT_BATCH_SIZE,
+                 on_vector: Optional[Callable[[str, Sequence[float], Dict[str, Any]], None]] = None):
+        self.index = index
+        self.model = model
+        self.tracker = tracker or ThroughputTracker()
+        self.embed_batch_size = embed_batch_size
+        self.encode_buffer_size = encode_buffer_size
+        self.upsert_batch_size = upsert_batch_size
+        self.on_vector = on_vector
+        self.uploaded = 0
+        self.failed = 0
+        self.failed_ids = set()
+        self._texts: Dict[str, List[Tuple[str, str, Dict[str, Any]]]] = defaultdict(list)
+        self._vectors: List[Tuple[str, Sequence[float], Dict[str, Any]]] = []
+
+    def add_text(self, stage: str, vector_id: str, text: str, metadata: Dict[str, Any]):
+        pending = self._texts[stage]
+        pending.append((vector_id, text, metadata))
+        if len(pending) >= self.encode_buffer_size:
+            self._encode(stage)
+
+    def add_vector(self, vector_id: str, values: Sequence[float], metadata: Dict[str, Any]):
+        if self.on_vector is not None:
+            self.on_vector(vector_id, values, metadata)
+        self._vectors.append((vector_id, values, metadata))
+        if len(self._vectors) >= self.upsert_batch_size:
+            self._upsert(self.upsert_batch_size)
+
+    def flush(self):
+        for stage in list(self._texts):
+            self._encode(stage)
+        self._upsert(1)
+
+    def _encode(self, stage: str):
+        pending, self._texts[stage] = self._texts[stage], []
+        if not pending:
+            return
+        try:
+            with self.tracker.track(f"encode {stage}", len(pending)):
+                embeddings = self.model.encode(
+                    [text for _, text, _ in pending],
+                    batch_size=self.embed_batch_size,
+                    show_progress_bar=False
+                )
+        except Exception as e:
+            logger.error(f"Failed to encode {len(pending)} {stage} texts: {e}")
+            self.failed += len(pending)
+            self.failed_ids.update(vector_id for vector_id, _, _ in pending)
+            return
+        for (vector_id, _, metadata), embedding in zip(pending, embeddings):
+            self.add_vector(vector_id, embedding.tolist(), metadata)
+
+    def _upsert(self, min_batch: int):
+        while len(self._vectors) >= min_batch and self._vectors:
+            batch = self._vectors[:self.upsert_batch_size]
+            self._vectors = self._vectors[self.upsert_batch_size:]
+            try:
+                with self.tracker.track("upsert", len(batch)):
+                    self.index.upsert(vectors=batch)
+                self.uploaded += len(batch)
+            except Exception as e:
+                logger.error(f"Failed to upsert batch of {len(batch)} vectors: {e}")
+                self.failed += len(batch)
+                self.failed_ids.update(vector_id for vector_id, _, _ in batch)
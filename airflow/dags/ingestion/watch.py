@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import WATCH_STATE_PATH
+from .manifest import IngestionManifest, source_signature
+
+# State value of an object whose removal was already handed to a run
+REMOVED = "removed"
+
+
+class WatchState:
+    """Object versions the watcher has already triggered an ingestion run for.
+
+    Until that run uploads the object, the manifest still shows the old
+    version. Without this record, every poll in between would trigger the
+    same object again. ``run_ids`` keeps the run each object was handed to,
+    so once that run has finished without ingesting it the object can be
+    triggered again.
+    """
+
+    def __init__(self, path: str = WATCH_STATE_PATH):
+        self.path = path
+        self.triggered: Dict[str, str] = {}
+        self.run_ids: Dict[str, str] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if "triggered" in data:
+                self.triggered, self.run_ids = data["triggered"], data.get("run_ids", {})
+            else:
+                # Written before runs were recorded
+                self.triggered = data
+
+    def release_finished(self, is_finished: Callable[[str], bool]) -> List[str]:
+        """Forget objects whose run has finished; those not ingested are detected again"""
+        released = [name for name, run_id in self.run_ids.items() if is_finished(run_id)]
+        for name in released:
+            self.triggered.pop(name, None)
+            del self.run_ids[name]
+        return released
+
+    def save(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"triggered": self.triggered, "run_ids": self.run_ids}, f)
+        os.replace(tmp_path, self.path)
+
+
+def detect_changes(objects: Dict[str, Dict[str, Any]], manifest: IngestionManifest,
+                   state: WatchState) -> Tuple[List[str], List[str], Dict[str, str]]:
+    """Compare a bucket listing with what was ingested or already triggered.
+
+    An object counts as ingested once its upload stage finished for this
+    version. The manifest's ``source`` alone is not enough: every run
+    records it up front, before parsing and uploading.
+
+    Returns the names of new or changed objects, the names of removed
+    ones, and the signatures to record once a run has been triggered for
+    them.
+    """
+    changed, removed, signatures = [], [], {}
+    for name, info in objects.items():
+        signature = source_signature(info)
+        if not _ingested(manifest, name, signature) and state.triggered.get(name) != signature:
+            changed.append(name)
+            signatures[name] = signature
+    for name, entry in manifest.documents.items():
+        if name not in objects and not entry.get("removed") and state.triggered.get(name) != REMOVED:
+            removed.append(name)
+            signatures[name] = REMOVED
+    return sorted(changed), sorted(removed), signatures
+
+
+def _ingested(manifest: IngestionManifest, name: str, signature: str) -> bool:
+    entry = manifest.documents.get(name)
+    if entry is None or entry.get("removed"):
+        return False
+    upload = entry["stages"].get("upload")
+    return bool(upload) and upload["source"] == signature
+
+
+def record_triggered(state: WatchState, manifest: IngestionManifest, signatures: Dict[str, str],
+                     run_id: Optional[str] = None):
+    state.triggered.update(signatures)
+    if run_id:
+        state.run_ids.update({name: run_id for name in signatures})
+    # Entries the manifest has caught up with are no longer needed
+    for name, signature in list(state.triggered.items()):
+        entry = manifest.documents.get(name)
+        if signature == REMOVED:
+            caught_up = entry is None or entry.get("removed")
+        else:
+            caught_up = _ingested(manifest, name, signature)
+        if caught_up and name not in signatures:
+            del state.triggered[name]
+            state.run_ids.pop(name, None)
+    state.save()
@@ -0,0 +1,86 @@
+from dotenv import load_dotenv
+from airflow import DAG
+from airflow.operators.python_operator import PythonOperator, ShortCircuitOperator
+from airflow.operators.trigger_dagrun import TriggerDagRunOperator
+from datetime import datetime, timedelta
+
+from ingestion.config import WATCH_INTERVAL_MINUTES
+
+
+load_dotenv()
+
+INGESTION_DAG_ID = 'parse_and_pinecone_upload'
+
+def ingestion_run_finished(run_id):
+    from airflow.models import DagRun
+    from airflow.utils.state import DagRunState
+
+    runs = DagRun.find(dag_id=INGESTION_DAG_ID, run_id=run_id)
+    # A run deleted from the metadata database is as good as finished
+    return not runs or runs[0].state in (DagRunState.SUCCESS, DagRunState.FAILED)
+
+def detect_publication_changes():
+    from ingestion.config import MANIFEST_PATH
+    from ingestion.gcs import get_bucket, list_publications, object_info
+    from ingestion.manifest import IngestionManifest
+    from ingestion.watch import WatchState, detect_changes
+
+    # Objects of finished runs that did not ingest them, e.g. failed runs, are triggered again
+    state = WatchState()
+    released = state.release_finished(ingestion_run_finished)
+    if released:
+        print(f"Runs finished for {len(released)} triggered publications: {released}")
+        state.save()
+
+    # Listing the prefix reads object metadata only, so polling every few minutes is cheap
+    objects = {blob.name: object_info(blob) for blob in list_publications(get_bucket())}
+    changed, removed, signatures = detect_changes(objects, IngestionManifest(MANIFEST_PATH), state)
+    if not signatures:
+        print("No new, changed or removed publications")
+        return None
+
+    print(f"{len(changed)} new or changed publications: {changed}")
+    print(f"{len(removed)} removed publications: {removed}")
+    # Returned value goes to XCom as the conf of the ingestion run; nothing skips the trigger
+    return {"publications": changed, "signatures": signatures}
+
+def record_triggered_publications(ti=None):
+    from ingestion.config import MANIFEST_PATH
+    from ingestion.manifest import IngestionManifest
+    from ingestion.watch import WatchState, record_triggered
+
+    conf = ti.xcom_pull(task_ids="detect_publication_changes")
+    # The trigger task pushes the ID of the run it started
+    run_id = ti.xcom_pull(task_ids="trigger_ingestion", key="trigger_run_id")
+    record_triggered(WatchState(), IngestionManifest(MANIFEST_PATH), conf["signatures"], run_id)
+
+# Define the DAG
+with DAG(
+    dag_id='publication_watcher',
+    # Polls the bucket so a new publication is ingested within minutes, not at the next daily run
+    schedule_interval=timedelta(minutes=WATCH_INTERVAL_MINUTES),
+    start_date=datetime(2024, 11, 12),
+    catchup=False,
+    max_active_runs=1,
+    render_template_as_native_obj=True,
+    tags=['parsing', 'pineconeupload']
+) as dag:
+
+    detect_task = ShortCircuitOperator(
+        task_id='detect_publication_changes',
+        python_callable=detect_publication_changes
+    )
+
+    # Runs the ingestion DAG for just the changed publications; removals are handled by every run
+    trigger_task = TriggerDagRunOperator(
+        task_id='trigger_ingestion',
+        trigger_dag_id=INGESTION_DAG_ID,
+        conf="{{ ti.xcom_pull(task_ids='detect_publication_changes') }}"
+    )
+
+    record_task = PythonOperator(
+        task_id='record_triggered_publications',
+        python_callable=record_triggered_publications
+    )
+    # Set task dependencies
+    detect_task >> trigger_task >> record_task
@@ -1,6 +1,11 @@
 from google.cloud import storage
 from dotenv import load_dotenv
 import os
+import sys
+
+# Reuse the DAG's download cache
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dags"))
+from ingestion.download import DownloadCache
 
 # Load environment variables from .env file
 load_dotenv()
@@ -25,19 +30,26 @@ file_paths = [
     "cfai_publications/An Introduction to Alternative Credit/An Introduction to Alternative Credit.pdf"
 ]
 
-# Function to download specific documents to the current directory
+# Function to download specific documents into the local cache
 def download_documents_from_gcs(file_paths):
-    current_directory = os.getcwd()  # Get the current directory path
-    
+    blobs = []
     for file_path in file_paths:
-        blob = bucket.blob(file_path)
-        
-        # Get the filename from the full path and set the local path in the current directory
-        local_file_path = os.path.join(current_directory, os.path.basename(file_path))
-        
-        # Download the document
-        blob.download_to_filename(local_file_path)
-        print(f"Downloaded {file_path} to {local_file_path}")
+        blob = bucket.get_blob(file_path)
+        if blob is None:
+            print(f"Not found in bucket: {file_path}")
+            continue
+        blobs.append(blob)
+    
+    # Fetched concurrently; unchanged files already in the cache are skipped
+    results = DownloadCache().fetch_all(blobs)
+    for file_path, result in results.items():
+        if "error" in result:
+            print(f"Failed to download {file_path}: {result['error']}")
+        elif result["downloaded"]:
+            print(f"Downloaded {file_path} to {result['path']}")
+        else:
+            print(f"Cached copy of {file_path} is current: {result['path']}")
+    return {file_path: result["path"] for file_path, result in results.items() if "path" in result}
 
 # Download the specified documents
 download_documents_from_gcs(file_paths)
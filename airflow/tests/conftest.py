@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The DAG folder and the shared chunking package are on the path in the Airflow containers
+AIRFLOW_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(AIRFLOW_DIR, "dags"))
+sys.path.insert(0, os.path.join(os.path.dirname(AIRFLOW_DIR), "shared"))
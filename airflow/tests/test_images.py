@@ -0,0 +1,13 @@
+from ingestion.images import ClipImageEmbedder, ImageIngestor, ImageResultCache
+
+def test_concurrent_embed_tasks_divide_ocr_workers_and_clip_threads(tmp_path):
+    """Test OCR processes and CLIP threads are shared between concurrent embed tasks"""
+    cache = ImageResultCache(str(tmp_path / "images.sqlite3"))
+    with ImageIngestor(None, cache=cache, ocr_workers=8, concurrent_documents=4) as ingestor:
+        assert ingestor.ocr_workers == 2
+    with ImageIngestor(None, cache=cache, ocr_workers=2, concurrent_documents=4) as ingestor:
+        assert ingestor.ocr_workers == 1
+    cache.close()
+
+    assert ClipImageEmbedder(None, None, threads=8, concurrent_documents=4).threads == 2
+    assert ClipImageEmbedder(None, None, threads=2, concurrent_documents=4).threads == 1
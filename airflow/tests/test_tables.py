@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from doc_chunking import approximate_token_count, chunk_id
+from ingestion.tables import TableIngestor, group_rows, load_table, serialize_rows
+from ingestion.upload import BatchUploader
+
+class FakeModel:
+    def encode(self, texts, batch_size=None, show_progress_bar=False):
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+class FakeIndex:
+    def __init__(self):
+        self.vectors = []
+
+    def upsert(self, vectors):
+        self.vectors.extend(vectors)
+
+def _write_csv(tmp_path, table, name="report-table-1.csv"):
+    path = tmp_path / name
+    # The parse task writes the DataFrame index as the first column
+    table.to_csv(path)
+    return str(path)
+
+def test_serialize_rows_labels_cells_and_skips_empty_ones():
+    """Test rows become ``column: value`` lines without empty, NaN or unnamed-column labels"""
+    table = pd.DataFrame({
+        "Metric": ["Revenue", "Margin", None],
+        "Unnamed: 1": ["USD", "", None],
+        "2023": ["10", np.nan, None],
+        "2024": [" 12 ", "5%", np.nan]
+    })
+
+    assert serialize_rows(table).tolist() == [
+        "Metric: Revenue; USD; 2023: 10; 2024: 12",
+        "Metric: Margin; 2024: 5%",
+        ""
+    ]
+
+def test_serialize_rows_leaves_positional_headers_unlabeled():
+    """Test docling's numbered headers are dropped while numeric labels like years are kept"""
+    table = pd.DataFrame([["Revenue", "10", "12"]], columns=["0", "1", "2024"])
+    assert serialize_rows(table).tolist() == ["Revenue; 10; 2024: 12"]
+
+def test_serialize_rows_keeps_duplicate_columns_apart():
+    """Test columns sharing a label are read by position, so neither value is lost"""
+    table = pd.DataFrame([["a", "b", "c"]], columns=["Year", "Year", "Total"])
+    assert serialize_rows(table).tolist() == ["Year: a; Year: b; Total: c"]
+
+def test_load_table_reads_every_cell_as_a_string(tmp_path):
+    """Test numbers keep their formatting and empty cells stay empty strings"""
+    path = _write_csv(tmp_path, pd.DataFrame({"Id": ["007", "8"], "Note": ["", "ok"]}))
+    table = load_table(path)
+
+    assert table["Id"].tolist() == ["007", "8"]
+    assert serialize_rows(table).tolist() == ["Id: 007", "Id: 8; Note: ok"]
+
+def test_group_rows_respects_the_token_budget():
+    """Test consecutive rows are grouped within the budget and an oversized row stands alone"""
+    assert group_rows([4, 4, 4, 20, 3], 10) == [(0, 2), (2, 3), (3, 4), (4, 5)]
+    assert group_rows([], 10) == []
+
+def test_large_table_is_split_into_row_groups_within_max_tokens(tmp_path):
+    """Test the table text and every row group fit the budget and cover each row once"""
+    table = pd.DataFrame({
+        "Name": [f"item{i}" for i in range(40)],
+        "Value": [str(i) for i in range(40)]
+    })
+    ingestor = TableIngestor(approximate_token_count, max_tokens=30, row_vector_limit=10)
+    texts = ingestor.process(_write_csv(tmp_path, table))
+
+    stages = [text.stage for text in texts]
+    assert stages[0] == "tables"
+    assert set(stages[1:]) == {"table_row_groups"}
+    assert all(approximate_token_count(text.text) <= 30 for text in texts)
+
+    # Every row lands in exactly one of the table text and the row groups
+    summary = texts[0].text.split("\n")[0]
+    rows = [line for text in texts for line in text.text.split("\n") if line != summary]
+    assert rows == serialize_rows(load_table(_write_csv(tmp_path, table))).tolist()
+    group = texts[1].metadata
+    assert texts[1].key == f"rows:{group['row_start']}-{group['row_end']}"
+    assert texts[-1].metadata["row_end"] == 39
+
+def test_row_vectors_only_for_tables_within_the_limit(tmp_path):
+    """Test per-row texts are produced up to ``row_vector_limit`` rows, keyed by row position"""
+    table = pd.DataFrame({"Name": ["a", "", "c"], "Value": ["1", "", "3"]})
+    path = _write_csv(tmp_path, table)
+
+    within = TableIngestor(approximate_token_count, max_tokens=100, row_vector_limit=3).process(path)
+    rows = [text for text in within if text.stage == "table_rows"]
+    # The empty middle row is skipped, and later rows keep their position
+    assert [(text.key, text.text) for text in rows] == [("0", "Name: a; Value: 1"), ("2", "Name: c; Value: 3")]
+    assert rows[1].metadata == {"type": "table_row", "row_index": 2}
+
+    over = TableIngestor(approximate_token_count, max_tokens=100, row_vector_limit=2).process(path)
+    assert [text.stage for text in over] == ["tables"]
+    assert over[0].metadata == {"type": "table", "rows": 3, "columns": 2}
+
+def test_table_records_reach_the_uploader_with_ids_and_metadata(tmp_path):
+    """Test the vector IDs and metadata of a table's texts as queued with BatchUploader.add_text"""
+    table = pd.DataFrame({"Name": ["a", "b"], "Value": ["1", "2"]})
+    path = _write_csv(tmp_path, table)
+    ingestor = TableIngestor(approximate_token_count, max_tokens=100, row_vector_limit=5)
+
+    index = FakeIndex()
+    uploader = BatchUploader(index, FakeModel(), encode_buffer_size=100, upsert_batch_size=100)
+    calls = []
+    for stage, vector_id, text, metadata in ingestor.records(path, "report"):
+        calls.append((stage, vector_id, text, metadata))
+        uploader.add_text(stage, vector_id, text, metadata)
+    uploader.flush()
+
+    texts = ingestor.process(path)
+    assert [call[1] for call in calls] == [
+        chunk_id("report", f"report-table-1.csv:{text.key}", text.text) for text in texts
+    ]
+    assert len({call[1] for call in calls}) == len(calls) == 3
+    for (_, _, _, metadata), text in zip(calls, texts):
+        assert metadata == {
+            "document": "report",
+            "filename": "report-table-1.csv",
+            "pdf_filename": "report.pdf",
+            **text.metadata
+        }
+    assert sorted(vector[0] for vector in index.vectors) == sorted(call[1] for call in calls)
+    assert uploader.uploaded == 3 and uploader.failed == 0
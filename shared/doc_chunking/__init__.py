@@ -0,0 +1,17 @@
+"""Chunking and chunk IDs shared by the ingestion DAG and the API's reindex script.
+
+Both sides must split text and name vectors identically, so this package
+is put on the path of each: the Airflow containers mount it and add it
+to PYTHONPATH, the reindex script adds it from the repository checkout.
+"""
+from .chunk_ids import chunk_id, content_hash, normalize_text
+from .chunking import (
+    Chunk,
+    StructuralChunker,
+    TextBlock,
+    TokenCounter,
+    approximate_token_count,
+    split_paragraphs,
+    tiktoken_counter,
+    tokenizer_counter
+)
@@ -0,0 +1,23 @@
+import hashlib
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so formatting-only differences hash the same"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the normalized text, stable across processes and runs"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def chunk_id(document: str, position, text: str) -> str:
+    """Vector ID for a chunk at ``position`` within ``document``.
+
+    Unlike ``hash()``, which is salted per process, the ID is the same on
+    every run for the same content and location, so re-ingesting a document
+    overwrites its vectors instead of adding duplicates.
+    """
+    key = f"{document}\x00{position}\x00{content_hash(text)}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
@@ -0,0 +1,150 @@
+import logging
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+@dataclass
+class TextBlock:
+    """A paragraph-sized piece of a document with its place in the outline"""
+    text: str
+    headings: Tuple[str, ...] = ()
+    page: Optional[int] = None
+
+
+@dataclass
+class Chunk:
+    text: str
+    headings: Tuple[str, ...] = ()
+    pages: List[int] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def page(self) -> Optional[int]:
+        return self.pages[0] if self.pages else None
+
+
+def approximate_token_count(text: str) -> int:
+    """About 4 tokens per 3 words, for when no tokenizer is available"""
+    return (len(text.split()) * 4 + 2) // 3
+
+
+def tiktoken_counter(encoding_name: str = "cl100k_base") -> TokenCounter:
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding(encoding_name)
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception as e:
+        # The encoding is downloaded on first use and may be unreachable
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens: {e}")
+        return approximate_token_count
+
+
+def tokenizer_counter(model_name: str) -> TokenCounter:
+    """Count tokens the way a Hugging Face model's tokenizer does"""
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.warning(f"Tokenizer of {model_name} unavailable, estimating tokens: {e}")
+        return approximate_token_count
+
+
+def split_paragraphs(text: str) -> List[str]:
+    return [paragraph.strip() for paragraph in _PARAGRAPH_BREAK.split(text) if paragraph.strip()]
+
+
+class StructuralChunker:
+    """Pack paragraphs into chunks of at most ``max_tokens`` tokens.
+
+    Blocks are consumed lazily and chunks are yielded as soon as they are
+    full. Consecutive blocks under the same headings are joined until the
+    next one would exceed the budget. A change of headings always starts a
+    new chunk, so a chunk never spans two sections. A block larger than
+    the budget is split at sentence ends, and a sentence larger than the
+    budget at word boundaries. Chunks do not overlap, so no text is
+    embedded or stored twice.
+    """
+
+    def __init__(self, max_tokens: int, token_counter: TokenCounter = approximate_token_count):
+        if max_tokens < 1:
+            raise ValueError(f"max_tokens must be positive, got {max_tokens}")
+        self.max_tokens = max_tokens
+        self.count_tokens = token_counter
+
+    def chunk(self, blocks: Iterable[TextBlock]) -> Iterator[Chunk]:
+        parts: List[str] = []
+        pages: List[int] = []
+        headings: Tuple[str, ...] = ()
+        tokens = 0
+
+        def flush() -> Optional[Chunk]:
+            nonlocal parts, pages, tokens
+            if not parts:
+                return None
+            text = "\n\n".join(parts)
+            chunk = Chunk(text=text, headings=headings, pages=sorted(set(pages)), tokens=self.count_tokens(text))
+            parts, pages, tokens = [], [], 0
+            return chunk
+
+        for block in blocks:
+            text = block.text.strip()
+            if not text:
+                continue
+            block_headings = tuple(block.headings)
+            if block_headings != headings:
+                chunk = flush()
+                if chunk:
+                    yield chunk
+                headings = block_headings
+
+            for piece, piece_tokens in self._pieces(text):
+                # The separator between parts costs about one token
+                if parts and tokens + piece_tokens + 1 > self.max_tokens:
+                    yield flush()
+                parts.append(piece)
+                tokens += piece_tokens + (1 if len(parts) > 1 else 0)
+                if block.page is not None:
+                    pages.append(block.page)
+
+        chunk = flush()
+        if chunk:
+            yield chunk
+
+    def _pieces(self, text: str) -> Iterator[Tuple[str, int]]:
+        tokens = self.count_tokens(text)
+        if tokens <= self.max_tokens:
+            yield text, tokens
+            return
+        sentences = _SENTENCE_END.split(text)
+        if len(sentences) > 1:
+            # Sentences of an oversized paragraph are packed again by the caller
+            for sentence in sentences:
+                yield from self._pieces(sentence)
+            return
+        yield from self._split_words(text, tokens)
+
+    def _split_words(self, text: str, tokens: int) -> Iterator[Tuple[str, int]]:
+        words = text.split()
+        if len(words) <= 1:
+            # A single huge token run (e.g. a URL or table dump) cannot be split on words
+            yield text, tokens
+            return
+        parts = math.ceil(tokens / self.max_tokens)
+        size = math.ceil(len(words) / parts)
+        for start in range(0, len(words), size):
+            piece = " ".join(words[start:start + size])
+            piece_tokens = self.count_tokens(piece)
+            if piece_tokens > self.max_tokens and size > 1:
+                yield from self._split_words(piece, piece_tokens)
+            else:
+                yield piece, piece_tokens
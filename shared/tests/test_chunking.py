@@ -0,0 +1,75 @@
+import pytest
+from doc_chunking import StructuralChunker, TextBlock, approximate_token_count
+
+def _words(n, word="word"):
+    return " ".join(f"{word}{i}" for i in range(n))
+
+def test_chunks_never_span_two_heading_sections():
+    """Test a change of headings starts a new chunk even when the budget has room"""
+    blocks = [
+        TextBlock("intro one", headings=("Intro",)),
+        TextBlock("intro two", headings=("Intro",)),
+        TextBlock("method one", headings=("Intro", "Method")),
+        TextBlock("results one", headings=("Results",))
+    ]
+    chunks = list(StructuralChunker(100).chunk(blocks))
+
+    assert [chunk.headings for chunk in chunks] == [("Intro",), ("Intro", "Method"), ("Results",)]
+    assert chunks[0].text == "intro one\n\nintro two"
+
+def test_blocks_are_packed_within_max_tokens():
+    """Test consecutive paragraphs are joined until the next would exceed the budget"""
+    # 6 words are 8 approximate tokens; two with the separator make 17
+    blocks = [TextBlock(_words(6, f"p{n}_")) for n in range(5)]
+    chunks = list(StructuralChunker(20).chunk(blocks))
+
+    assert [chunk.text.count("\n\n") + 1 for chunk in chunks] == [2, 2, 1]
+    assert all(chunk.tokens <= 20 for chunk in chunks)
+    assert "\n\n".join(chunk.text for chunk in chunks) == "\n\n".join(block.text for block in blocks)
+
+def test_oversized_block_splits_at_sentences_then_words():
+    """Test a block over budget splits at sentence ends, and a long sentence at word boundaries"""
+    short = "Short sentence here."
+    long_sentence = _words(30) + "."
+    chunker = StructuralChunker(10)
+
+    pieces = list(chunker._pieces(f"{short} {long_sentence}"))
+
+    assert pieces[0] == (short, approximate_token_count(short))
+    assert all(tokens <= 10 for _, tokens in pieces)
+    assert " ".join(text for text, _ in pieces[1:]) == long_sentence
+    assert len(pieces) > 2
+
+def test_split_words_keeps_every_word_in_order():
+    """Test word splitting yields pieces within budget that rejoin to the input"""
+    text = _words(25)
+    pieces = list(StructuralChunker(7)._split_words(text, approximate_token_count(text)))
+
+    assert all(tokens <= 7 for _, tokens in pieces)
+    assert " ".join(piece for piece, _ in pieces) == text
+
+def test_single_word_over_budget_becomes_its_own_chunk():
+    """Test a word that cannot be split is kept whole rather than dropped or looped on"""
+    huge = "x" * 500
+    counter = lambda text: len(text) // 10 + 1
+    chunks = list(StructuralChunker(5, counter).chunk([TextBlock("a b"), TextBlock(huge), TextBlock("c d")]))
+
+    assert [chunk.text for chunk in chunks] == ["a b", huge, "c d"]
+    assert chunks[1].tokens > 5
+
+def test_chunk_page_is_the_page_it_starts_on():
+    """Test pages are tracked across page breaks when paragraphs are packed together"""
+    blocks = [
+        TextBlock("end of page one", page=1),
+        TextBlock("start of page two", page=2),
+        TextBlock(_words(12), page=2),
+        TextBlock("page three", page=3)
+    ]
+    chunks = list(StructuralChunker(20).chunk(blocks))
+
+    assert [chunk.pages for chunk in chunks] == [[1, 2], [2, 3]]
+    assert [chunk.page for chunk in chunks] == [1, 2]
+
+def test_max_tokens_must_be_positive():
+    with pytest.raises(ValueError):
+        StructuralChunker(0)